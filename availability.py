@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+
+
+def parse_slots(value):
+    """Availability cell as a list of labels: lists as stored by the admin panel, or comma-separated text"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        items = list(value)
+    elif isinstance(value, str):
+        items = value.split(',')
+    else:
+        return []
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class TeacherCalendar:
+    """Teacher availability as bitmasks over the grid's slot index, plus weekly load limits.
+
+    Parsed once per solve. ``free_at[s]`` has bit t set when teacher t is
+    available in slot s, so the teachers free for a whole lab block are the
+    AND of the block's slot masks; ``masks[t]`` is the same information per
+    teacher, and ``words`` packs it into uint64 words for vectorized checks
+    over a whole timetable. An empty or missing availability means always
+    available; ``max_load`` (periods per week) is infinite when unset.
+    """
+
+    def __init__(self, grid, masks, max_load, ids=None):
+        self.grid = grid
+        self.masks = list(masks)
+        self.ids = list(ids) if ids is not None else list(range(len(self.masks)))
+        self.pos = {tid: t for t, tid in enumerate(self.ids)}
+        self.max_load = np.asarray(max_load, dtype=float)
+        n_slots = grid.n_slots
+        self.free_at = [sum(1 << t for t, mask in enumerate(self.masks) if mask >> s & 1) for s in range(n_slots)]
+        n_words = max(1, (n_slots + 63) // 64)
+        self.words = np.array([[(mask >> (64 * w)) & (2 ** 64 - 1) for w in range(n_words)] for mask in self.masks],
+                              dtype=np.uint64).reshape(len(self.masks), n_words)
+        self.slot_index = {grid.label(d, p): int(grid.slot(d, p))
+                           for d in range(grid.n_days) for p in range(grid.n_periods)}
+
+    @property
+    def n_teachers(self):
+        return len(self.masks)
+
+    @classmethod
+    def from_teachers(cls, teachers, grid):
+        """From the rule.py teachers table (Availability labels such as 'Mon-9AM' or a whole day 'Mon', MaxLoad)"""
+        everything = (1 << grid.n_slots) - 1
+        day_masks = {day: sum(1 << int(grid.slot(d, p)) for p in range(grid.n_periods))
+                     for d, day in enumerate(grid.days)}
+        slot_bits = {grid.label(d, p): 1 << int(grid.slot(d, p))
+                     for d in range(grid.n_days) for p in range(grid.n_periods)}
+        masks = []
+        cells = teachers['Availability'] if 'Availability' in teachers.columns else [None] * len(teachers)
+        for value in cells:
+            mask = 0
+            for label in parse_slots(value):
+                mask |= slot_bits.get(label, day_masks.get(label, 0))  # unknown labels are ignored
+            masks.append(mask or everything)
+        max_load = np.full(len(teachers), np.inf)
+        if 'MaxLoad' in teachers.columns:
+            loads = np.array([_number(v) for v in teachers['MaxLoad']], dtype=float)
+            max_load = np.where(np.isnan(loads) | (loads <= 0), np.inf, loads)
+        return cls(grid, masks, max_load, teachers['TeacherID'].tolist())
+
+    def block(self, slot, length=1):
+        """Bit mask of `length` consecutive slots from `slot`"""
+        return ((1 << length) - 1) << slot
+
+    def available(self, teacher, slot, length=1):
+        if teacher < 0 or slot < 0:
+            return False
+        block = self.block(slot, length)
+        return self.masks[teacher] & block == block
+
+    def free_teachers(self, slot, length=1):
+        """Teacher bit mask of everyone free for the whole block"""
+        free = self.free_at[slot]
+        for s in range(slot + 1, min(slot + length, len(self.free_at))):
+            free &= self.free_at[s]
+        return free
+
+    def loads(self, teacher, length=None):
+        """Periods per teacher from teacher indices (-1 = none), one per period or weighted by block length"""
+        teacher = np.asarray(teacher, dtype=np.int64)
+        ok = teacher >= 0
+        weights = np.asarray(length, dtype=float)[ok] if length is not None else None
+        return np.bincount(teacher[ok], weights=weights, minlength=self.n_teachers).astype(float)
+
+    def choose(self, slot, length=1, load=None, rng=random):
+        """A random teacher free for the block and, given running `load` counters, still under MaxLoad.
+
+        Falls back to any free teacher, then to anyone under their load, then
+        to anyone; the fitness counts whatever is left as hard violations.
+        """
+        free = self.free_teachers(slot, length) if slot >= 0 else 0
+        candidates = [t for t in range(self.n_teachers) if free >> t & 1]
+        if load is not None:
+            fits = [t for t in (candidates or range(self.n_teachers)) if load[t] + length <= self.max_load[t]]
+            candidates = fits or candidates
+        return rng.choice(candidates) if candidates else rng.randrange(self.n_teachers)
+
+    def unavailable(self, faculty, slot):
+        """Occupied periods (parallel arrays, -1 = unassigned) whose teacher is not available then"""
+        faculty, slot = np.asarray(faculty), np.asarray(slot)
+        ok = (faculty >= 0) & (slot >= 0)
+        f, s = faculty[ok], slot[ok].astype(np.uint64)
+        bits = self.words[f, (s >> np.uint64(6)).astype(np.int64)] >> (s & np.uint64(63))
+        return int((~bits & np.uint64(1)).sum())
+
+    def overload(self, load):
+        """Periods above MaxLoad, summed over teachers"""
+        excess = np.asarray(load, dtype=float) - self.max_load  # -inf where there is no limit
+        return int(np.maximum(excess, 0).sum())
@@ -0,0 +1,309 @@
+"""Reproducible scaling benchmarks for the dataset generator and the solvers.
+
+Runs every stage against synthetic universities at several multiples of
+the current generator size and records wall time, peak memory (RSS
+growth, or tracemalloc) and, for solvers, hard/soft violations over
+time. Results are written as JSON so two commits can be compared:
+
+    python benchmarks/bench_scaling.py --scales 1,5,25,100
+    python benchmarks/bench_scaling.py --compare old.json new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SCALES = [1, 5, 25, 100]
+SEED = 42
+TRACE_MEMORY = False
+CAMPUSES = 1  # --campuses: generator rooms spread over this many campuses
+RULE_MAX_COURSES = 2000  # the dict-based rule.py GA is benchmarked up to the 1x generator size
+
+
+def seed_all():
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def replicate(records, scale, id_key):
+    """Copy generator records `scale` times with fresh ids (extra copies act as extra batches/sections)"""
+    out = []
+    next_id = 1
+    for copy in range(scale):
+        for record in records:
+            row = dict(record)
+            row[id_key] = next_id
+            if copy and 'course_code' in row:
+                row['course_code'] = f"{row['course_code']}X{copy}"
+                row['batch'] = f"{row['batch']}-{copy}"
+            out.append(row)
+            next_id += 1
+    return out
+
+
+def measure(fn, *args):
+    """Run fn(*args) returning (result, seconds, peak MB).
+
+    Memory is the growth of the process peak RSS during the call, or the
+    tracemalloc peak with --trace-memory (which slows allocation-heavy
+    pure-Python stages several times, so timings are not comparable).
+    """
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    if TRACE_MEMORY:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, seconds, peak / 2 ** 20
+    return result, seconds, _max_rss_mb() - rss_before
+
+
+def _total(values):
+    values = list(values)
+    return None if any(v is None for v in values) else sum(values)
+
+
+def _max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ----- STAGES -----
+def bench_generator(scale, row_limit):
+    import sample
+
+    seed_all()
+    rows = {}
+
+    def scaled_courses():
+        base = sample.generate_courses()
+        return base, replicate(base, scale, 'course_id')
+
+    (base_courses, courses), seconds, peak = measure(scaled_courses)
+    rows['generate_courses'] = {'seconds': seconds, 'peak_mb': peak, 'rows': len(courses)}
+
+    rooms_spec = sample.ROOMS
+    sample.ROOMS = {k: dict(v, count=v['count'] * scale) for k, v in rooms_spec.items()}
+    try:
+        rooms, seconds, peak = measure(sample.generate_rooms, CAMPUSES)
+    finally:
+        sample.ROOMS = rooms_spec
+    rows['generate_rooms'] = {'seconds': seconds, 'peak_mb': peak, 'rows': len(rooms)}
+
+    _, seconds, peak = measure(sample.assign_rooms_to_courses, courses, rooms)
+    rows['assign_rooms_to_courses'] = {'seconds': seconds, 'peak_mb': peak, 'rows': len(courses)}
+
+    expected = sum(c['enrollment'] for c in courses)
+    if expected > row_limit:
+        rows['generate_student_enrollments'] = {'skipped': f'{expected} rows > row limit {row_limit}'}
+        enrollments = None
+    else:
+        enrollments, seconds, peak = measure(sample.generate_student_enrollments, courses)
+        # The generator draws from a fixed pool of 2000 students; give every copy its own student body
+        for row in enrollments:
+            copy = (row['course_id'] - 1) // len(base_courses)
+            if copy:
+                row['student_id'] = f"{row['student_id']}-{copy}"
+        rows['generate_student_enrollments'] = {'seconds': seconds, 'peak_mb': peak, 'rows': len(enrollments)}
+    return rows, courses, rooms, enrollments
+
+
+def bench_session_solver(courses, rooms, enrollments, generations, time_budget):
+    from clash_matrix import ClashMatrix
+    from ga_controls import ConvergenceMonitor, RunControls
+    from problem import load_problem
+    import session_solver
+
+    seed_all()
+    problem, seconds, peak = measure(load_problem, pd.DataFrame(courses), rooms)
+    rows = {'load_problem': {'seconds': seconds, 'peak_mb': peak, 'rows': problem.n_sessions}}
+    if enrollments is not None:
+        frame = pd.DataFrame(enrollments)
+        problem.clashes, seconds, peak = measure(ClashMatrix.from_enrollments, frame, problem.course_ids)
+        rows['clash_matrix'] = {'seconds': seconds, 'peak_mb': peak, 'rows': len(frame),
+                                'nnz': problem.clashes.nnz}
+
+    monitor = ConvergenceMonitor(RunControls(max_generations=generations, time_budget=time_budget,
+                                             stop_when_feasible=True))
+    (genome, layout), seconds, peak = measure(
+        lambda: session_solver.genetic_algorithm(problem, population_size=30, generations=generations,
+                                                 seed=SEED, monitor=monitor))
+    hard = session_solver.violations(problem, layout, genome[:layout.n_genes], genome[layout.n_genes:])
+    soft, breakdown, _ = session_solver.soft_engine(problem).evaluate(
+        session_solver.schedule_arrays(problem, layout, genome))
+    rows['session_solver'] = {
+        'seconds': seconds, 'peak_mb': peak, 'rows': layout.n_genes,
+        'generations': len(monitor.trace), 'stop_reason': monitor.trace.stop_reason,
+        'hard_violations': hard, 'soft_penalty': soft, 'soft_breakdown': breakdown,
+        # quality versus time: hard violations and the soft penalty of each generation's best genome
+        'trace': [{'elapsed': g['elapsed'], 'hard_violations': g['hard_violations'],
+                   'soft_penalty': session_solver.soft_penalty(g['best'])}
+                  for g in monitor.trace.generations],
+    }
+    return rows
+
+
+def bench_parallel(courses, rooms, enrollments, generations, workers):
+    """Session-GA islands over the memory-mapped problem: wall time, attach time and RSS per worker"""
+    from clash_matrix import ClashMatrix
+    from ga_controls import RunControls
+    from problem import load_problem
+    import shared_problem
+
+    problem = load_problem(pd.DataFrame(courses), rooms)
+    if enrollments is not None:
+        problem.clashes = ClashMatrix.from_enrollments(pd.DataFrame(enrollments), problem.course_ids)
+    rows = {}
+    for n in workers:
+        start = time.perf_counter()
+        _, _, islands = shared_problem.solve_parallel(problem, n, seed=SEED, generations=generations,
+                                                      controls=RunControls(max_generations=generations),
+                                                      population_size=30)
+        rows[f'parallel_{n}_workers'] = {
+            # Growth of each worker's RSS during its GA, after attaching: the shared maps are not counted again
+            'seconds': time.perf_counter() - start, 'peak_mb': _total(i['solve_mb'] for i in islands),
+            'rows': problem.n_sessions, 'attach_ms': [1000 * i['attach_seconds'] for i in islands],
+            'worker_attach_rss_mb': [i['attach_rss_mb'] for i in islands],
+            'worker_rss_mb': [i['rss_mb'] for i in islands], 'workers_pss_mb': _total(i['pss_mb'] for i in islands),
+            'fitness': [i['fitness'] for i in islands],
+        }
+    return rows
+
+
+def bench_rule_solver(courses, rooms, generations):
+    import rule
+
+    if len(courses) > RULE_MAX_COURSES:
+        return {'rule_genetic_algorithm': {'skipped': f'{len(courses)} courses too many for the dict-based GA'}}
+    seed_all()
+    cdf = pd.DataFrame({'CourseID': [c['course_code'] for c in courses],
+                        'TheoryHours': [c['theory_hours'] + c['tutorial_hours'] for c in courses],
+                        'PracticalHours': [c['lab_hours'] for c in courses]})
+    rdf = pd.DataFrame({'RoomID': [r['room_number'] for r in rooms], 'Building': [r['building'] for r in rooms],
+                        'Campus': [r.get('campus') for r in rooms]})
+    teachers = sorted({c['faculty_assigned'] for c in courses})
+    tdf = pd.DataFrame({'TeacherID': teachers})
+    slots = [f"{d}-{p}" for d in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+             for p in ['8AM', '9AM', '10AM', '11AM', '12PM', '2PM', '3PM', '4PM', '5PM']]
+    context = rule.build_fitness_context(cdf, slots, rdf, tdf)
+    population = rule.initial_population(20, cdf, slots, rdf, tdf, context['room_options'], context['calendar'])
+    best, seconds, peak = measure(
+        lambda: rule.genetic_algorithm(population, generations, cdf, slots, rdf, tdf, context=context,
+                                       progress=lambda update: None))
+    return {'rule_genetic_algorithm': {
+        'seconds': seconds, 'peak_mb': peak, 'rows': len(best),
+        'hard_violations': rule.hard_violations(best, context),
+        'soft_penalty': rule.soft_penalty(best, context)[0],
+    }}
+
+
+def run(scales, generations, time_budget, row_limit, stages, workers):
+    results = []
+    for scale in scales:
+        print(f"scale {scale}x ...", flush=True)
+        entry = {'scale': scale, 'stages': {}}
+        generator_rows, courses, rooms, enrollments = bench_generator(scale, row_limit)
+        if 'generator' in stages:
+            entry['stages'].update(generator_rows)
+        if 'session' in stages:
+            entry['stages'].update(bench_session_solver(courses, rooms, enrollments, generations, time_budget))
+        if 'parallel' in stages:
+            entry['stages'].update(bench_parallel(courses, rooms, enrollments, generations, workers))
+        if 'rule' in stages:
+            entry['stages'].update(bench_rule_solver(courses, rooms, generations))
+        entry['max_rss_mb'] = _max_rss_mb()
+        results.append(entry)
+        for name, row in entry['stages'].items():
+            if 'skipped' in row:
+                print(f"  {name:32s} skipped ({row['skipped']})")
+            else:
+                print(f"  {name:32s} {row['seconds']:9.3f}s {row['peak_mb']:9.1f} MB {row['rows']:>9} rows")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old_path, new_path, threshold):
+    """Print per-stage time/memory ratios; exit status 1 if any stage regressed beyond threshold"""
+    with open(old_path) as f:
+        old = {r['scale']: r['stages'] for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {r['scale']: r['stages'] for r in json.load(f)['results']}
+    regressed = False
+    for scale in sorted(set(old) & set(new)):
+        for name in sorted(set(old[scale]) & set(new[scale])):
+            a, b = old[scale][name], new[scale][name]
+            if 'seconds' not in a or 'seconds' not in b:
+                continue
+            time_ratio = b['seconds'] / max(a['seconds'], 1e-9)
+            # RSS growth is ~0 for stages that fit in already-touched memory; ignore sub-MB noise
+            mem_ratio = b['peak_mb'] / a['peak_mb'] if min(a['peak_mb'], b['peak_mb']) >= 1 else 1.0
+            flag = ''
+            if time_ratio > 1 + threshold or mem_ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            print(f"{scale:>4}x {name:32s} time x{time_ratio:6.2f}  memory x{mem_ratio:6.2f}{flag}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)))
+    parser.add_argument('--stages', default='generator,session,rule',
+                        help='comma-separated: generator, session, parallel, rule')
+    parser.add_argument('--workers', default='1,2,4', help='worker counts for the parallel stage')
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--time-budget', type=float, default=60.0, help='seconds per solver run')
+    parser.add_argument('--row-limit', type=int, default=2_000_000,
+                        help='skip stages that would materialize more rows than this')
+    parser.add_argument('--trace-memory', action='store_true', help='tracemalloc peaks instead of RSS growth')
+    parser.add_argument('--campuses', type=int, default=1, help='multi-campus generator instances')
+    parser.add_argument('--output', help='result file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown flagged on compare')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    global TRACE_MEMORY, CAMPUSES
+    TRACE_MEMORY = args.trace_memory
+    CAMPUSES = args.campuses
+    scales = [int(s) for s in args.scales.split(',')]
+    results = run(scales, args.generations, args.time_budget, args.row_limit, set(args.stages.split(',')),
+                  [int(n) for n in args.workers.split(',')])
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+                   'pandas': pd.__version__, 'machine': platform.machine(), 'seed': SEED,
+                   'trace_memory': TRACE_MEMORY, 'campuses': CAMPUSES,
+                   'results': results}, f, indent=2, default=float)
+    print(f"results written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
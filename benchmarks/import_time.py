@@ -0,0 +1,57 @@
+"""Cold import time of each module, measured in a fresh interpreter.
+
+The solver core (everything a GA run needs, without pandas or
+Streamlit) has a 200 ms budget; the apps and loaders are reported for
+reference. Exits non-zero when a core module is over budget:
+
+    python benchmarks/import_time.py
+    python -X importtime -c "import session_solver"   # per-import breakdown
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE = ['time_grid', 'fitness_cache', 'ga_controls', 'instrumentation', 'clash_matrix', 'soft_constraints',
+        'travel', 'problem', 'sessions', 'session_solver', 'sample', 'timetable']
+OTHER = ['data_import', 'entity_store', 'incremental', 'solver_jobs', 'store', 'timetable_query', 'timetable_api',
+         'timetable_diff', 'exam_schedule', 'decomposition', 'prerequisites', 'data_report', 'rule', 'new']
+BUDGET_MS = 200
+
+PROBE = ("import sys, time; start = time.perf_counter(); import {module}; "
+         "print((time.perf_counter() - start) * 1000, int('pandas' in sys.modules))")
+
+
+def import_ms(module, repeat):
+    """Median milliseconds to import `module` in a new interpreter, and whether it pulled in pandas"""
+    times, pandas = [], False
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.split()
+        times.append(float(out[-2]))
+        pandas = pandas or out[-1] == '1'
+    return statistics.median(times), pandas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=BUDGET_MS, help='core module budget in ms')
+    args = parser.parse_args(argv)
+
+    over = []
+    for module in CORE + OTHER:
+        ms, pandas = import_ms(module, args.repeat)
+        core = module in CORE
+        flag = ' OVER BUDGET' if core and ms > args.budget else ''
+        if flag:
+            over.append(module)
+        print(f"{'core' if core else '    '} {module:18s} {ms:8.1f} ms{'  (pandas)' if pandas else ''}{flag}")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Local load test for timetable_api.py.
+
+Picks real student / faculty / room ids from the published database and
+fires GET requests from keep-alive connections (one per concurrent
+client), reporting throughput, latency percentiles and status codes.
+With --revalidate a client that already holds an entity's ETag sends
+If-None-Match, as a browser would on reload.
+
+    python timetable_api.py serve --db timetable.db &
+    python benchmarks/load_test.py --db timetable.db --requests 20000 --concurrency 32
+
+--serve starts the server itself (on --port) for the duration of the run.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_paths(db, n, mix, seed):
+    """n request paths drawn from the ids in the database; mix is the students:faculty:rooms weighting"""
+    conn = sqlite3.connect(f'file:{db}?mode=ro', uri=True)
+    ids = {
+        'students': [r[0] for r in conn.execute("SELECT DISTINCT student_id FROM enrollments")],
+        'faculty': [r[0] for r in conn.execute("SELECT DISTINCT faculty FROM sessions WHERE faculty IS NOT NULL")],
+        'rooms': [r[0] for r in conn.execute("SELECT DISTINCT room FROM sessions WHERE room IS NOT NULL")],
+    }
+    conn.close()
+    kinds = [kind for kind in ids if ids[kind]]
+    weights = [mix[list(ids).index(kind)] for kind in kinds]
+    rng = random.Random(seed)
+    paths = []
+    for kind in rng.choices(kinds, weights, k=n):
+        paths.append(f"/{kind}/{quote(str(rng.choice(ids[kind])), safe='')}")
+    return paths
+
+
+def client(host, port, paths, revalidate, results):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    for path in paths:
+        headers = {'If-None-Match': etags[path]} if revalidate and path in etags else {}
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            if response.getheader('ETag'):
+                etags[path] = response.getheader('ETag')
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            status = 'error'
+        results.append((status, time.perf_counter() - start))
+    conn.close()
+
+
+def wait_until_up(host, port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def fetch_health(host, port):
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    conn.request('GET', '/health')
+    return json.loads(conn.getresponse().read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=os.environ.get('TIMETABLE_DB', 'timetable.db'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--requests', type=int, default=10_000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', default='8:1:1', help="students:faculty:rooms request weights")
+    parser.add_argument('--revalidate', action='store_true', help="send If-None-Match once an ETag is known")
+    parser.add_argument('--serve', action='store_true', help="start timetable_api.py serve for the run")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    server = None
+    if args.serve:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'timetable_api.py'), 'serve', '--db', args.db,
+                                   '--host', args.host, '--port', str(args.port)])
+    try:
+        if not wait_until_up(args.host, args.port):
+            sys.exit(f"no server at {args.host}:{args.port}")
+        mix = [float(w) for w in args.mix.split(':')]
+        paths = sample_paths(args.db, args.requests, mix, args.seed)
+        results = []
+        threads = [threading.Thread(target=client, args=(args.host, args.port, paths[i::args.concurrency],
+                                                         args.revalidate, results))
+                   for i in range(args.concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        print(f"{len(results)} requests in {elapsed:.2f}s with {args.concurrency} clients: "
+              f"{len(results) / elapsed:.0f} req/s")
+        print(f"latency ms  p50 {cuts[49]:.2f}  p95 {cuts[94]:.2f}  p99 {cuts[98]:.2f}  max {latencies[-1]:.2f}")
+        print("status", dict(Counter(status for status, _ in results)))
+        print("server", fetch_health(args.host, args.port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
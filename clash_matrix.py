@@ -0,0 +1,195 @@
+import os
+import json
+
+import numpy as np
+
+
+def pairs_within_groups(group_keys):
+    """Return (left, right) positions of every unordered pair sharing a group key.
+
+    ``group_keys`` must be sorted. Pairs are generated with repeat/cumsum
+    arithmetic instead of a Python loop over groups.
+    """
+    group_keys = np.asarray(group_keys)
+    n = len(group_keys)
+    if n < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    # End (exclusive) of the group each position belongs to
+    boundaries = np.flatnonzero(group_keys[1:] != group_keys[:-1]) + 1
+    ends = np.append(boundaries, n)
+    sizes = np.diff(np.concatenate(([0], ends)))
+    group_end = np.repeat(ends, sizes)
+    # Each position pairs with every later position in its group
+    counts = group_end - np.arange(n) - 1
+    left = np.repeat(np.arange(n), counts)
+    starts = np.cumsum(counts) - counts
+    right = left + 1 + (np.arange(counts.sum()) - np.repeat(starts, counts))
+    return left, right
+
+
+class ClashMatrix:
+    """Sparse course x course conflict matrix in CSR form.
+
+    ``data[k]`` is the number of students shared by course ``i`` and
+    ``indices[k]`` for ``indptr[i] <= k < indptr[i + 1]``. The matrix is
+    symmetric with an empty diagonal and sorted column indices per row.
+    """
+
+    FILES = ('course_ids', 'indptr', 'indices', 'data')
+
+    def __init__(self, course_ids, indptr, indices, data):
+        self.course_ids = course_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self._keys = None
+
+    @property
+    def n_courses(self):
+        return len(self.course_ids)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_enrollments(cls, enrollments, course_ids=None, active_only=True):
+        """Build the matrix from an enrollment table (course_id, student_id[, status])"""
+        if active_only and 'status' in enrollments.columns:
+            enrollments = enrollments[enrollments['status'] != 'Dropped']
+        if course_ids is None:
+            course_ids = np.unique(enrollments['course_id'].to_numpy())
+        course_ids = np.asarray(course_ids)
+        order = np.argsort(course_ids, kind='stable')
+        pos = np.searchsorted(course_ids, enrollments['course_id'].to_numpy(), sorter=order)
+        pos = np.clip(pos, 0, len(course_ids) - 1)
+        course_idx = order[pos]
+        known = course_ids[course_idx] == enrollments['course_id'].to_numpy()
+        student_codes = np.unique(enrollments['student_id'].to_numpy(), return_inverse=True)[1]
+        course_idx, student_codes = course_idx[known], student_codes[known]
+
+        # Deduplicate (student, course) and group by student; the unique keys come
+        # back sorted by student, so each student's course pairs can be emitted
+        n = len(course_ids)
+        enrolled = np.unique(student_codes.astype(np.int64) * n + course_idx)
+        student_codes, course_idx = enrolled // n, enrolled % n
+        left, right = pairs_within_groups(student_codes)
+        a, b = course_idx[left], course_idx[right]
+
+        rows = np.concatenate((a, b)).astype(np.int64)
+        cols = np.concatenate((b, a)).astype(np.int64)
+        keys, weights = np.unique(rows * n + cols, return_counts=True)
+        rows, cols = keys // n, keys % n
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return cls(course_ids, indptr, cols.astype(np.int32), weights.astype(np.int32))
+
+    @classmethod
+    def from_pairs(cls, course_ids, a, b, weights=1):
+        """Matrix from course index pairs (either order) and their weights; repeated pairs add up"""
+        n = len(course_ids)
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.int64), a.shape)
+        keep = a != b
+        rows = np.concatenate((a[keep], b[keep]))
+        cols = np.concatenate((b[keep], a[keep]))
+        keys, inverse = np.unique(rows * n + cols, return_inverse=True)
+        data = np.bincount(inverse, weights=np.tile(weights[keep], 2), minlength=len(keys))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+        return cls(np.asarray(course_ids), indptr, (keys % n).astype(np.int32), data.astype(np.int32))
+
+    def merged(self, other):
+        """Entry-wise sum with another matrix over the same courses"""
+        rows = np.repeat(np.arange(self.n_courses), np.diff(self.indptr))
+        other_rows = np.repeat(np.arange(other.n_courses), np.diff(other.indptr))
+        # Each matrix stores both directions; keep one so from_pairs does not double them
+        a = np.concatenate((rows, other_rows))
+        b = np.concatenate((np.asarray(self.indices), np.asarray(other.indices))).astype(np.int64)
+        data = np.concatenate((np.asarray(self.data), np.asarray(other.data)))
+        upper = a < b
+        return ClashMatrix.from_pairs(self.course_ids, a[upper], b[upper], data[upper])
+
+    def index_of(self, course_ids):
+        """Map course ids to row indices (-1 for unknown ids)"""
+        course_ids = np.asarray(course_ids)
+        order = np.argsort(self.course_ids, kind='stable')
+        pos = np.clip(np.searchsorted(self.course_ids, course_ids, sorter=order), 0, self.n_courses - 1)
+        idx = order[pos]
+        return np.where(self.course_ids[idx] == course_ids, idx, -1)
+
+    def select(self, rows):
+        """Sub-matrix over the courses at positions ``rows`` (in that order)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        new_pos = np.full(self.n_courses, -1, dtype=np.int64)
+        new_pos[rows] = np.arange(len(rows))
+        counts = np.diff(self.indptr)[rows]
+        starts = np.repeat(np.asarray(self.indptr)[rows], counts)
+        entries = starts + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        owner = np.repeat(np.arange(len(rows)), counts)
+        cols = new_pos[np.asarray(self.indices)[entries]]
+        keep = cols >= 0
+        owner, cols, data = owner[keep], cols[keep], np.asarray(self.data)[entries][keep]
+        order = np.lexsort((cols, owner))  # rows reordered: restore sorted columns per row
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner, minlength=len(rows)), out=indptr[1:])
+        return ClashMatrix(np.asarray(self.course_ids)[rows], indptr, cols[order].astype(np.int32),
+                           data[order].astype(np.int32))
+
+    @property
+    def keys(self):
+        """Sorted row * n_courses + column key of every stored entry (the lookup index for weights)"""
+        if self._keys is None:
+            rows = np.repeat(np.arange(self.n_courses, dtype=np.int64), np.diff(self.indptr))
+            self._keys = rows * self.n_courses + self.indices
+        return self._keys
+
+    def weights(self, a, b):
+        """Shared-student counts for course index pairs (a[k], b[k])"""
+        keys = self.keys
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        query = a * self.n_courses + b
+        pos = np.clip(np.searchsorted(keys, query), 0, max(self.nnz - 1, 0))
+        if self.nnz == 0:
+            return np.zeros(len(query), dtype=np.int64)
+        hit = (keys[pos] == query) & (a >= 0) & (b >= 0)
+        return np.where(hit, np.asarray(self.data)[pos], 0).astype(np.int64)
+
+    def penalty(self, session_course, session_slot):
+        """Total shared students over course pairs placed in the same slot.
+
+        Works for one gene per course or one gene per session: sessions of
+        the same course never count against each other.
+        """
+        session_course = np.asarray(session_course)
+        session_slot = np.asarray(session_slot)
+        order = np.argsort(session_slot, kind='stable')
+        left, right = pairs_within_groups(session_slot[order])
+        a, b = session_course[order[left]], session_course[order[right]]
+        return int(self.weights(a, b).sum())
+
+    # ----- PERSISTENCE (memory-mappable, shareable with worker processes) -----
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in self.FILES:
+            array = np.asarray(getattr(self, name))
+            if array.dtype == object:  # string ids are stored as fixed-width unicode
+                array = array.astype(str)
+            np.save(os.path.join(directory, f'{name}.npy'), array)
+        # The lookup keys are saved too, so processes loading with mmap share them instead of rebuilding
+        np.save(os.path.join(directory, 'keys.npy'), self.keys)
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'n_courses': self.n_courses, 'nnz': self.nnz}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode, allow_pickle=False)
+                  for name in cls.FILES]
+        matrix = cls(*arrays)
+        keys = os.path.join(directory, 'keys.npy')
+        if os.path.exists(keys):
+            matrix._keys = np.load(keys, mmap_mode=mode, allow_pickle=False)
+        return matrix
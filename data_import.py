@@ -0,0 +1,148 @@
+import hashlib
+import io
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Expected columns per entity: id column first, then column -> dtype ('str', 'int', 'float', 'list')
+SCHEMAS = {
+    # rule.py admin panel
+    'teachers': {'TeacherID': 'str', 'Name': 'str', 'Expertise': 'str', 'MaxLoad': 'int', 'Availability': 'list'},
+    'courses': {'CourseID': 'str', 'Name': 'str', 'Credits': 'int', 'TheoryHours': 'int', 'PracticalHours': 'int'},
+    'rooms': {'RoomID': 'str', 'Capacity': 'int', 'Type': 'str', 'Building': 'str', 'Campus': 'str'},
+    'students': {'StudentID': 'str', 'Name': 'str', 'Program': 'str', 'EnrolledCourses': 'list'},
+    # new.py uploaders
+    'nep_courses': {'Course_ID': 'str'},
+    'nep_time_slots': {'Time_Slot_ID': 'str'},
+    'nep_faculty': {'Faculty_ID': 'str', 'Expertise_Courses': 'str'},
+    'nep_rooms': {'Room_ID': 'str'},
+    # generator output (sample.py), also accepted by the new.py uploaders
+    'generator_courses': {'course_id': 'int', 'course_code': 'str', 'total_weekly_hours': 'int', 'enrollment': 'int'},
+    'generator_time_slots': {'slot_id': 'int', 'day': 'str', 'time_slot': 'str'},
+    'generator_faculty': {'faculty_id': 'int', 'faculty_assigned': 'str'},
+    'generator_rooms': {'room_id': 'int', 'capacity': 'int', 'room_type': 'str', 'building': 'str', 'campus': 'str'},
+    'enrollments': {'enrollment_id': 'int', 'course_id': 'int', 'student_id': 'str'},
+}
+# Schema columns that are coerced when present but not reported when missing
+OPTIONAL = {'rooms': {'Building', 'Campus'}, 'generator_rooms': {'campus'}}
+# Ids only need to be unique within this column (zip.py's per-programme files restart course_id at 1)
+ID_SCOPE = {'generator_courses': 'programme'}
+
+CACHE_SIZE = 32
+_cache = OrderedDict()  # (digest, entity, candidates) -> result; lives as long as the module (across Streamlit reruns)
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_table(name, data):
+    """Parse CSV/Excel/Parquet bytes into a DataFrame"""
+    buffer = io.BytesIO(data)
+    lower = name.lower()
+    if lower.endswith('.csv'):
+        return pd.read_csv(buffer)
+    if lower.endswith('.parquet'):
+        return pd.read_parquet(buffer)
+    return pd.read_excel(buffer)
+
+
+def detect_entity(df, candidates=None):
+    """Entity whose id column is present and whose columns match best"""
+    best, best_score = None, 0
+    for entity in candidates or SCHEMAS:
+        schema = SCHEMAS[entity]
+        key = next(iter(schema))
+        if key not in df.columns:
+            continue
+        score = len(set(schema) & set(df.columns))
+        if score > best_score:
+            best, best_score = entity, score
+    return best
+
+
+def coerce_and_validate(df, entity):
+    """Coerce schema columns to their dtypes; return (frame, list of error strings).
+
+    Every check is a whole-column operation: missing columns, nulls in the
+    id column, duplicate ids and values that fail numeric coercion.
+    """
+    schema = SCHEMAS[entity]
+    key = next(iter(schema))
+    errors = []
+    missing = [col for col in schema if col not in df.columns and col not in OPTIONAL.get(entity, ())]
+    if missing:
+        errors.append(f"missing columns: {', '.join(missing)}")
+    df = df.copy()
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind in ('int', 'float'):
+            coerced = pd.to_numeric(df[col], errors='coerce')
+            bad = int((coerced.isna() & df[col].notna()).sum())
+            if bad:
+                errors.append(f"{col}: {bad} non-numeric values")
+            if kind == 'int' and coerced.notna().all() and (coerced % 1 == 0).all():
+                coerced = coerced.astype('int64')
+            df[col] = coerced
+        elif kind == 'str':
+            df[col] = df[col].astype('string')
+    if key in df.columns:
+        nulls = int(df[key].isna().sum())
+        if nulls:
+            errors.append(f"{key}: {nulls} empty ids")
+        scope = [ID_SCOPE[entity]] if ID_SCOPE.get(entity) in df.columns else []
+        dupes = int(df.duplicated(scope + [key]).sum())
+        if dupes:
+            errors.append(f"{key}: {dupes} duplicate ids" + (f" within a {scope[0]}" if scope else ""))
+    return df, errors
+
+
+def parse_upload(name, data, entity=None, candidates=None):
+    """Parse, detect, coerce and validate one upload, cached by the hash of its bytes"""
+    content_hash = digest(data)
+    key = (content_hash, entity, tuple(candidates or ()))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return dict(_cache[key], name=name, cached=True)
+    df = read_table(name, data)
+    if isinstance(entity, tuple):
+        # Alternative formats for one upload slot: the best column match, else the first (to report what is missing)
+        entity = detect_entity(df, entity) or entity[0]
+    entity = entity or detect_entity(df, candidates)
+    errors = []
+    if entity is not None:
+        df, errors = coerce_and_validate(df, entity)
+    result = {'name': name, 'entity': entity, 'frame': df, 'errors': errors, 'digest': content_hash,
+              'cached': False}
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def load_uploads(files, entity=None, candidates=None, max_workers=4):
+    """Parse several Streamlit UploadedFile objects concurrently.
+
+    ``entity`` is one entity name for all files, a list with one name per
+    file (a tuple of names is detected among those), or None to detect it
+    from the columns. Each result is a dict with
+    name, entity, frame, errors, digest and cached; a file that fails to
+    parse comes back with frame None and the error.
+    """
+    entities = entity if isinstance(entity, (list, tuple)) else [entity] * len(files)
+
+    def load(item):
+        file, file_entity = item
+        try:
+            return parse_upload(file.name, file.getvalue(), file_entity, candidates)
+        except Exception as e:
+            return {'name': file.name, 'entity': None, 'frame': None, 'errors': [str(e)], 'digest': None,
+                    'cached': False}
+
+    items = [(f, e) for f, e in zip(files, entities) if f is not None]
+    if len(items) <= 1:
+        return [load(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(load, items))
@@ -0,0 +1,213 @@
+"""Dataset quality report: can the uploaded data be timetabled at all?
+
+    python data_report.py nep2020_courses.csv --rooms rooms.csv [--schedule schedule.csv] [--json report.json]
+
+Every check is a bincount or a sort over the session arrays the solvers use
+(problem.load_problem + sessions.SessionLayout), so the same room rules and
+lab double periods apply and a 100x catalogue is reported in seconds:
+
+- capacity: courses whose sessions have no room of the right type and size
+- room_demand: weekly periods needed per room rule vs. rooms x slots available
+- faculty: weekly periods per teacher vs. slots in the week (and MaxLoad)
+- schedule: room and teacher double bookings in an existing timetable
+
+``errors`` make the instance infeasible before any solving; ``warnings`` do not.
+"""
+import argparse
+import json
+
+import numpy as np
+
+from instrumentation import timed
+from problem import canonical_columns, load_problem, read_table
+from room_feasibility import ROOM_RULES, RoomFeasibility
+from sessions import SessionLayout
+
+EXAMPLES = 10  # ids listed per failed check; the counts are always complete
+SCHEDULE_KEYS = {'room': ['room_id', 'Room', 'Room_ID'], 'faculty': ['faculty_assigned', 'Faculty'],
+                 'day': ['day', 'Day'], 'time_slot': ['time_slot', 'Time_Slot', 'Slot']}
+
+
+def _counts(labels, codes):
+    """{label: count} with the largest first, for JSON"""
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    order = np.argsort(-counts, kind='stable')
+    return {str(labels[i]): int(counts[i]) for i in order if counts[i]}
+
+
+def _examples(values):
+    return [v.item() if hasattr(v, 'item') else v for v in values[:EXAMPLES]]
+
+
+def capacity_check(problem, layout, feasibility):
+    """Courses with at least one session that fits no room (type rule and capacity >= enrollment)"""
+    stuck = np.zeros(problem.n_courses, dtype=bool)
+    stuck[layout.gene_course[feasibility.infeasible]] = True
+    courses = np.flatnonzero(stuck)
+    largest = int(feasibility.capacity.max()) if feasibility.n_rooms else 0
+    return {'courses_without_room': len(courses), 'examples': _examples(problem.course_ids[courses]),
+            'largest_room': largest, 'largest_enrollment': int(problem.course_enrollment.max(initial=0))}
+
+
+def room_demand(layout, feasibility, n_slots):
+    """Periods per room rule against the periods its eligible rooms offer in a week"""
+    rules = len(ROOM_RULES)
+    demand = np.bincount(feasibility.demand_class, weights=layout.gene_length, minlength=rules)
+    eligible = feasibility.type_ok.sum(axis=1)
+    return [{'rule': k, 'room_types': ', '.join(ROOM_RULES[k]), 'rooms': int(eligible[k]),
+             'demand_periods': int(demand[k]), 'supply_periods': int(eligible[k] * n_slots),
+             'utilisation': round(float(demand[k] / (eligible[k] * n_slots)), 3) if eligible[k] else None}
+            for k in range(rules)]
+
+
+def faculty_load(problem, layout, n_slots, max_load=None):
+    """Weekly periods per teacher; more than the week holds is impossible, more than MaxLoad is a warning"""
+    faculty = problem.course_faculty[layout.gene_course]
+    assigned = faculty >= 0
+    load = np.bincount(faculty[assigned], weights=layout.gene_length[assigned],
+                       minlength=problem.n_faculty).astype(np.int64)
+    names = np.array(problem.faculty, dtype=object)
+    impossible = np.flatnonzero(load > n_slots)
+    result = {'teachers': problem.n_faculty, 'max_periods': int(load.max(initial=0)),
+              'mean_periods': round(float(load.mean()), 2) if len(load) else 0.0,
+              'over_week': len(impossible), 'over_week_examples': _examples(names[impossible]),
+              # Periods that must double-book a teacher whatever the timetable: a lower bound on faculty clashes
+              'excess_periods': int(np.maximum(load - n_slots, 0).sum()),
+              'unassigned_courses': int((problem.course_faculty < 0).sum())}
+    if max_load is not None:
+        over = np.flatnonzero(load > max_load)
+        result.update(max_load=max_load, over_max_load=len(over), over_max_load_examples=_examples(names[over]))
+    return result
+
+
+def schedule_collisions(schedule):
+    """Double bookings in a timetable with room/faculty, day and time slot columns (one row per period)"""
+    import pandas as pd
+    col = canonical_columns(schedule, SCHEDULE_KEYS)
+    result = {'entries': len(schedule)}
+    if col['day'] is None or col['time_slot'] is None:
+        return result
+    slot = pd.MultiIndex.from_arrays([col['day'], col['time_slot']]).factorize()[0].astype(np.int64)
+    n_slots = int(slot.max(initial=-1)) + 1
+    for name in ('room', 'faculty'):
+        if col[name] is None:
+            continue
+        codes = pd.factorize(col[name])[0].astype(np.int64)
+        ok = codes >= 0
+        keys = codes[ok] * n_slots + slot[ok]
+        # Rows beyond the first in each (resource, slot) cell
+        result[f'{name}_collisions'] = int(ok.sum() - len(np.unique(keys)))
+    return result
+
+
+@timed()
+def dataset_report(courses, rooms=None, schedule=None, grid=None, max_load=None, problem=None):
+    """Machine-readable (JSON-ready) quality report; pass ``problem`` to reuse an already loaded instance"""
+    import pandas as pd
+    problem = problem if problem is not None else load_problem(courses, rooms=rooms, grid=grid)
+    layout = SessionLayout.from_problem(problem)
+    n_slots = problem.grid.n_slots
+    courses = problem.courses
+    report = {'summary': {
+        'courses': problem.n_courses, 'sessions': layout.n_genes, 'periods': int(layout.gene_length.sum()),
+        'cohorts': len(problem.cohorts), 'faculty': problem.n_faculty, 'rooms': problem.n_rooms,
+        'slots': n_slots,
+        'courses_by_programme': _counts(problem.programmes, problem.course_programme),
+        'courses_by_type': _counts(problem.course_types, problem.course_type),
+    }}
+    if 'category' in courses.columns:
+        codes, labels = pd.factorize(courses['category'])
+        report['summary']['courses_by_category'] = _counts(labels, codes)
+    errors, warnings = [], []
+    if problem.n_rooms:
+        report['summary']['rooms_by_type'] = _counts(problem.room_types, problem.room_type)
+        feasibility = RoomFeasibility.from_problem(problem, layout)
+        known = {t for types in ROOM_RULES.values() for t in types}
+        if problem.room_types and not known.intersection(problem.room_types):
+            # Room types the rules do not know (e.g. 'Lecture Hall'): check capacity only
+            feasibility = RoomFeasibility(feasibility.demand_class, feasibility.enrollment,
+                                          capacity=problem.room_capacity)
+            warnings.append(f"No room type matches the room rules ({', '.join(sorted(known))}); "
+                            f"only capacity was checked")
+        report['capacity'] = capacity = capacity_check(problem, layout, feasibility)
+        report['room_demand'] = demand = room_demand(layout, feasibility, n_slots)
+        if capacity['courses_without_room']:
+            errors.append(f"{capacity['courses_without_room']} courses have a session that fits no room "
+                          f"(e.g. {capacity['examples'][:3]})")
+        for row in demand:
+            if row['demand_periods'] > row['supply_periods']:
+                errors.append(f"{row['room_types']}: {row['demand_periods']} periods needed, "
+                              f"{row['supply_periods']} available")
+    report['faculty'] = faculty = faculty_load(problem, layout, n_slots, max_load)
+    if faculty['over_week']:
+        errors.append(f"{faculty['over_week']} teachers have more than {n_slots} weekly periods, "
+                      f"{faculty['excess_periods']} clashes at least (e.g. {faculty['over_week_examples'][:3]})")
+    if faculty.get('over_max_load'):
+        warnings.append(f"{faculty['over_max_load']} teachers are above {max_load} weekly periods")
+    if schedule is not None:
+        report['schedule'] = collisions = schedule_collisions(read_table(schedule))
+        for name in ('room', 'faculty'):
+            if collisions.get(f'{name}_collisions'):
+                warnings.append(f"Existing schedule has {collisions[f'{name}_collisions']} {name} double bookings")
+    report['errors'], report['warnings'] = errors, warnings
+    return report
+
+
+def show_report(report, key='data_report'):
+    """Streamlit view: errors and warnings inline, the full report in an expander"""
+    import streamlit as st
+    for error in report['errors']:
+        st.error(error)
+    for warning in report['warnings']:
+        st.warning(warning)
+    with st.expander("Data Quality Report"):
+        st.json(report, expanded=False)
+    return not report['errors']
+
+
+def print_report(report):
+    """Plain-text version for the generator's console summary"""
+    summary = report['summary']
+    print(f"Courses: {summary['courses']}  Sessions: {summary['sessions']}  Periods: {summary['periods']}  "
+          f"Faculty: {summary['faculty']}  Rooms: {summary['rooms']}  Slots: {summary['slots']}")
+    for name in ('courses_by_programme', 'courses_by_category', 'courses_by_type', 'rooms_by_type'):
+        if name in summary:
+            print(f"{name}: {summary[name]}")
+    for row in report.get('room_demand', []):
+        print(f"{row['room_types']}: {row['demand_periods']}/{row['supply_periods']} periods "
+              f"({row['rooms']} rooms, utilisation {row['utilisation']})")
+    faculty = report['faculty']
+    print(f"Faculty periods: max {faculty['max_periods']}, mean {faculty['mean_periods']}, "
+          f"over the week {faculty['over_week']} "
+          f"({faculty['excess_periods']} excess periods)")
+    if 'capacity' in report:
+        print(f"Courses without a fitting room: {report['capacity']['courses_without_room']}")
+    if 'schedule' in report:
+        print(f"Schedule: {report['schedule']}")
+    for error in report['errors']:
+        print(f"ERROR: {error}")
+    for warning in report['warnings']:
+        print(f"WARNING: {warning}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('courses', nargs='+')
+    parser.add_argument('--rooms')
+    parser.add_argument('--schedule')
+    parser.add_argument('--max-load', type=int, help="weekly periods above which a teacher is reported")
+    parser.add_argument('--json', help="write the report here instead of printing a summary")
+    args = parser.parse_args()
+    report = dataset_report(args.courses if len(args.courses) > 1 else args.courses[0], rooms=args.rooms,
+                            schedule=args.schedule, max_load=args.max_load)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print_report(report)
+    # Non-zero exit when infeasible, so the report can gate a pipeline
+    raise SystemExit(1 if report['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
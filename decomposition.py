@@ -0,0 +1,322 @@
+"""Cohort decomposition: solve each (programme, year, semester, batch) cohort on its own, then reconcile.
+
+    python decomposition.py nep2020_courses.csv --rooms nep2020_rooms.csv --workers 4
+
+Cohorts share faculty and rooms but little else, so each is a small
+session-GA problem that runs in a worker process. Stitched together the
+cohort timetables collide wherever two of them picked the same teacher or
+room in the same period; reconcile() moves only the genes involved in such
+collisions. Room double bookings are repaired first; faculty clashes can
+remain when teachers have more periods than the week holds (see
+data_report's excess_periods), and the report says how many.
+
+A RunControls time budget covers the whole solve: the cohort GAs share
+COHORT_SHARE of it and reconciliation gets the rest (never less than its
+own share, so a slow worker start-up can overrun the budget by that much).
+"""
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ga_controls import ConvergenceMonitor, ConvergenceTrace, RunControls
+from instrumentation import timed
+from problem import ProblemInstance, expand_sessions
+from room_feasibility import RoomFeasibility
+import session_solver
+from sessions import SessionLayout
+import shared_problem
+
+# Per-course arrays sliced for a cohort; everything else (rooms, labels, grid) is shared
+COURSE_ARRAYS = ['course_ids', 'course_codes', 'course_programme', 'course_cohort', 'course_type', 'course_faculty',
+                 'course_enrollment', 'theory_hours', 'lab_hours', 'tutorial_hours']
+SHARED = ['programmes', 'cohorts', 'course_types', 'faculty', 'room_ids', 'room_type', 'room_types',
+          'room_capacity', 'room_building', 'buildings', 'travel', 'grid']
+RANDOM_WALK = 0.05  # chance that a colliding gene moves to a random allowed start instead of the best one
+# Cost of a start without a free feasible room. Teacher overload can make faculty clashes unavoidable, room
+# clashes almost never are, so a move never buys a faculty clash back with a room double booking.
+ROOM_COST = 1000
+COHORT_SHARE = 0.8  # of a time budget, for the cohort GAs; reconciliation gets the rest
+
+
+def subproblem(problem, courses):
+    """ProblemInstance over the course positions ``courses`` (sorted), sharing the rooms and faculty codes"""
+    arrays = {name: np.asarray(getattr(problem, name))[courses] for name in COURSE_ARRAYS}
+    arrays.update({name: getattr(problem, name, None) for name in SHARED})
+    session_course, session_kind, offsets = expand_sessions(arrays['theory_hours'], arrays['lab_hours'],
+                                                            arrays['tutorial_hours'])
+    clashes = problem.clashes.select(courses) if problem.clashes is not None else None
+    return ProblemInstance(courses=None, session_course=session_course, session_kind=session_kind,
+                           course_offsets=offsets, clashes=clashes, **arrays)
+
+
+def cohort_courses(problem):
+    """Course positions of every cohort, largest cohort (by sessions) first"""
+    order = np.argsort(problem.course_cohort, kind='stable')
+    bounds = np.flatnonzero(np.diff(problem.course_cohort[order])) + 1
+    groups = np.split(order, bounds)
+    hours = problem.theory_hours + problem.lab_hours + problem.tutorial_hours
+    return sorted(groups, key=lambda g: -int(hours[g].sum()))
+
+
+# ----- COHORT SOLVES -----
+_problem = None  # set once per worker by _attach
+
+
+def _attach(directory):
+    global _problem
+    _problem = shared_problem.open_problem(directory)
+
+
+def solve_cohort(problem, courses, seed, controls=None, ga_kwargs=None):
+    """(slots, rooms, convergence trace or None) of one cohort's sub-problem"""
+    sub = subproblem(problem, courses)
+    monitor = ConvergenceMonitor(controls) if controls is not None else None
+    genome, layout = session_solver.genetic_algorithm(sub, seed=seed, monitor=monitor, **(ga_kwargs or {}))
+    genome = np.asarray(genome)
+    return genome[:layout.n_genes], genome[layout.n_genes:], monitor.trace if monitor is not None else None
+
+
+def _cohort_task(courses, seed, controls, ga_kwargs):
+    return solve_cohort(_problem, courses, seed, controls, ga_kwargs)
+
+
+@timed()
+def solve_cohorts(problem, n_workers=1, seed=None, controls=None, **ga_kwargs):
+    """(slots, rooms, layout, per-cohort traces) stitched from independent cohort solves.
+
+    With more than one worker the problem is written once for the
+    workers to memory-map (see shared_problem.solve_parallel), and each
+    task ships only its cohort's course positions. A time budget in
+    ``controls`` is for all cohorts together: each cohort gets its share
+    of the worker-seconds.
+    """
+    layout = SessionLayout.from_problem(problem)
+    groups = cohort_courses(problem)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(groups))]
+    if controls is not None and controls.time_budget:
+        controls = RunControls(**dict(controls.to_dict(),
+                                      time_budget=controls.time_budget * min(n_workers, len(groups)) / len(groups)))
+    if n_workers > 1:
+        directory = tempfile.mkdtemp(prefix='timetable-cohorts-')
+        try:
+            shared_problem.save_problem(problem, directory)
+            with ProcessPoolExecutor(n_workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_attach, initargs=(directory,)) as pool:
+                results = list(pool.map(_cohort_task, groups, seeds, [controls] * len(groups),
+                                        [ga_kwargs] * len(groups)))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    else:
+        results = [solve_cohort(problem, courses, s, controls, ga_kwargs) for courses, s in zip(groups, seeds)]
+
+    # Genes are ordered by course in both layouts, so a cohort's genes are its courses' gene ranges
+    slots = np.zeros(layout.n_genes, dtype=np.int64)
+    rooms = np.zeros(layout.n_genes if problem.n_rooms else 0, dtype=np.int64)
+    for courses, (sub_slots, sub_rooms, _) in zip(groups, results):
+        genes = np.concatenate([np.arange(layout.course_offsets[c], layout.course_offsets[c + 1]) for c in courses])
+        slots[genes] = sub_slots
+        if len(rooms):
+            rooms[genes] = sub_rooms
+    return slots, rooms, layout, [trace for _, _, trace in results]
+
+
+# ----- RECONCILIATION -----
+class _Occupancy:
+    """Booking counts per (faculty, slot), (room, slot) and (course, slot) of a genome"""
+
+    def __init__(self, problem, layout, slots, rooms):
+        self.problem, self.layout = problem, layout
+        n_slots = layout.grid.n_slots
+        self.faculty = np.zeros((max(problem.n_faculty, 1), n_slots), dtype=np.int32)
+        self.room = np.zeros((max(problem.n_rooms, 1), n_slots), dtype=np.int32)
+        self.course = np.zeros((problem.n_courses, n_slots), dtype=np.int32)
+        self.gene_faculty = problem.course_faculty[layout.gene_course].astype(np.int64)
+        for gene in range(layout.n_genes):
+            self.add(gene, slots[gene], rooms[gene] if len(rooms) else -1, 1)
+
+    def cells(self, gene, start):
+        return start + np.arange(self.layout.gene_length[gene])
+
+    def add(self, gene, start, room, step):
+        cells = self.cells(gene, start)
+        cells = cells[cells // self.layout.grid.n_periods == start // self.layout.grid.n_periods]
+        if self.gene_faculty[gene] >= 0:
+            self.faculty[self.gene_faculty[gene], cells] += step
+        if room >= 0:
+            self.room[room, cells] += step
+        self.course[self.layout.gene_course[gene], cells] += step
+
+
+def _colliding(occ, slots, rooms):
+    """Genes sharing a faculty member or room with another gene in one of their periods"""
+    layout = occ.layout
+    gene, day, period = layout.cells(slots)
+    cell = np.where(period >= 0, layout.grid.slot(day, period), 0)
+    faculty = occ.gene_faculty[gene]
+    bad = (faculty >= 0) & (occ.faculty[np.maximum(faculty, 0), cell] > 1)
+    if len(rooms):
+        bad |= occ.room[rooms[gene], cell] > 1
+    return np.unique(gene[bad & (period >= 0)])
+
+
+def _room_overbookings(occ):
+    """Room bookings beyond the first per (room, slot)"""
+    return int(np.maximum(occ.room - 1, 0).sum()) if occ.problem.n_rooms else 0
+
+
+def _move_costs(occ, gene, slots, feasible):
+    """(cost per start slot, best free room per start slot) for moving one gene, with it lifted out"""
+    layout, problem = occ.layout, occ.problem
+    grid = layout.grid
+    length = layout.gene_length[gene]
+    course = layout.gene_course[gene]
+    n_slots = grid.n_slots
+    starts = np.arange(n_slots)
+    fits = starts % grid.n_periods + length <= grid.n_periods
+    cells = np.minimum(starts[:, None] + np.arange(length)[None, :], n_slots - 1)  # start x offset
+
+    cost = np.zeros(n_slots)
+    faculty = occ.gene_faculty[gene]
+    if faculty >= 0:
+        cost += occ.faculty[faculty][cells].sum(axis=1)
+    if problem.clashes is not None:
+        m = problem.clashes
+        lo, hi = m.indptr[course], m.indptr[course + 1]
+        shared = np.asarray(m.data[lo:hi], dtype=float) @ (occ.course[np.asarray(m.indices[lo:hi])] > 0)
+        shared = shared[cells].sum(axis=1)
+        cost += 0.5 * shared / (shared.max() + 1)  # students only break ties between equal clash counts
+    # Another session of the course that day, or a block past the day end, rules the start out
+    others = np.arange(layout.course_offsets[course], layout.course_offsets[course + 1])
+    others = others[others != gene]
+    taken_days = np.zeros(grid.n_days, dtype=bool)
+    taken_days[slots[others] // grid.n_periods] = True
+    allowed = fits & ~taken_days[starts // grid.n_periods]
+
+    room = np.full(n_slots, -1)
+    if problem.n_rooms:
+        # First feasible room (largest first) free in every cell of the block
+        free = (occ.room[feasible][:, cells] == 0).all(axis=2)  # room x start
+        has_room = free.any(axis=0)
+        room = np.where(has_room, feasible[free.argmax(axis=0)], -1)
+        cost += ROOM_COST * ~has_room
+    return np.where(allowed, cost, np.inf), room
+
+
+@timed()
+def reconcile(problem, layout, slots, rooms, max_passes=50, seed=None, time_budget=None):
+    """Min-conflicts repair of the stitched timetable; returns (slots, rooms, report).
+
+    Each pass lifts every gene in a faculty or room collision out of the
+    booking counts and puts it back at the start slot (and room) with the
+    fewest remaining collisions (a start without a free room costs
+    ROOM_COST); ties are broken at random and a few genes take a random
+    allowed start with a free room, so the search can leave plateaus.
+    Genes that are not in a collision never move. Students shared through
+    the clash matrix only break ties. The best state seen (fewest room
+    double bookings, then fewest colliding genes) is returned once nothing
+    collides, after ``max_passes`` or when ``time_budget`` seconds are
+    spent; ``report['history']`` has the colliding genes after every pass.
+    """
+    rng = np.random.default_rng(seed)
+    slots, rooms = slots.copy(), rooms.copy()
+    feasibility = RoomFeasibility.from_problem(problem, layout) if problem.n_rooms else None
+    occ = _Occupancy(problem, layout, slots, rooms)
+    start = time.perf_counter()
+    colliding = _colliding(occ, slots, rooms)
+    report = {'initial': int(len(colliding)), 'moved': 0, 'passes': 0, 'history': []}
+    best = (_room_overbookings(occ), len(colliding)), slots.copy(), rooms.copy()
+    for _ in range(max_passes):
+        if not len(colliding) or (time_budget is not None and time.perf_counter() - start > time_budget):
+            break
+        report['passes'] += 1
+        for gene in rng.permutation(colliding):
+            room = rooms[gene] if len(rooms) else -1
+            occ.add(gene, slots[gene], room, -1)
+            feasible = feasibility.choices(gene) if feasibility is not None else None
+            if feasible is not None and not len(feasible):
+                feasible = np.arange(problem.n_rooms)
+            cost, best_room = _move_costs(occ, gene, slots, feasible)
+            if rng.random() < RANDOM_WALK:
+                # Any allowed start that still has a free room
+                cost = np.where(np.isfinite(cost), ROOM_COST * (best_room < 0), np.inf)
+            target = int(np.argmin(cost + rng.random(len(cost)) * 1e-6))
+            if np.isfinite(cost[target]) and (target != slots[gene] or best_room[target] != room):
+                slots[gene] = target
+                if len(rooms) and best_room[target] >= 0:
+                    rooms[gene] = best_room[target]
+                report['moved'] += 1
+            occ.add(gene, slots[gene], rooms[gene] if len(rooms) else -1, 1)
+        colliding = _colliding(occ, slots, rooms)
+        score = (_room_overbookings(occ), len(colliding))
+        report['history'].append({'pass': report['passes'], 'colliding': int(score[1]),
+                                  'room_overbookings': score[0], 'moved': report['moved'],
+                                  'elapsed': time.perf_counter() - start})
+        if score < best[0]:
+            best = score, slots.copy(), rooms.copy()
+    (_, remaining), slots, rooms = best
+    report['remaining'] = int(remaining)
+    return slots, rooms, report
+
+
+def combined_trace(cohort_traces, report):
+    """One ConvergenceTrace of a decomposed solve: every cohort's generations, then the reconcile passes"""
+    trace = ConvergenceTrace()
+    for cohort, cohort_trace in enumerate(cohort_traces):
+        for row in cohort_trace.generations if cohort_trace is not None else []:
+            trace.record(stage='cohort', cohort=cohort, **row)
+    for row in report['history']:
+        trace.record(stage='reconcile', hard_violations=row['colliding'], **row)
+    trace.stop_reason = 'reconciled' if not report['remaining'] else \
+        f"{report['remaining']} genes still collide after {report['passes']} passes"
+    return trace
+
+
+def solve(problem, n_workers=1, seed=None, controls=None, max_passes=50, **ga_kwargs):
+    """Cohort solves plus reconciliation; returns (genome, layout, report) like the island solver.
+
+    ``report['trace']`` is the combined_trace() of the run.
+    """
+    start = time.perf_counter()
+    budget = controls.time_budget if controls is not None else None
+    cohort_controls = RunControls(**dict(controls.to_dict(), time_budget=budget * COHORT_SHARE)) if budget \
+        else controls
+    slots, rooms, layout, traces = solve_cohorts(problem, n_workers, seed, cohort_controls, **ga_kwargs)
+    # At least its own share even when worker start-up ate into the cohorts' time
+    remaining = max(budget - (time.perf_counter() - start), budget * (1 - COHORT_SHARE)) if budget else None
+    slots, rooms, report = reconcile(problem, layout, slots, rooms, max_passes=max_passes, seed=seed,
+                                     time_budget=remaining)
+    report['cohorts'] = len(np.unique(problem.course_cohort))
+    report['violations'] = session_solver.violations(problem, layout, slots, rooms if len(rooms) else None)
+    report['trace'] = combined_trace(traces, report)
+    return np.concatenate((slots, rooms)), layout, report
+
+
+def main():
+    from problem import load_problem
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('courses', nargs='+', help="generator course table(s), CSV or Parquet")
+    parser.add_argument('--rooms')
+    parser.add_argument('--enrollments', help="adds student clashes across cohorts (electives)")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--generations', type=int, default=50)
+    parser.add_argument('--population', type=int, default=30)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', default='decomposed_timetable.csv')
+    args = parser.parse_args()
+    problem = load_problem(args.courses if len(args.courses) > 1 else args.courses[0], args.rooms, args.enrollments)
+    start = time.perf_counter()
+    genome, layout, report = solve(problem, args.workers, args.seed, generations=args.generations,
+                                   population_size=args.population)
+    print(f"{time.perf_counter() - start:.1f} s", {k: v for k, v in report.items() if k not in ('history', 'trace')})
+    session_solver.to_frame(problem, layout, genome).to_csv(args.output, index=False)
+    print(f"timetable written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import pandas as pd
+
+
+class EntityStore:
+    """Append-friendly table of entities (teachers, courses, rooms, students).
+
+    Inserts go to a Python list of records (amortized O(1), the list grows
+    geometrically); the DataFrame is only materialized when ``frame()`` is
+    called by a view or the solver, and then cached until the next insert.
+    This replaces ``DataFrame.append``, which copied the whole frame on
+    every insert and no longer exists in pandas 2.x.
+    """
+
+    def __init__(self, columns, frame=None):
+        self.columns = list(columns)
+        self._frame = frame if frame is not None else pd.DataFrame(columns=self.columns)
+        self._pending = []
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df.columns, df.reset_index(drop=True))
+
+    def append(self, record):
+        self._pending.append(record)
+
+    def extend(self, records):
+        self._pending.extend(records)
+
+    def frame(self):
+        """Materialize pending inserts into one DataFrame (a single concat per batch)"""
+        if self._pending:
+            new_rows = pd.DataFrame.from_records(self._pending, columns=self.columns)
+            if self._frame.empty:
+                self._frame = new_rows
+            else:
+                self._frame = pd.concat([self._frame, new_rows], ignore_index=True)
+            self._pending = []
+        return self._frame
+
+    def __len__(self):
+        return len(self._frame) + len(self._pending)
+
+    @property
+    def empty(self):
+        return len(self) == 0
@@ -0,0 +1,253 @@
+"""End-term exam timetabling over the course conflict graph.
+
+    python exam_schedule.py nep2020_courses.csv nep2020_student_enrollments.csv --rooms nep2020_rooms.csv \\
+        --days 10 --periods Morning,Afternoon --output exam_timetable.csv
+
+Every course whose assessment pattern has an end-term component sits one
+exam. Two exams sharing a student never share a period (a clash costs
+CLASH_WEIGHT per shared student), the seats of the large rooms bound how
+many candidates sit in one period, and the objective is the number of
+students with exams in back-to-back periods of the same day.
+"""
+import argparse
+
+import numpy as np
+
+from clash_matrix import ClashMatrix
+from problem import COURSE_COLUMNS, ROOM_COLUMNS, canonical_columns, course_keys, enrollment_courses, read_table
+
+EXAM_ROOM_TYPES = ['Auditorium', 'Seminar Hall']
+PERIODS = ['Morning', 'Afternoon']
+CLASH_WEIGHT = 1000  # per student sitting two exams at once
+OVERFLOW_WEIGHT = 10  # per candidate beyond the period's seats
+
+
+class ExamProblem:
+    """Exams (one per examined course) with their candidate counts, conflict graph and exam rooms"""
+
+    def __init__(self, course_ids, codes, names, size, clashes, room_ids, room_capacity):
+        self.course_ids = course_ids
+        self.codes = codes
+        self.names = names
+        self.size = size
+        self.clashes = clashes
+        self.room_ids = room_ids
+        self.room_capacity = room_capacity
+
+    @property
+    def n_exams(self):
+        return len(self.course_ids)
+
+    @property
+    def seats(self):
+        """Seats available in one period (unbounded without rooms)"""
+        return int(self.room_capacity.sum()) if len(self.room_capacity) else np.inf
+
+
+def examined(courses):
+    """Courses with an end-term exam; all of them when there is no assessment_pattern column"""
+    if 'assessment_pattern' not in courses.columns:
+        return np.ones(len(courses), dtype=bool)
+    return courses['assessment_pattern'].astype(str).str.contains('End-term', regex=False).to_numpy()
+
+
+def load_exams(courses, enrollments, rooms=None, room_types=EXAM_ROOM_TYPES, clashes=None):
+    """ExamProblem from generator-style tables (frames or CSV/Parquet paths).
+
+    ``clashes`` may be a ClashMatrix already built over the course table's
+    ids (new.py keeps one); the exam graph is its sub-matrix over the
+    examined courses, so the enrollments are not paired up again.
+    """
+    courses, enrollments = read_table(courses), read_table(enrollments)
+    if 'status' in enrollments.columns:
+        enrollments = enrollments[enrollments['status'] != 'Dropped']
+    col = canonical_columns(courses, COURSE_COLUMNS)
+    ids, qualified = course_keys(col, len(courses))
+    programmes = col['programme'].unique() if col['programme'] is not None else None
+    enrollments = enrollment_courses(enrollments, ids, qualified, programmes)
+    if clashes is None or not np.array_equal(np.asarray(clashes.course_ids), ids):
+        clashes = ClashMatrix.from_enrollments(enrollments, course_ids=ids)
+    rows = np.flatnonzero(examined(courses))
+    # Candidates per course: distinct (student, course) enrollments
+    pos = clashes.index_of(enrollments['course_id'].to_numpy())
+    student = np.unique(enrollments['student_id'].to_numpy(), return_inverse=True)[1]
+    enrolled = np.unique(student[pos >= 0].astype(np.int64) * len(ids) + pos[pos >= 0])
+    size = np.bincount(enrolled % len(ids), minlength=len(ids))[rows]
+
+    room_ids, capacity = np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+    if rooms is not None:
+        rooms = read_table(rooms)
+        room_col = canonical_columns(rooms, ROOM_COLUMNS)
+        keep = room_col['room_type'].isin(room_types).to_numpy() if room_col['room_type'] is not None \
+            else np.ones(len(rooms), dtype=bool)
+        ident = room_col['room_number'] if room_col['room_number'] is not None else room_col['room_id']
+        room_ids = ident.to_numpy()[keep]
+        capacity = room_col['capacity'].to_numpy(dtype=np.int64)[keep]
+        order = np.argsort(-capacity, kind='stable')  # largest halls fill first
+        room_ids, capacity = room_ids[order], capacity[order]
+
+    codes = col['course_code'].to_numpy()[rows] if col['course_code'] is not None else ids[rows]
+    names = col['course_name'].to_numpy()[rows] if col['course_name'] is not None else codes
+    return ExamProblem(ids[rows], codes, names, size.astype(np.int64), clashes.select(rows), room_ids, capacity)
+
+
+# ----- SCHEDULING -----
+def _slot_costs(exam, slot, exams, n_days, n_periods, used):
+    """Cost of putting `exam` in each slot given where its neighbours sit and the seats already used"""
+    m = exams.clashes
+    lo, hi = m.indptr[exam], m.indptr[exam + 1]
+    neighbour, weight = m.indices[lo:hi], m.data[lo:hi]
+    placed = slot[neighbour] >= 0
+    shared = np.bincount(slot[neighbour][placed], weights=weight[placed],
+                         minlength=n_days * n_periods).reshape(n_days, n_periods)
+    adjacent = np.zeros_like(shared)
+    adjacent[:, 1:] += shared[:, :-1]
+    adjacent[:, :-1] += shared[:, 1:]
+    overflow = np.maximum(used + exams.size[exam] - exams.seats, 0) if np.isfinite(exams.seats) else 0
+    return (CLASH_WEIGHT * shared + adjacent).ravel() + OVERFLOW_WEIGHT * overflow
+
+
+def schedule_exams(exams, n_days=10, n_periods=len(PERIODS), passes=10, seed=None):
+    """Exam slot (day * n_periods + period) per exam.
+
+    Exams are placed largest weighted degree first, each into the
+    cheapest slot (ties go to the emptiest period); then passes of single
+    exam moves run until none improves. Each placement looks only at the
+    exam's CSR row, so a pass is O(edges + exams * slots).
+    """
+    rng = np.random.default_rng(seed)
+    n_slots = n_days * n_periods
+    m = exams.clashes
+    degree = np.bincount(np.repeat(np.arange(exams.n_exams), np.diff(m.indptr)), weights=m.data,
+                         minlength=exams.n_exams)
+    order = np.lexsort((rng.random(exams.n_exams), -exams.size, -degree))
+    slot = np.full(exams.n_exams, -1, dtype=np.int64)
+    used = np.zeros(n_slots, dtype=np.int64)
+    for exam in order:
+        cost = _slot_costs(exam, slot, exams, n_days, n_periods, used)
+        best = np.flatnonzero(cost == cost.min())
+        slot[exam] = best[np.argmin(used[best])]
+        used[slot[exam]] += exams.size[exam]
+
+    for _ in range(passes):
+        moved = 0
+        for exam in order:
+            used[slot[exam]] -= exams.size[exam]
+            cost = _slot_costs(exam, slot, exams, n_days, n_periods, used)
+            best = int(np.argmin(cost))
+            if cost[best] < cost[slot[exam]]:
+                slot[exam] = best
+                moved += 1
+            used[slot[exam]] += exams.size[exam]
+        if not moved:
+            break
+    return slot
+
+
+def evaluate(exams, slot, n_periods=len(PERIODS)):
+    """Clashing students, back-to-back students and candidates beyond the seats of their period"""
+    m = exams.clashes
+    row = np.repeat(np.arange(exams.n_exams), np.diff(m.indptr))
+    a, b = slot[row], slot[m.indices]
+    same_day = a // n_periods == b // n_periods
+    clashes = int(m.data[a == b].sum()) // 2  # every pair is stored twice
+    back_to_back = int(m.data[same_day & (np.abs(a - b) == 1)].sum()) // 2
+    overflow = 0
+    if np.isfinite(exams.seats):
+        used = np.bincount(slot, weights=exams.size, minlength=slot.max(initial=0) + 1)
+        overflow = int(np.maximum(used - exams.seats, 0).sum())
+    return {'exams': exams.n_exams, 'periods_used': len(np.unique(slot)), 'clashes': clashes,
+            'back_to_back': back_to_back, 'overflow': overflow}
+
+
+def allocate_rooms(exams, slot):
+    """(exam, room position, seats) rows: each period's exams, largest first, fill the halls in seat order.
+
+    Candidates past the last hall go to room position n_rooms ("Unallocated").
+    """
+    n_rooms = len(exams.room_capacity)
+    # Seat range of each hall, plus an unbounded overflow hall at the end
+    room_stop = np.append(np.cumsum(exams.room_capacity), np.iinfo(np.int64).max)
+    room_start = np.concatenate(([0], room_stop[:-1]))
+    parts = []
+    for s in np.unique(slot):
+        members = np.flatnonzero(slot == s)
+        members = members[np.argsort(-exams.size[members], kind='stable')]
+        end = np.cumsum(exams.size[members])
+        start = end - exams.size[members]
+        # Halls overlapping each exam's seat range [start, end)
+        first = np.minimum(np.searchsorted(room_stop, start, side='right'), n_rooms)
+        last = np.minimum(np.searchsorted(room_stop, end - 1, side='right'), n_rooms)
+        count = np.maximum(last - first + 1, 1)
+        exam = np.repeat(members, count)
+        room = np.repeat(first, count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        seats = np.minimum(np.repeat(end, count), room_stop[room]) - np.maximum(np.repeat(start, count),
+                                                                                 room_start[room])
+        parts.append((exam, room, np.maximum(seats, 0)))
+    return tuple(np.concatenate(columns) for columns in zip(*parts))
+
+
+def to_frame(exams, slot, periods=PERIODS):
+    """Exam timetable: one row per exam and room (a large exam spans several halls)"""
+    import pandas as pd
+    exam, room, seats = allocate_rooms(exams, slot)
+    n_periods = len(periods)
+    frame = pd.DataFrame({
+        'day': slot[exam] // n_periods + 1,
+        'period': np.asarray(periods, dtype=object)[slot[exam] % n_periods],
+        'course_id': exams.course_ids[exam],
+        'course_code': exams.codes[exam],
+        'course_name': exams.names[exam],
+        'candidates': exams.size[exam],
+        'room': np.append(np.asarray(exams.room_ids, dtype=object), 'Unallocated')[room],
+        'seats': seats,
+    })
+    frame['exam_slot'] = slot[exam]
+    return frame.sort_values(['exam_slot', 'course_code'], kind='stable').drop(columns='exam_slot') \
+        .reset_index(drop=True)
+
+
+# ----- STREAMLIT VIEW -----
+def show_exams(courses, enrollments, rooms=None, clashes=None, key='exams'):
+    """Exam-mode controls and result for new.py"""
+    import streamlit as st  # only the apps need it
+
+    st.subheader("End-Term Exam Timetable")
+    days_col, periods_col = st.columns(2)
+    n_days = days_col.number_input("Exam Days", min_value=1, max_value=60, value=10, key=f"{key}_days")
+    periods = [p.strip() for p in periods_col.text_input("Periods per Day", ', '.join(PERIODS),
+                                                         key=f"{key}_periods").split(',') if p.strip()]
+    if st.button("Schedule Exams", key=f"{key}_run"):
+        exams = load_exams(courses, enrollments, rooms, clashes=clashes)
+        slot = schedule_exams(exams, int(n_days), len(periods or PERIODS))
+        st.session_state[key] = (evaluate(exams, slot, len(periods or PERIODS)),
+                                 to_frame(exams, slot, periods or PERIODS))
+    if key in st.session_state:
+        report, frame = st.session_state[key]
+        st.caption(" · ".join(f"{name.replace('_', ' ')}: {value}" for name, value in report.items()))
+        st.dataframe(frame)
+        st.download_button("Download Exam Timetable", frame.to_csv(index=False).encode('utf-8'),
+                           "exam_timetable.csv", key=f"{key}_csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('courses')
+    parser.add_argument('enrollments')
+    parser.add_argument('--rooms', help="room table; only the exam hall types are used")
+    parser.add_argument('--room-types', default=','.join(EXAM_ROOM_TYPES))
+    parser.add_argument('--days', type=int, default=10)
+    parser.add_argument('--periods', default=','.join(PERIODS), help="comma-separated period names per day")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', default='exam_timetable.csv')
+    args = parser.parse_args()
+    periods = [p.strip() for p in args.periods.split(',') if p.strip()]
+    exams = load_exams(args.courses, args.enrollments, args.rooms, args.room_types.split(','))
+    slot = schedule_exams(exams, args.days, len(periods), seed=args.seed)
+    print(evaluate(exams, slot, len(periods)))
+    to_frame(exams, slot, periods).to_csv(args.output, index=False)
+    print(f"exam timetable written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import hashlib
+from collections import OrderedDict
+
+try:
+    import xxhash
+except ImportError:  # blake2 from the standard library is the fallback
+    xxhash = None
+
+
+def genome_key(genome):
+    """Return a fast, fixed-size hash of a genome"""
+    # Numpy genomes hash their raw buffer; list genomes (rule.py, new.py) hash their repr
+    if hasattr(genome, 'tobytes'):
+        data = genome.tobytes()
+    else:
+        data = repr(genome).encode('utf-8')
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class FitnessCache:
+    """Bounded LRU cache of fitness values keyed by genome hash"""
+
+    def __init__(self, maxsize=1024, key_fn=genome_key):
+        self.maxsize = maxsize
+        self.key_fn = key_fn
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+
+    def score(self, genome, fitness_fn, *args):
+        """Return fitness_fn(genome, *args), evaluating only on a cache miss"""
+        key = self.key_fn(genome)
+        if key in self._store:
+            self._store.move_to_end(key)
+            self.hits += 1
+            return self._store[key]
+        self.misses += 1
+        value = fitness_fn(genome, *args)
+        self._store[key] = value
+        if len(self._store) > self.maxsize:
+            self._store.popitem(last=False)  # evict least recently used
+        return value
+
+    def clear(self):
+        self._store.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._store)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Short summary used in progress output"""
+        return f"cache hits {self.hits}, misses {self.misses} ({self.hit_rate:.0%} hit rate)"
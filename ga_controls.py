@@ -0,0 +1,116 @@
+import json
+import time
+
+
+class RunControls:
+    """Stopping and mutation settings for a genetic_algorithm run"""
+
+    def __init__(self, max_generations=100, time_budget=None, stop_when_feasible=True,
+                 stagnation_window=None, mutation_rate=0.1, max_mutation_rate=0.5,
+                 adaptive_mutation=True, min_improvement=1e-9):
+        self.max_generations = max_generations
+        self.time_budget = time_budget  # seconds of wall-clock time, None for no limit
+        self.stop_when_feasible = stop_when_feasible  # stop once hard violations reach zero
+        self.stagnation_window = stagnation_window  # generations without improvement before stopping
+        self.mutation_rate = mutation_rate
+        self.max_mutation_rate = max_mutation_rate
+        self.adaptive_mutation = adaptive_mutation
+        self.min_improvement = min_improvement
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class ConvergenceTrace:
+    """Per-generation best/mean fitness, hard violations and timing"""
+
+    def __init__(self):
+        self.generations = []
+        self.stop_reason = None
+
+    def record(self, **row):
+        self.generations.append(row)
+
+    def __len__(self):
+        return len(self.generations)
+
+    def to_dict(self, controls=None):
+        return {
+            'controls': controls.to_dict() if controls is not None else None,
+            'stop_reason': self.stop_reason,
+            'generations': self.generations,
+        }
+
+    def to_json(self, controls=None):
+        return json.dumps(self.to_dict(controls), indent=2)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Trace from to_dict() output (e.g. one reloaded from the store)"""
+        trace = cls()
+        trace.generations = list(data.get('generations', []))
+        trace.stop_reason = data.get('stop_reason')
+        return trace
+
+    def save(self, path, controls=None):
+        with open(path, 'w') as f:
+            f.write(self.to_json(controls))
+
+
+class ConvergenceMonitor:
+    """Tracks a run against its RunControls and decides when to stop.
+
+    The GA calls ``update`` once per generation and stops as soon as it
+    returns a reason. ``mutation_rate`` rises geometrically while the best
+    fitness stagnates and drops back to the base rate on improvement.
+    """
+
+    def __init__(self, controls=None):
+        self.controls = controls or RunControls()
+        self.trace = ConvergenceTrace()
+        self.mutation_rate = self.controls.mutation_rate
+        self.best = None
+        self.stale = 0
+        self._start = None
+        self._last = None
+
+    def start(self):
+        # Idempotent so a resumed run keeps its original clock and trace
+        if self._start is None:
+            self._start = self._last = time.perf_counter()
+        return self
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start if self._start is not None else 0.0
+
+    def update(self, generation, best, mean, hard_violations=None):
+        """Record a generation; returns a stop reason or None to continue"""
+        if self._start is None:
+            self.start()
+        now = time.perf_counter()
+        c = self.controls
+        self.trace.record(generation=generation, best=best, mean=mean, hard_violations=hard_violations,
+                          mutation_rate=self.mutation_rate, seconds=now - self._last, elapsed=now - self._start)
+        self._last = now
+
+        if self.best is None or best > self.best + c.min_improvement:
+            self.best = best
+            self.stale = 0
+            self.mutation_rate = c.mutation_rate
+        else:
+            self.stale += 1
+            if c.adaptive_mutation:
+                self.mutation_rate = min(self.mutation_rate * 1.5, c.max_mutation_rate)
+
+        reason = None
+        if c.stop_when_feasible and hard_violations == 0:
+            reason = 'feasible'
+        elif c.stagnation_window and self.stale >= c.stagnation_window:
+            reason = 'stagnation'
+        elif c.time_budget is not None and now - self._start >= c.time_budget:
+            reason = 'time budget'
+        elif generation >= c.max_generations:
+            reason = 'max generations'
+        self.trace.stop_reason = reason
+        return reason
@@ -0,0 +1,125 @@
+import random
+
+import pandas as pd
+
+# Entity tables tracked between solves and the id column of each
+ENTITY_KEYS = {'courses': 'CourseID', 'rooms': 'RoomID', 'teachers': 'TeacherID'}
+
+
+def _row_hashes(df, key):
+    """Map each entity id to a hash of its row, so edits are detected as well as adds/removes"""
+    if df is None or df.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return dict(zip(df[key], hashes))
+
+
+def snapshot_entities(courses, rooms, teachers):
+    """Fingerprint of the solver input, stored next to the last solution.
+
+    Time slots are not fingerprinted: warm_start checks every kept gene's
+    slot against the current ones.
+    """
+    return {name: _row_hashes(df, ENTITY_KEYS[name])
+            for name, df in (('courses', courses), ('rooms', rooms), ('teachers', teachers))}
+
+
+def changed_entities(previous, current):
+    """Ids added, removed or edited per entity type between two snapshots"""
+    changes = {}
+    for name in ENTITY_KEYS:
+        before, after = previous.get(name, {}), current.get(name, {})
+        changes[name] = {
+            'added': set(after) - set(before),
+            'removed': set(before) - set(after),
+            'modified': {k for k in set(before) & set(after) if before[k] != after[k]},
+        }
+    return changes
+
+
+def session_key(gene):
+    """Genes are identified by course and session number (one gene per weekly session)"""
+    return gene['CourseID'], gene.get('Session', 1)
+
+
+def _conflicting_genes(timetable):
+    """Positions of genes involved in a teacher or room double booking"""
+    seen = {}
+    for i, gene in enumerate(timetable):
+        for key in (('T', gene['Teacher'], gene['Time']), ('R', gene['Room'], gene['Time'])):
+            seen.setdefault(key, []).append(i)
+    return {i for positions in seen.values() if len(positions) > 1 for i in positions}
+
+
+def warm_start(previous_best, changes, sessions, timeslots, rooms, teachers, random_start, random_room=None,
+               random_teacher=None):
+    """Carry the previous timetable onto the current sessions.
+
+    ``sessions`` lists the current (CourseID, Session, Length) demands and
+    ``random_start(timeslots, length)`` draws a start slot for a new gene
+    and ``random_room(gene)`` / ``random_teacher(gene)`` a room and a
+    teacher for it once its slot is set (default: any room or teacher).
+    Returns (base timetable in session order, set of free gene positions).
+    Genes stay frozen unless their course is new or edited, their room or
+    teacher was removed or edited, their slot no longer exists, or they
+    take part in a double booking (new rooms/teachers can resolve those).
+    """
+    previous = {session_key(gene): gene for gene in previous_best}
+    room_list = rooms['RoomID'].tolist()
+    teacher_list = teachers['TeacherID'].tolist()
+    random_room = random_room or (lambda gene: random.choice(room_list))
+    random_teacher = random_teacher or (lambda gene: random.choice(teacher_list))
+    room_ids, teacher_ids, slot_ids = set(room_list), set(teacher_list), set(timeslots)
+    touched_rooms = changes['rooms']['removed'] | changes['rooms']['modified']
+    touched_teachers = changes['teachers']['removed'] | changes['teachers']['modified']
+    touched_courses = changes['courses']['added'] | changes['courses']['modified']
+
+    base, free = [], set()
+    for pos, session in enumerate(sessions):
+        gene = previous.get(session_key(session))
+        if gene is None or session['CourseID'] in touched_courses or gene.get('Length', 1) != session['Length']:
+            gene = dict(session, Time=random_start(timeslots, session['Length']))
+            gene['Room'], gene['Teacher'] = random_room(gene), random_teacher(gene)
+            free.add(pos)
+        else:
+            gene = dict(gene)
+            if gene['Room'] in touched_rooms or gene['Room'] not in room_ids:
+                gene['Room'] = random_room(gene)
+                free.add(pos)
+            if gene['Time'] not in slot_ids:
+                gene['Time'] = random_start(timeslots, session['Length'])
+                free.add(pos)
+            if gene['Teacher'] in touched_teachers or gene['Teacher'] not in teacher_ids:
+                gene['Teacher'] = random_teacher(gene)
+                free.add(pos)
+        base.append(gene)
+    free |= _conflicting_genes(base)
+    return base, free
+
+
+def seed_population(base, free, pop_size, timeslots, rooms, teachers, random_start, random_room=None,
+                    random_teacher=None):
+    """Population of copies of base with only the free genes re-randomised"""
+    population = [[dict(gene) for gene in base]]
+    room_ids = rooms['RoomID'].tolist()
+    random_room = random_room or (lambda gene: random.choice(room_ids))
+    teacher_ids = teachers['TeacherID'].tolist()
+    random_teacher = random_teacher or (lambda gene: random.choice(teacher_ids))
+    while len(population) < pop_size:
+        individual = [dict(gene) for gene in base]
+        for pos in free:
+            individual[pos]['Time'] = random_start(timeslots, individual[pos].get('Length', 1))
+            individual[pos]['Room'] = random_room(individual[pos])
+            individual[pos]['Teacher'] = random_teacher(individual[pos])
+        population.append(individual)
+    return population
+
+
+def changed_assignments(timetable, previous):
+    """Number of genes whose slot, room or teacher differs from previous (session_key -> gene)"""
+    moved = 0
+    for gene in timetable:
+        before = previous.get(session_key(gene))
+        if before is not None and any(gene[k] != before[k] for k in ('Time', 'Room', 'Teacher')):
+            moved += 1
+    return moved
@@ -0,0 +1,209 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from importlib.util import find_spec
+
+# pyinstrument is optional and only imported when a profile is started
+PROFILERS = ['cprofile'] + (['pyinstrument'] if find_spec('pyinstrument') is not None else [])
+
+
+class Instruments:
+    """Registry of named stage timers and counters for one run.
+
+    ``timer(name)`` is a context manager that adds the elapsed time to the
+    stage's totals and keeps the individual spans (up to ``max_events``)
+    for a Chrome trace. Safe to use from the solver's background thread.
+    """
+
+    def __init__(self, enabled=True, max_events=100_000):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.timers = {}  # name -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self.events = []  # (name, start, seconds, thread id)
+        self.dropped_events = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start, time.perf_counter() - start)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def _record(self, name, start, seconds):
+        with self._lock:
+            stats = self.timers.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            if len(self.events) < self.max_events:
+                self.events.append((name, start - self._origin, seconds, threading.get_ident()))
+            else:
+                self.dropped_events += 1
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.events.clear()
+            self.dropped_events = 0
+            self._origin = time.perf_counter()
+
+    def summary(self):
+        """One row per stage, slowest first; share is of the summed stage time (nested stages overlap)"""
+        with self._lock:
+            timers = dict(self.timers)
+        total = sum(stats[1] for stats in timers.values()) or 1.0
+        rows = [{'Stage': name, 'Calls': calls, 'Total Seconds': seconds, 'Mean ms': 1000 * seconds / calls,
+                 'Max ms': 1000 * longest, 'Share': seconds / total}
+                for name, (calls, seconds, longest) in timers.items()]
+        return sorted(rows, key=lambda row: row['Total Seconds'], reverse=True)
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.summary(), columns=['Stage', 'Calls', 'Total Seconds', 'Mean ms', 'Max ms',
+                                                     'Share'])
+
+    def to_dict(self):
+        return {'stages': self.summary(), 'counters': dict(self.counters), 'dropped_events': self.dropped_events}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def chrome_trace(self):
+        """Trace Event Format JSON for chrome://tracing or https://ui.perfetto.dev"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            end = max((start + seconds for _, start, seconds, _ in events), default=0.0)
+        trace = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': seconds * 1e6, 'pid': pid, 'tid': tid}
+                 for name, start, seconds, tid in events]
+        if counters:
+            trace.append({'name': 'counters', 'ph': 'C', 'ts': end * 1e6, 'pid': pid, 'args': counters})
+        return json.dumps({'traceEvents': trace, 'displayTimeUnit': 'ms'})
+
+
+# ----- ACTIVE REGISTRY -----
+# Module-level timer/timed/count record into the registry active on the calling thread,
+# so a solve in a background thread gets its own numbers without threading one through.
+DEFAULT = Instruments()
+_local = threading.local()
+
+
+def active():
+    return getattr(_local, 'instruments', DEFAULT)
+
+
+@contextmanager
+def recording(instruments):
+    """Make `instruments` the active registry on this thread for the block"""
+    previous = getattr(_local, 'instruments', None)
+    _local.instruments = instruments
+    try:
+        yield instruments
+    finally:
+        _local.instruments = previous if previous is not None else DEFAULT
+
+
+def timer(name):
+    return active().timer(name)
+
+
+def timed(name=None):
+    """Decorator timing every call into the registry active at call time"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with active().timer(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    active().count(name, n)
+
+
+# ----- PROFILER CAPTURE -----
+class Profile:
+    """Optional cProfile or pyinstrument capture of a block (profiles the calling thread only)"""
+
+    def __init__(self, mode='cprofile'):
+        if mode not in PROFILERS:
+            raise ValueError(f"profiler {mode!r} is not available (choose from {', '.join(PROFILERS)})")
+        self.mode = mode
+        self._profiler = None
+
+    def __enter__(self):
+        # Re-entering (a resumed solve) keeps adding to the same profile
+        if self.mode == 'pyinstrument':
+            import pyinstrument
+            self._profiler = self._profiler or pyinstrument.Profiler()
+            self._profiler.start()
+        else:
+            self._profiler = self._profiler or cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.mode == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        return False
+
+    def report(self, limit=30):
+        """Text report: the top `limit` functions by cumulative time, or the pyinstrument call tree"""
+        if self._profiler is None:
+            return ''
+        if self.mode == 'pyinstrument':
+            return self._profiler.output_text(unicode=True)
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def save(self, path):
+        """cProfile .prof file (snakeviz, pstats) or pyinstrument HTML"""
+        if self.mode == 'pyinstrument':
+            with open(path, 'w') as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.dump_stats(path)
+
+
+# ----- STREAMLIT SUMMARY -----
+def show_summary(instruments, profile=None):
+    """Stage timing table, JSON / Chrome-trace downloads and the profiler report"""
+    import streamlit as st  # only the apps need it
+
+    st.subheader("Stage Timings")
+    st.dataframe(instruments.to_frame())
+    if instruments.counters:
+        st.caption(" · ".join(f"{name}: {value}" for name, value in instruments.counters.items()))
+    json_col, trace_col = st.columns(2)
+    json_col.download_button("Download Timings (JSON)", instruments.to_json(), "stage_timings.json")
+    trace_col.download_button("Download Chrome Trace", instruments.chrome_trace(), "stage_trace.json",
+                              help="Open in chrome://tracing or ui.perfetto.dev")
+    if profile is not None:
+        with st.expander(f"Profile ({profile.mode})"):
+            st.code(profile.report())
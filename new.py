@@ -4,28 +4,74 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import os
 import random
+from contextlib import nullcontext
+
+from clash_matrix import ClashMatrix
+from data_import import load_uploads
+from data_report import dataset_report, show_report
+import decomposition
+from exam_schedule import show_exams
+from fitness_cache import FitnessCache
+from ga_controls import ConvergenceMonitor, RunControls
+from instrumentation import PROFILERS, Instruments, Profile, count, recording, show_summary, timed, timer
+from prerequisites import CourseGraph
+from problem import enrollment_courses, load_problem
+from room_feasibility import RoomFeasibility
+import session_solver
+import shared_problem
+from time_grid import TimeGrid
+from timetable_diff import diff, show_changes
+from timetable_query import TimetableIndex, show_query
 
 # Genetic Algorithm essentials
 
+def _double_bookings(resources, slots):
+    # Extra bookings beyond the first for each (resource, slot) pair; unassigned resources are skipped
+    pairs = pd.DataFrame({'resource': resources, 'slot': slots}).dropna()
+    return int(pairs.duplicated().sum())
+
+def hard_violations(timetable, students=None):
+    """Faculty double bookings + room double bookings + clashing student enrollments"""
+    slots = [gene[1] for gene in timetable]
+    violations = _double_bookings([gene[3] for gene in timetable], slots)
+    violations += _double_bookings([gene[2] for gene in timetable], slots)
+    # Student clashes: `students` is a ClashMatrix precomputed from the enrollments,
+    # so the check is a sum over co-slotted course pairs instead of a table join
+    if students is not None:
+        course_idx = students.index_of([gene[0] for gene in timetable])
+        slot_codes = pd.factorize(pd.Series(slots))[0]
+        known = course_idx >= 0
+        violations += students.penalty(course_idx[known], slot_codes[known])
+    return violations
+
 def fitness(timetable, students, faculty, rooms):
     # Calculate how many constraints are met; higher is better
     penalty = 0
     # Example constraints checked:
     # - No student has clashes in timetable
     # - Faculty not double booked
+    # - Room double booking
     # - Room capacity sufficient
     # Implement logic as per your problem requirements
-    #
-    # Placeholder example (improve with real constraint checks)
+    penalty += hard_violations(timetable, students)
     return -penalty
 
-def create_individual(courses, time_slots, rooms, faculty_list):
-    # Randomly assign each course to a time slot, room, and faculty qualified
+def pick_room(i, rooms, feasibility=None):
+    # A room of the right type and capacity for course i; any room if none qualifies
+    options = feasibility.choices(i) if feasibility is not None else ()
+    if len(options):
+        return rooms['Room_ID'].iloc[random.choice(options)]
+    return random.choice(rooms['Room_ID'].tolist())
+
+@timed()
+def create_individual(courses, time_slots, rooms, faculty_list, feasibility=None):
+    # Randomly assign each course to a time slot, feasible room, and faculty qualified
     individual = []
-    for course in courses.itertuples():
+    for i, course in enumerate(courses.itertuples()):
         time_slot = random.choice(time_slots['Time_Slot_ID'].tolist())
-        room = random.choice(rooms['Room_ID'].tolist())
+        room = pick_room(i, rooms, feasibility)
         # Pick a faculty who can teach this course
         qualified = faculty_list[faculty_list['Expertise_Courses'].apply(lambda x: course.Course_ID in eval(x))]
         if qualified.empty:
@@ -42,12 +88,12 @@ def crossover(parent1, parent2):
     child2 = parent2[:point] + parent1[point:]
     return child1, child2
 
-def mutation(individual, time_slots, rooms, faculty_list, mutation_rate=0.1):
+def mutation(individual, time_slots, rooms, faculty_list, mutation_rate=0.1, feasibility=None):
     for i in range(len(individual)):
         if random.random() < mutation_rate:
             course_id, _, _, _ = individual[i]
             time_slot = random.choice(time_slots['Time_Slot_ID'].tolist())
-            room = random.choice(rooms['Room_ID'].tolist())
+            room = pick_room(i, rooms, feasibility)
             qualified = faculty_list[faculty_list['Expertise_Courses'].apply(lambda x: course_id in eval(x))]
             if qualified.empty:
                 fac_id = None
@@ -56,24 +102,61 @@ def mutation(individual, time_slots, rooms, faculty_list, mutation_rate=0.1):
             individual[i] = (course_id, time_slot, room, fac_id)
     return individual
 
-def genetic_algorithm(courses, time_slots, rooms, faculty_list, population_size=50, generations=100):
-    population = [create_individual(courses, time_slots, rooms, faculty_list) for _ in range(population_size)]
+def genetic_algorithm(courses, time_slots, rooms, faculty_list, population_size=50, generations=100, cache=None,
+                      clashes=None, monitor=None, progress=None, problem=None):
+    # Course x room feasibility (type rule + capacity) built once; genes only ever get feasible rooms
+    with timer('room_feasibility'):
+        problem = problem if problem is not None else load_problem(courses, rooms=rooms)
+        feasibility = RoomFeasibility.from_problem(problem)
+    with timer('initial_population'):
+        population = [create_individual(courses, time_slots, rooms, faculty_list, feasibility)
+                      for _ in range(population_size)]
+    # Elites (population[:10]) and duplicate children are scored once through the genome-hash cache
+    cache = cache if cache is not None else FitnessCache(maxsize=4 * population_size)
+    # Stops early on feasibility, stagnation or time budget and records the convergence trace
+    monitor = monitor if monitor is not None else ConvergenceMonitor(RunControls(max_generations=generations))
+    monitor.start()
     for gen in range(generations):
-        population = sorted(population, key=lambda ind: fitness(ind, None, None, None), reverse=True)
+        with timer('fitness'):
+            scores = [cache.score(ind, fitness, clashes, None, None) for ind in population]
+        with timer('selection'):
+            order = sorted(range(len(population)), key=scores.__getitem__, reverse=True)
+            population = [population[i] for i in order]
+        best = scores[order[0]]
+        count('generations')
+        # fitness is the negated hard-violation count, so best == 0 means feasible
+        reason = monitor.update(gen + 1, best, float(np.mean(scores)), -best)
+        # (Optional) show progress on Streamlit
+        message = f"Generation {gen+1}, Best Fitness: {best} ({cache.stats()})"
+        if reason:
+            message += f" - stopped: {reason}"
+        if progress is not None:
+            progress(message)
+        else:
+            st.write(message)
+        if reason:
+            break
         next_gen = population[:10]  # elitism: keep top 10
         while len(next_gen) < population_size:
             p1, p2 = random.sample(population[:20], 2)
-            c1, c2 = crossover(p1, p2)
-            c1 = mutation(c1, time_slots, rooms, faculty_list)
-            c2 = mutation(c2, time_slots, rooms, faculty_list)
+            with timer('crossover'):
+                c1, c2 = crossover(p1, p2)
+            with timer('mutation'):
+                c1 = mutation(c1, time_slots, rooms, faculty_list, mutation_rate=monitor.mutation_rate,
+                              feasibility=feasibility)
+                c2 = mutation(c2, time_slots, rooms, faculty_list, mutation_rate=monitor.mutation_rate,
+                              feasibility=feasibility)
             next_gen.extend([c1, c2])
         population = next_gen
-        # (Optional) show progress on Streamlit
-        st.write(f"Generation {gen+1}, Best Fitness: {fitness(population[0], None, None, None)}")
     return population[0]
 
 # Streamlit UI
 
+@st.cache_resource(max_entries=4)
+def build_clash_matrix(content_hash, courses_hash=None, _course_ids=None, _enrollments=None):
+    # Keyed on the uploads' content hashes, so the matrix is built once per enrollment file
+    return ClashMatrix.from_enrollments(_enrollments, course_ids=_course_ids)
+
 def main():
     st.title("NEP 2020 AI Timetable Generator")
 
@@ -82,27 +165,187 @@ def main():
     time_slots_file = st.sidebar.file_uploader("Time Slots CSV")
     faculty_file = st.sidebar.file_uploader("Faculty CSV")
     rooms_file = st.sidebar.file_uploader("Rooms CSV")
+    enrollments_file = st.sidebar.file_uploader("Student Enrollments CSV (optional)")
 
     if courses_file and time_slots_file and faculty_file and rooms_file:
-        courses = pd.read_csv(courses_file)
-        time_slots = pd.read_csv(time_slots_file)
-        faculty = pd.read_csv(faculty_file)
-        rooms = pd.read_csv(rooms_file)
+        # Parsed concurrently and cached by content hash, so reruns cost nothing
+        # Either the legacy NEP columns or the generator's (sample.py), detected per file
+        results = load_uploads([courses_file, time_slots_file, faculty_file, rooms_file],
+                               entity=[('nep_courses', 'generator_courses'), ('nep_time_slots', 'generator_time_slots'),
+                                       ('nep_faculty', 'generator_faculty'), ('nep_rooms', 'generator_rooms')])
+        for result in results:
+            for error in result['errors']:
+                st.warning(f"{result['name']}: {error}")
+        if any(result['frame'] is None for result in results):
+            st.error("Fix the upload errors above to continue.")
+            return
+        courses, time_slots, faculty, rooms = (result['frame'] for result in results)
+        # Generator-format courses carry weekly hours: solve one gene per session instead of per course
+        session_mode = 'total_weekly_hours' in courses.columns
+        # Loaded (and validated) before the Generate button in both modes; the legacy GA takes its room rules from it
+        grid = TimeGrid.from_slots(time_slots) if session_mode and {'day', 'time_slot'} <= set(time_slots.columns) \
+            else None
+        try:
+            problem = load_problem(courses, rooms=rooms, grid=grid)
+        except ValueError as error:
+            st.error(f"{results[0]['name']}: {error}")
+            return
+        if session_mode:
+            st.write("Sessions to Schedule:", problem.n_sessions)
 
         st.write("Courses Loaded:", len(courses))
         st.write("Time Slots Loaded:", len(time_slots))
         st.write("Faculty Loaded:", len(faculty))
         st.write("Rooms Loaded:", len(rooms))
 
+        if session_mode:
+            # Gate: data that cannot be timetabled (no fitting room, more teaching than the week holds) stops here.
+            # Session mode only: the legacy tuple GA does not apply the room rules the report checks.
+            report = dataset_report(courses, problem=problem)
+            if not show_report(report) and not st.sidebar.checkbox("Solve Despite Data Errors", value=False):
+                st.error("The data cannot be timetabled without clashes; fix it or tick 'Solve Despite Data Errors'.")
+                return
+
+        clashes = enrollments = None
+        if enrollments_file:
+            # One-time precomputation; the GA only does pair lookups afterwards
+            upload = load_uploads([enrollments_file], entity='enrollments')[0]
+            if upload['frame'] is None:
+                st.error(f"Failed to load {upload['name']}: {'; '.join(upload['errors'])}")
+                return
+            if session_mode:
+                # Rows aligned with the problem's course positions (programme-qualified ids for per-programme files)
+                try:
+                    enrollments = enrollment_courses(upload['frame'], problem.course_ids, problem.qualified_ids,
+                                                     problem.programmes)
+                except ValueError as error:
+                    st.error(f"{upload['name']}: {error}")
+                    return
+                clashes = build_clash_matrix(upload['digest'], results[0]['digest'],
+                                             _course_ids=problem.course_ids, _enrollments=enrollments)
+                problem.clashes = clashes
+            else:
+                enrollments = upload['frame']
+                clashes = build_clash_matrix(upload['digest'], _enrollments=enrollments)
+            st.write("Course Conflict Pairs:", clashes.nnz // 2)
+
+        if session_mode:
+            # Rebuilt on every import: linear hash joins over the prerequisite/co-requisite text
+            graph = CourseGraph.from_courses(courses)
+            report = graph.report()
+            if report['on_cycles']:
+                st.warning(f"{report['on_cycles']} courses are on or behind a prerequisite cycle.")
+            if report['out_of_order']:
+                st.warning(f"{report['out_of_order']} prerequisites are not in an earlier term than their course.")
+            if report['unresolved']:
+                with st.expander(f"Unresolved prerequisite references ({report['unresolved']})"):
+                    st.dataframe(graph.unresolved)
+            # Co-requisites and same-basket electives must not overlap either
+            structural = graph.clash_matrix(problem.course_enrollment)
+            problem.clashes = structural if problem.clashes is None else problem.clashes.merged(structural)
+
+        # Content hashes of every upload: a stored result is only shown again for the same inputs
+        inputs = tuple(result['digest'] for result in results) + ((upload['digest'],) if enrollments_file else ())
+
+        with st.sidebar.expander("Run Controls"):
+            generations = st.number_input("Max Generations", min_value=1, max_value=1000, value=100)
+            time_budget = st.number_input("Time Budget (seconds, 0 = none)", min_value=0, max_value=3600, value=0)
+            stagnation = st.number_input("Stop After Generations Without Improvement (0 = never)",
+                                         min_value=0, max_value=500, value=15)
+            stop_when_feasible = st.checkbox("Stop When No Hard Violations", value=True)
+            adaptive = st.checkbox("Adaptive Mutation Rate", value=True)
+            profiler = st.selectbox("Profiler", ['off'] + PROFILERS,
+                                    help="Capture a cProfile/pyinstrument report of the solve (slows it down)")
+            islands = 1
+            decompose = False
+            if session_mode:
+                islands = st.number_input("Parallel Islands (worker processes)", min_value=1,
+                                          max_value=os.cpu_count() or 1, value=1,
+                                          help="Independent GA runs sharing one memory-mapped copy of the problem")
+                decompose = st.checkbox("Solve by Cohort", value=False,
+                                        help="One GA per programme/year/semester/batch in the worker processes, "
+                                             "then a repair pass for shared faculty and rooms")
+
         if st.button("Generate Timetable"):
-            best_timetable = genetic_algorithm(courses, time_slots, rooms, faculty)
-            timetable_df = pd.DataFrame(best_timetable, columns=["Course_ID", "Time_Slot", "Room", "Faculty_ID"])
-            st.write("Generated Timetable")
-            st.dataframe(timetable_df)
-
-            # Offer download option
-            csv = timetable_df.to_csv(index=False).encode('utf-8')
-            st.download_button("Download Timetable CSV", csv, "timetable.csv")
+            controls = RunControls(max_generations=generations, time_budget=time_budget or None,
+                                   stop_when_feasible=stop_when_feasible, stagnation_window=stagnation or None,
+                                   adaptive_mutation=adaptive)
+            monitor = ConvergenceMonitor(controls)
+            status = st.empty()  # one element updated in place rather than a line per generation
+            instruments = Instruments()
+            profile = Profile(profiler) if profiler != 'off' else None
+            with recording(instruments), profile or nullcontext():
+                if session_mode and decompose:
+                    status.info(f"Solving {problem.n_cohorts} cohorts in {islands} worker(s)...")
+                    best, layout, report = decomposition.solve(problem, islands, controls=controls,
+                                                               generations=generations)
+                    monitor.trace = report['trace']
+                    status.info(f"Reconciled {report['initial']} colliding sessions in {report['passes']} passes; "
+                                f"{report['remaining']} still collide, hard violations left: {report['violations']}")
+                    timetable_df = session_solver.to_frame(problem, layout, best)
+                elif session_mode and islands > 1:
+                    status.info(f"Running {islands} islands in worker processes...")
+                    best, layout, runs = shared_problem.solve_parallel(problem, islands, controls=controls,
+                                                                       generations=generations)
+                    best_run = max(runs, key=lambda run: run['fitness'])
+                    monitor.trace = best_run['trace']
+                    status.info(f"Best fitness per island: {[round(run['fitness'], 3) for run in runs]}")
+                    timetable_df = session_solver.to_frame(problem, layout, best)
+                elif session_mode:
+                    best, layout = session_solver.genetic_algorithm(problem, generations=generations,
+                                                                    monitor=monitor, progress=status.info)
+                    timetable_df = session_solver.to_frame(problem, layout, best)
+                else:
+                    best_timetable = genetic_algorithm(courses, time_slots, rooms, faculty, generations=generations,
+                                                       clashes=clashes, monitor=monitor, progress=status.info,
+                                                       problem=problem)
+                    with timer('to_frame'):
+                        timetable_df = pd.DataFrame(best_timetable,
+                                                    columns=["Course_ID", "Time_Slot", "Room", "Faculty_ID"])
+            # The course-mapped enrollments, so student lookups and the API use the timetable's course ids
+            with timer('query_index'):
+                index = TimetableIndex(timetable_df, enrollments)
+            # Only the rows that differ from the previous run, for downstream systems that import deltas
+            # Diffed against the last run whenever the row keys are comparable (same course schema, timetable
+            # columns and id type), so course edits show up as added/removed rows
+            keyspace = (tuple(courses.columns), tuple(timetable_df.columns), str(timetable_df['Course_ID'].dtype))
+            previous = st.session_state.get('nep_result')
+            changes = None
+            if previous is not None and previous.get('keyspace') == keyspace:
+                with timer('diff'):
+                    changes = diff(previous['timetable'], timetable_df)
+            # Kept across reruns so the lookup widgets below don't need another solve
+            st.session_state.nep_result = {'inputs': inputs, 'keyspace': keyspace, 'timetable': timetable_df,
+                                           'trace': monitor.trace.to_json(controls),
+                                           'index': index, 'enrollments': enrollments, 'changes': changes,
+                                           'instruments': instruments, 'profile': profile}
+
+        if st.session_state.get('nep_result', {}).get('inputs') == inputs:
+            show_result(st.session_state.nep_result)
+
+        if session_mode and enrollments_file:
+            # Same conflict graph, second problem: one end-term exam per course in the large halls
+            show_exams(courses, upload['frame'], rooms, clashes)
+
+def show_result(result):
+    timetable_df = result['timetable']
+    st.download_button("Download Convergence Trace (JSON)", result['trace'], "convergence_trace.json")
+    st.write("Generated Timetable")
+    st.dataframe(timetable_df)
+
+    # Offer download option
+    csv = timetable_df.to_csv(index=False).encode('utf-8')
+    st.download_button("Download Timetable CSV", csv, "timetable.csv")
+    if result['changes'] is not None:
+        show_changes(result['changes'])
+
+    if st.button("Publish to Timetable API", help="Write this timetable where `timetable_api.py serve` reads it"):
+        from timetable_api import DEFAULT_DB, publish  # the API's web stack is only needed here
+        version = publish(timetable_df, DEFAULT_DB, result['enrollments'])
+        st.success(f"Published to {DEFAULT_DB} (version {version})")
+
+    show_query(result['index'])
+    show_summary(result['instruments'], result['profile'])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+"""Prerequisite and co-requisite graph over a course catalogue.
+
+    python prerequisites.py nep2020_courses.csv
+
+The free-text ``prerequisite`` / ``co_requisite`` cells ("Basic Digital",
+a course code, a course name, several separated by ',' or ';') are linked
+to course positions with hash joins, so the whole graph is rebuilt in
+linear time on every import. A cell resolves, in order, to
+
+1. a course code,
+2. a course name in the same programme and batch, or
+3. for "Basic <Subject>", the earliest course of that subject family
+   (course names sharing the first word) in an earlier term of the same
+   programme and batch.
+
+Anything else is reported as unresolved.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from clash_matrix import ClashMatrix, pairs_within_groups
+from problem import COURSE_COLUMNS, canonical_columns, cohort_codes, course_keys, read_table
+
+ELECTIVE_CATEGORIES = ['Minor', 'Skill-Based', 'AEC', 'VAC']  # NEP 2020 choice baskets; Major is core
+SEPARATORS = r'[;,]'
+
+
+def _key(values):
+    return values.astype('string').str.strip().str.lower()
+
+
+def _references(column):
+    """(course position, lower-cased reference) rows of a free-text column, one per listed reference"""
+    text = _key(column).str.split(SEPARATORS, regex=True).explode().str.strip()
+    text = text[text.notna() & (text != '')]
+    return text.index.to_numpy(dtype=np.int64), text.to_numpy(dtype=object)
+
+
+def resolve(courses, column):
+    """(source, target, unresolved) for a reference column: target lists source.
+
+    ``courses`` is indexed 0..n-1; ``unresolved`` is a frame of the
+    positions and texts no rule matched.
+    """
+    col = canonical_columns(courses, COURSE_COLUMNS)
+    n = len(courses)
+    if col[column] is None:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, pd.DataFrame({'course': empty, 'reference': []})
+    owner, text = _references(col[column].reset_index(drop=True))
+    scope = pd.Series([''] * n)
+    for name in ('programme', 'batch'):
+        if col[name] is not None:
+            scope = scope + '|' + col[name].astype(str).reset_index(drop=True)
+    names = _key(col['course_name'].reset_index(drop=True)) if col['course_name'] is not None \
+        else pd.Series([''] * n, dtype='string')
+    term = np.zeros(n, dtype=np.int64)
+    for name, scale in (('year', 100), ('semester', 1)):
+        if col[name] is not None:
+            term += scale * pd.to_numeric(col[name], errors='coerce').fillna(0).astype(np.int64).to_numpy()
+    catalogue = pd.DataFrame({'target': np.arange(n), 'scope': scope, 'name': names,
+                              'family': names.str.split(' ').str[0], 'term': term})
+    refs = pd.DataFrame({'source': owner, 'text': text})
+    refs['scope'] = scope.to_numpy()[owner]
+    refs['term'] = term[owner]
+    refs['target'] = -1
+
+    # 1. course code
+    if col['course_code'] is not None:
+        codes = pd.Series(np.arange(n), index=_key(col['course_code'].reset_index(drop=True)).to_numpy())
+        codes = codes[~codes.index.duplicated()]
+        refs['target'] = refs['text'].map(codes).fillna(-1).astype(np.int64)
+    # 2. course name within the programme and batch
+    open_ = refs['target'] < 0
+    by_name = catalogue.drop_duplicates(['scope', 'name'])[['scope', 'name', 'target']]
+    hit = refs.loc[open_, ['scope', 'text']].reset_index().merge(
+        by_name, left_on=['scope', 'text'], right_on=['scope', 'name'])
+    refs.loc[hit['index'].to_numpy(), 'target'] = hit['target'].to_numpy()
+    # 3. "basic <subject>": earliest earlier course of the subject family
+    open_ = (refs['target'] < 0) & refs['text'].str.startswith('basic ')
+    wanted = refs.loc[open_, ['scope', 'text', 'term']].reset_index()
+    wanted['family'] = wanted['text'].str.split(' ').str[1]
+    hit = wanted.merge(catalogue[['scope', 'family', 'term', 'target']], on=['scope', 'family'],
+                       suffixes=('', '_target'))
+    hit = hit[hit['term_target'] < hit['term']].sort_values(['index', 'term_target', 'target'])
+    hit = hit.drop_duplicates('index')
+    refs.loc[hit['index'].to_numpy(), 'target'] = hit['target'].to_numpy()
+
+    found = (refs['target'] >= 0) & (refs['target'] != refs['source'])
+    unresolved = pd.DataFrame({'course': refs.loc[~found, 'source'].to_numpy(),
+                               'reference': refs.loc[~found, 'text'].to_numpy()})
+    return refs.loc[found, 'source'].to_numpy(np.int64), refs.loc[found, 'target'].to_numpy(np.int64), unresolved
+
+
+class CourseGraph:
+    """Prerequisite DAG (edges prerequisite -> course, CSR by prerequisite) plus co-requisite pairs.
+
+    ``cohort`` and ``term`` are per course; ``track`` is the elective basket
+    (cohort x category) of an elective course and -1 for core courses.
+    """
+
+    def __init__(self, course_ids, source, target, co_a, co_b, cohort, cohorts, term, track, unresolved):
+        self.course_ids = np.asarray(course_ids)
+        self.source, self.target = source, target
+        self.co_a, self.co_b = co_a, co_b
+        self.cohort, self.cohorts = np.asarray(cohort), cohorts
+        self.term = term
+        self.track = track
+        self.unresolved = unresolved
+        n = len(self.course_ids)
+        order = np.argsort(source, kind='stable')
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=n), out=self.indptr[1:])
+        self.indices = target[order]
+
+    @property
+    def n_courses(self):
+        return len(self.course_ids)
+
+    @classmethod
+    def from_courses(cls, courses):
+        """Graph of a generator-style course table (frame or CSV/Parquet path)"""
+        courses = read_table(courses).reset_index(drop=True)
+        n = len(courses)
+        col = canonical_columns(courses, COURSE_COLUMNS)
+        # resolve() returns (course, listed course); the DAG points from prerequisite to course
+        target, source, unresolved = resolve(courses, 'prerequisite')
+        co_course, co_listed, co_unresolved = resolve(courses, 'co_requisite')
+        cohort, cohorts = cohort_codes(col, n)
+        term = np.zeros(n, dtype=np.int64)
+        for name, scale in (('year', 100), ('semester', 1)):
+            if col[name] is not None:
+                term += scale * pd.to_numeric(col[name], errors='coerce').fillna(0).astype(np.int64).to_numpy()
+        track = np.full(n, -1, dtype=np.int64)
+        if col['category'] is not None:
+            elective = col['category'].isin(ELECTIVE_CATEGORIES).to_numpy()
+            codes = pd.MultiIndex.from_arrays([cohort, col['category'].astype(str)]).factorize()[0]
+            track = np.where(elective, codes, -1)
+        # Same ids as load_problem, so clash_matrix() lines up with a ProblemInstance
+        ids = course_keys(col, n)[0]
+        unresolved = pd.concat([unresolved.assign(kind='prerequisite'), co_unresolved.assign(kind='co_requisite')],
+                               ignore_index=True)
+        return cls(ids, source, target, co_course, co_listed, cohort, cohorts, term, track, unresolved)
+
+    def successors(self, course):
+        return self.indices[self.indptr[course]:self.indptr[course + 1]]
+
+    def topological_order(self):
+        """(courses in prerequisite order, courses on or behind a cycle) by Kahn's algorithm.
+
+        Processed a whole level at a time: every course whose prerequisites
+        are all placed is released together, so the work is O(V + E) array
+        operations over the number of levels.
+        """
+        indegree = np.bincount(self.target, minlength=self.n_courses)
+        frontier = np.flatnonzero(indegree == 0)
+        order = []
+        while len(frontier):
+            order.append(frontier)
+            counts = np.diff(self.indptr)[frontier]
+            starts = np.repeat(self.indptr[frontier], counts)
+            released = self.indices[starts + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)]
+            indegree -= np.bincount(released, minlength=self.n_courses)
+            touched = np.unique(released)
+            frontier = touched[indegree[touched] == 0]
+        order = np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+        placed = np.zeros(self.n_courses, dtype=bool)
+        placed[order] = True
+        return order, np.flatnonzero(~placed)
+
+    def out_of_order(self):
+        """Prerequisite edges whose prerequisite is not in a strictly earlier term"""
+        bad = self.term[self.source] >= self.term[self.target]
+        return self.source[bad], self.target[bad]
+
+    def concurrent(self):
+        """CSR (indptr, courses) of what each cohort can take this term.
+
+        A cohort's course is takeable unless one of its prerequisites is
+        itself in the cohort (same term) or in a later term; those courses are
+        left out.
+        """
+        blocked = np.zeros(self.n_courses, dtype=bool)
+        bad_source, bad_target = self.out_of_order()
+        blocked[bad_target] = True
+        blocked[self.target[self.cohort[self.source] == self.cohort[self.target]]] = True
+        courses = np.flatnonzero(~blocked)
+        courses = courses[np.argsort(self.cohort[courses], kind='stable')]
+        indptr = np.zeros(len(self.cohorts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.cohort[courses], minlength=len(self.cohorts)), out=indptr[1:])
+        return indptr, courses
+
+    def conflict_pairs(self):
+        """Course pairs that must not overlap: co-requisites (taken together) and electives of one basket"""
+        order = np.argsort(self.track, kind='stable')
+        order = order[self.track[order] >= 0]
+        left, right = pairs_within_groups(self.track[order])
+        a = np.concatenate((self.co_a, order[left]))
+        b = np.concatenate((self.co_b, order[right]))
+        return a, b
+
+    def clash_matrix(self, enrollment=None):
+        """The conflict pairs as a ClashMatrix over the course ids, for the solvers' student-clash term.
+
+        A pair weighs the smaller of the two enrollments (everyone who could
+        sit both), or 1 without enrollments.
+        """
+        a, b = self.conflict_pairs()
+        weights = np.maximum(np.minimum(enrollment[a], enrollment[b]), 1) if enrollment is not None else 1
+        return ClashMatrix.from_pairs(self.course_ids, a, b, weights)
+
+    def report(self):
+        _, cyclic = self.topological_order()
+        bad_source, _ = self.out_of_order()
+        return {'courses': self.n_courses, 'prerequisite_edges': len(self.source),
+                'co_requisite_pairs': len(self.co_a), 'unresolved': len(self.unresolved),
+                'on_cycles': len(cyclic), 'out_of_order': len(bad_source),
+                'elective_pairs': len(self.conflict_pairs()[0]) - len(self.co_a)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('courses', nargs='+')
+    args = parser.parse_args()
+    graph = CourseGraph.from_courses(args.courses if len(args.courses) > 1 else args.courses[0])
+    print(graph.report())
+    if len(graph.unresolved):
+        print(graph.unresolved.head(20).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+import os
+
+import numpy as np
+
+from clash_matrix import ClashMatrix
+from time_grid import TimeGrid
+from travel import building_campus, travel_matrix
+
+# Canonical column -> accepted spellings (generator / sample.py, rule.py, new.py)
+COURSE_COLUMNS = {
+    'course_id': ['course_id', 'CourseID', 'Course_ID'],
+    'course_code': ['course_code', 'CourseCode', 'Course_Code'],
+    'course_name': ['course_name', 'Name', 'Course_Name'],
+    'programme': ['programme', 'Program', 'Programme'],
+    'year': ['year', 'Year'],
+    'semester': ['semester', 'Semester'],
+    'batch': ['batch', 'Batch'],
+    'category': ['category', 'Category'],
+    'course_type': ['course_type', 'Type', 'Course_Type'],
+    'credits': ['credits', 'Credits'],
+    'theory_hours': ['theory_hours', 'TheoryHours', 'Theory_Hours'],
+    'lab_hours': ['lab_hours', 'PracticalHours', 'Practical_Hours'],
+    'tutorial_hours': ['tutorial_hours', 'TutorialHours', 'Tutorial_Hours'],
+    'total_weekly_hours': ['total_weekly_hours', 'WeeklyHours', 'Weekly_Hours'],
+    'enrollment': ['enrollment', 'Enrollment'],
+    'faculty_assigned': ['faculty_assigned', 'Faculty', 'Faculty_ID'],
+    'prerequisite': ['prerequisite', 'Prerequisite', 'Prerequisites'],
+    'co_requisite': ['co_requisite', 'CoRequisite', 'Co_Requisite'],
+}
+
+ROOM_COLUMNS = {
+    'room_id': ['room_id', 'RoomID', 'Room_ID'],
+    'room_number': ['room_number', 'RoomNumber', 'Room_Number'],
+    'room_type': ['room_type', 'Type', 'Room_Type'],
+    'capacity': ['capacity', 'Capacity'],
+    'building': ['building', 'Building'],
+    'campus': ['campus', 'Campus'],
+}
+
+PROGRAMME_SEP = ':'  # programme-qualified course ids (see course_keys)
+
+# Session kinds produced by expanding weekly hours
+THEORY, LAB, TUTORIAL = 0, 1, 2
+
+# pandas is imported inside the loaders so that importing the solver core (sessions,
+# session_solver) does not pay its ~0.3 s import cost
+
+
+def read_table(source):
+    """DataFrame from a frame, a CSV/Parquet path, or a list of those (concatenated)"""
+    import pandas as pd
+    if isinstance(source, pd.DataFrame):
+        return source
+    if isinstance(source, (list, tuple)):
+        return pd.concat([read_table(s) for s in source], ignore_index=True)
+    if os.fspath(source).lower().endswith('.parquet'):
+        return pd.read_parquet(source)
+    return pd.read_csv(source)
+
+
+def canonical_columns(df, aliases):
+    """Map each canonical name to the column view holding it (None when absent)"""
+    columns = {}
+    for name, spellings in aliases.items():
+        found = next((s for s in spellings if s in df.columns), None)
+        columns[name] = df[found] if found is not None else None
+    return columns
+
+
+def _codes(column, n):
+    """Categorical codes and categories for a column (all -1 when the column is missing)"""
+    import pandas as pd
+    if column is None:
+        return np.full(n, -1, dtype=np.int32), []
+    codes, categories = pd.factorize(column)
+    return codes.astype(np.int32), list(categories)
+
+
+def _ints(column, n, default=0):
+    import pandas as pd
+    if column is None:
+        return np.full(n, default, dtype=np.int64)
+    return pd.to_numeric(column, errors='coerce').fillna(default).to_numpy(dtype=np.int64)
+
+
+def course_keys(col, n):
+    """(unique course ids, qualified) for a course table.
+
+    Per-programme files from zip.py restart course_id at 1 in every
+    programme (and course codes repeat across the catalogue too), so
+    repeated ids become ``programme:course_id`` with ``qualified`` set;
+    enrollment_courses maps enrollments the same way. Unique course codes
+    are the last resort before a ValueError.
+    """
+    import pandas as pd
+    ids = col['course_id'] if col['course_id'] is not None else pd.Series(np.arange(1, n + 1))
+    if not ids.duplicated().any():
+        return ids.to_numpy(), False
+    if col['programme'] is not None:
+        qualified = col['programme'].astype(str) + PROGRAMME_SEP + ids.astype(str)
+        if not qualified.duplicated().any():
+            return qualified.to_numpy(dtype=object), True
+    if col['course_code'] is not None and not col['course_code'].duplicated().any():
+        return col['course_code'].to_numpy(), False
+    repeated = ids[ids.duplicated()].unique()[:5].tolist()
+    raise ValueError(f"course ids repeat within a programme (e.g. {repeated}); give each course a unique course_id")
+
+
+def enrollment_courses(enrollments, course_ids, qualified=False, programmes=None):
+    """``enrollments`` with course_id in the form of ``course_ids`` (see course_keys).
+
+    Raises ValueError when enrollments of a loaded programme name a course
+    that is not in the table, e.g. catalogue-wide enrollments paired with
+    per-programme files whose ids restart at 1; rows of other programmes
+    are left for ClashMatrix.from_enrollments to skip.
+    """
+    import pandas as pd
+    ids = enrollments['course_id']
+    has_programme = 'programme' in enrollments.columns
+    if qualified:
+        if not has_programme:
+            raise ValueError("course ids restart per programme, so the enrollments need a programme column")
+        ids = enrollments['programme'].astype(str) + PROGRAMME_SEP + ids.astype(str)
+    missing = ~ids.isin(pd.Series(course_ids))
+    if has_programme and programmes is not None:
+        missing &= enrollments['programme'].astype(str).isin([str(p) for p in programmes])
+    if missing.any():
+        raise ValueError(f"{int(missing.sum())} enrollments name courses that are not in the course table "
+                         f"(e.g. {ids[missing].unique()[:5].tolist()}); enrollments must use the same course ids "
+                         f"as the course file")
+    return enrollments.assign(course_id=ids.to_numpy()) if qualified else enrollments
+
+
+def cohort_codes(col, n):
+    """Cohort = programme x year x semester x batch, the group of students taking courses together"""
+    import pandas as pd
+    cohort_parts = [col[c] for c in ('programme', 'year', 'semester', 'batch') if col[c] is not None]
+    if not cohort_parts:
+        return np.zeros(n, dtype=np.int64), ['All']
+    cohort_frame = pd.concat(cohort_parts, axis=1).astype(str)
+    cohort, cohort_index = pd.MultiIndex.from_frame(cohort_frame).factorize()
+    return cohort, [' / '.join(parts) for parts in cohort_index]
+
+
+class ProblemInstance:
+    """Integer-indexed timetabling problem.
+
+    Courses, faculty, rooms and cohorts are positions 0..n-1; every string
+    attribute is a categorical code into the matching list (``programmes``,
+    ``faculty``, ``room_types`` ...). Weekly hours are expanded into one
+    session demand per hour: ``session_course`` and ``session_kind`` are
+    ordered by course, and ``course_offsets[c]:course_offsets[c + 1]`` are
+    the sessions of course ``c``.
+    """
+
+    def __init__(self, **arrays):
+        self.__dict__.update(arrays)
+
+    @property
+    def n_courses(self):
+        return len(self.course_ids)
+
+    @property
+    def n_sessions(self):
+        return len(self.session_course)
+
+    @property
+    def n_rooms(self):
+        return len(self.room_ids) if self.room_ids is not None else 0
+
+    @property
+    def n_faculty(self):
+        return len(self.faculty)
+
+    @property
+    def n_cohorts(self):
+        return len(self.cohorts)
+
+    def summary(self):
+        return {'courses': self.n_courses, 'sessions': self.n_sessions, 'faculty': self.n_faculty,
+                'rooms': self.n_rooms, 'cohorts': self.n_cohorts, 'slots': self.grid.n_slots}
+
+
+def expand_sessions(theory, lab, tutorial):
+    """One session demand per weekly hour: (session_course, session_kind, course_offsets)"""
+    hours = theory + lab + tutorial
+    offsets = np.zeros(len(hours) + 1, dtype=np.int64)
+    np.cumsum(hours, out=offsets[1:])
+    session_course = np.repeat(np.arange(len(hours), dtype=np.int32), hours)
+    # Position of each session within its course decides its kind: theory, then lab, then tutorial
+    within = np.arange(offsets[-1]) - offsets[session_course]
+    session_kind = np.where(within < theory[session_course], THEORY,
+                            np.where(within < (theory + lab)[session_course], LAB, TUTORIAL)).astype(np.int8)
+    return session_course, session_kind, offsets
+
+
+def load_problem(courses, rooms=None, enrollments=None, grid=None):
+    """Build a ProblemInstance from generator, rule.py or new.py style tables.
+
+    ``courses`` may be nep2020_courses.csv, the per-programme files from
+    zip.py (a list of paths), a Parquet file or a DataFrame. Course ids from
+    the per-programme files restart at 1, so when ids repeat they are
+    qualified by programme (``FYUP:1``) and the enrollments are mapped the
+    same way.
+    """
+    df = read_table(courses)
+    n = len(df)
+    col = canonical_columns(df, COURSE_COLUMNS)
+
+    course_ids, qualified = course_keys(col, n)
+    theory = _ints(col['theory_hours'], n)
+    lab = _ints(col['lab_hours'], n)
+    tutorial = _ints(col['tutorial_hours'], n)
+    weekly = _ints(col['total_weekly_hours'], n, default=-1)
+    # Tables without an hour breakdown (new.py) fall back to total hours, or one session per course
+    no_split = (theory + lab + tutorial) == 0
+    theory = np.where(no_split, np.where(weekly > 0, weekly, 1), theory)
+    session_course, session_kind, offsets = expand_sessions(theory, lab, tutorial)
+
+    programme, programmes = _codes(col['programme'], n)
+    faculty_codes, faculty = _codes(col['faculty_assigned'], n)
+    course_type, course_types = _codes(col['course_type'], n)
+    cohort, cohorts = cohort_codes(col, n)
+
+    problem = ProblemInstance(
+        courses=df,
+        course_ids=course_ids, qualified_ids=qualified,
+        course_codes=col['course_code'].to_numpy() if col['course_code'] is not None else course_ids,
+        course_programme=programme, programmes=programmes,
+        course_cohort=np.asarray(cohort, dtype=np.int32), cohorts=cohorts,
+        course_type=course_type, course_types=course_types,
+        course_faculty=faculty_codes, faculty=faculty,
+        course_enrollment=_ints(col['enrollment'], n),
+        theory_hours=theory, lab_hours=lab, tutorial_hours=tutorial,
+        session_course=session_course, session_kind=session_kind, course_offsets=offsets,
+        grid=grid or TimeGrid.default(),
+        room_ids=None, room_type=None, room_types=[], room_capacity=None, room_building=None, buildings=[],
+        travel=None, clashes=None,
+    )
+    if rooms is not None:
+        attach_rooms(problem, rooms)
+    if enrollments is not None:
+        enrollments = enrollment_courses(read_table(enrollments), course_ids, qualified, programmes)
+        problem.clashes = ClashMatrix.from_enrollments(enrollments, course_ids=problem.course_ids)
+    return problem
+
+
+def attach_rooms(problem, rooms):
+    """Add room arrays (ids, type codes, capacity, building codes) and the building travel matrix to a problem"""
+    import pandas as pd
+    if isinstance(rooms, list) and rooms and isinstance(rooms[0], dict):
+        df = pd.DataFrame(rooms)  # generate_rooms() output
+    else:
+        df = read_table(rooms)
+    n = len(df)
+    col = canonical_columns(df, ROOM_COLUMNS)
+    problem.room_ids = col['room_id'].to_numpy() if col['room_id'] is not None else np.arange(1, n + 1)
+    problem.room_type, problem.room_types = _codes(col['room_type'], n)
+    problem.room_capacity = _ints(col['capacity'], n)
+    problem.room_building, problem.buildings = _codes(col['building'], n)
+    campus = building_campus(problem.room_building, col['campus'], len(problem.buildings)) \
+        if col['campus'] is not None else None
+    problem.travel = travel_matrix(problem.buildings, campus) if problem.buildings else None
+    return problem
@@ -0,0 +1,112 @@
+import numpy as np
+
+# Room classes, checked in this order (same rules as the generator's original room assignment):
+# lab courses/sessions -> labs, enrollment > 60 -> seminar halls, practicals -> lab or classroom,
+# everything else -> classroom or tutorial room. 'Lab' is the rule.py admin panel's lab type.
+LAB, LARGE, PRACTICAL, LECTURE = 0, 1, 2, 3
+ROOM_RULES = {
+    LAB: ('Laboratory', 'Computer Lab', 'Lab'),
+    LARGE: ('Seminar Hall',),
+    PRACTICAL: ('Laboratory', 'Classroom', 'Lab'),
+    LECTURE: ('Classroom', 'Tutorial Room'),
+}
+LARGE_ENROLLMENT = 60
+
+
+def room_class(course_type, enrollment, lab=None):
+    """Rule class per course; `lab` (bool array) forces LAB, e.g. for the lab sessions of a course"""
+    course_type = np.asarray(course_type, dtype=object)
+    enrollment = np.asarray(enrollment)
+    is_lab = course_type == 'Lab' if lab is None else (course_type == 'Lab') | np.asarray(lab, dtype=bool)
+    return np.select([is_lab, enrollment > LARGE_ENROLLMENT, course_type == 'Practical'],
+                     [LAB, LARGE, PRACTICAL], default=LECTURE).astype(np.int8)
+
+
+class RoomFeasibility:
+    """Which rooms each demand (course or session) may use: room type rule and capacity >= enrollment.
+
+    The course x room mask is implied rather than stored: the rooms of each
+    class are kept largest first, so the feasible rooms of a demand are the
+    first ``count[i]`` entries of its class's list, starting at ``start[i]``.
+    Building it is a sort and a searchsorted; ``mask()`` materializes the
+    boolean matrix when needed.
+    """
+
+    def __init__(self, demand_class, enrollment, room_type=None, capacity=None):
+        self.demand_class = np.asarray(demand_class, dtype=np.int64)
+        self.enrollment = np.asarray(enrollment, dtype=np.int64)
+        n_rooms = len(room_type) if room_type is not None else len(capacity)
+        self.capacity = (np.asarray(capacity, dtype=np.int64) if capacity is not None
+                         else np.full(n_rooms, np.iinfo(np.int32).max, dtype=np.int64))
+        if room_type is None:  # no room types known: only capacity applies
+            self.type_ok = np.ones((len(ROOM_RULES), n_rooms), dtype=bool)
+        else:
+            room_type = np.asarray(room_type, dtype=object)
+            self.type_ok = np.stack([np.isin(room_type, ROOM_RULES[k]) for k in range(len(ROOM_RULES))])
+
+        # Rooms grouped by class, largest first: sort key class * big - capacity
+        big = int(self.capacity.max(initial=0)) + int(self.enrollment.max(initial=0)) + 1
+        room_cls, rooms = np.nonzero(self.type_ok)
+        keys = room_cls * big - self.capacity[rooms]
+        order = np.argsort(keys, kind='stable')
+        self.room_order = rooms[order]
+        self.class_offsets = np.searchsorted(room_cls[order], np.arange(len(ROOM_RULES) + 1))
+        # Feasible rooms: entries of the demand's class with capacity >= enrollment (key <= class * big - enrollment)
+        self.start = self.class_offsets[self.demand_class]
+        end = np.searchsorted(keys[order], self.demand_class * big - self.enrollment, side='right')
+        self.count = np.maximum(end - self.start, 0)
+
+    @classmethod
+    def from_records(cls, courses, rooms):
+        """From generator dicts (course_type, enrollment / room_type, capacity)"""
+        demand_class = room_class([c['course_type'] for c in courses], [c['enrollment'] for c in courses])
+        return cls(demand_class, [c['enrollment'] for c in courses], [r['room_type'] for r in rooms],
+                   [r['capacity'] for r in rooms])
+
+    @classmethod
+    def from_problem(cls, problem, layout=None):
+        """Per course of a ProblemInstance, or per gene of a SessionLayout (lab genes need labs)"""
+        course_type = (np.array(problem.course_types + [None], dtype=object)[problem.course_type]
+                       if problem.course_types else np.full(problem.n_courses, None, dtype=object))
+        enrollment = problem.course_enrollment
+        lab = None
+        if layout is not None:
+            from problem import LAB as LAB_SESSION
+            course_type, enrollment = course_type[layout.gene_course], enrollment[layout.gene_course]
+            lab = layout.gene_kind == LAB_SESSION
+        room_type = None
+        if problem.room_types:
+            room_type = np.array(problem.room_types + [None], dtype=object)[problem.room_type]
+        return cls(room_class(course_type, enrollment, lab), enrollment, room_type, problem.room_capacity)
+
+    @property
+    def n_rooms(self):
+        return len(self.capacity)
+
+    @property
+    def infeasible(self):
+        """Demands with no feasible room"""
+        return np.flatnonzero(self.count == 0)
+
+    def choices(self, i):
+        """Feasible room indices of demand i, largest first"""
+        return self.room_order[self.start[i]:self.start[i] + self.count[i]]
+
+    def mask(self, packed=False):
+        """Boolean demand x room matrix (np.packbits along rooms with packed=True)"""
+        mask = self.type_ok[self.demand_class] & (self.capacity[None, :] >= self.enrollment[:, None])
+        return np.packbits(mask, axis=1) if packed else mask
+
+    def feasible(self, demands, rooms):
+        """Whether room rooms[k] is feasible for demand demands[k]"""
+        demands, rooms = np.asarray(demands), np.asarray(rooms)
+        return self.type_ok[self.demand_class[demands], rooms] & (self.capacity[rooms] >= self.enrollment[demands])
+
+    def sample(self, demands, rng):
+        """One uniformly random feasible room per demand; any room when a demand has none"""
+        demands = np.asarray(demands)
+        count = self.count[demands]
+        pick = self.start[demands] + (rng.random(len(demands)) * count).astype(np.int64)
+        rooms = self.room_order[np.minimum(pick, max(len(self.room_order) - 1, 0))] if len(self.room_order) \
+            else np.zeros(len(demands), dtype=np.int64)
+        return np.where(count > 0, rooms, rng.integers(0, max(self.n_rooms, 1), len(demands)))
@@ -1,27 +1,66 @@
 import streamlit as st
+import json
 import pandas as pd
 import numpy as np
 import random
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+
+from availability import TeacherCalendar
+from data_import import load_uploads
+from entity_store import EntityStore
+from fitness_cache import FitnessCache
+from ga_controls import ConvergenceMonitor, RunControls
+from incremental import (changed_assignments, changed_entities, seed_population, session_key, snapshot_entities,
+                         warm_start)
+from instrumentation import PROFILERS, Instruments, Profile, count, recording, show_summary, timed, timer
+from room_feasibility import RoomFeasibility, room_class
+from soft_constraints import SoftConstraints
+from solver_jobs import SolverJob
+from store import TimetableStore
+from time_grid import TimeGrid
+from timetable_diff import diff, show_changes
+from timetable_query import TimetableIndex, show_query
+from travel import BREAK_MINUTES, building_campus, travel_matrix
 
 # ----- DATA STORAGE -----
-# For simplicity, use session state to store data temporarily
+# For simplicity, use session state to store data temporarily.
+# Entity tables are EntityStores: inserts are O(1) appends, .frame() materializes the DataFrame.
+# Initialized from main() so the GA functions can be imported without a Streamlit session.
+# Entities, solver runs and the last timetable persist in a SQLite store (store.py), so a restart keeps them.
 
-if 'teachers' not in st.session_state:
-    st.session_state.teachers = pd.DataFrame(columns=['TeacherID', 'Name', 'Expertise', 'MaxLoad', 'Availability'])
+ENTITY_COLUMNS = {
+    'teachers': ['TeacherID', 'Name', 'Expertise', 'MaxLoad', 'Availability'],
+    'courses': ['CourseID', 'Name', 'Credits', 'TheoryHours', 'PracticalHours'],
+    'rooms': ['RoomID', 'Capacity', 'Type', 'Building', 'Campus'],
+    'students': ['StudentID', 'Name', 'Program', 'EnrolledCourses'],
+}
+STORE_TABLES = {'teachers': 'faculty', 'courses': 'courses', 'rooms': 'rooms', 'students': 'students'}
 
-if 'courses' not in st.session_state:
-    st.session_state.courses = pd.DataFrame(columns=['CourseID', 'Name', 'Credits', 'TheoryHours', 'PracticalHours'])
+@st.cache_resource
+def open_store():
+    # One connection per server process, shared by every session
+    return TimetableStore()
 
-if 'rooms' not in st.session_state:
-    st.session_state.rooms = pd.DataFrame(columns=['RoomID', 'Capacity', 'Type'])
+def init_state():
+    store = open_store()
+    for entity, columns in ENTITY_COLUMNS.items():
+        if entity not in st.session_state:
+            saved = store.load_table(STORE_TABLES[entity])
+            st.session_state[entity] = EntityStore.from_frame(saved) if saved is not None and not saved.empty \
+                else EntityStore(columns)
 
-if 'students' not in st.session_state:
-    st.session_state.students = pd.DataFrame(columns=['StudentID', 'Name', 'Program', 'EnrolledCourses'])
+    if 'last_solution' not in st.session_state:
+        saved = store.latest_solution('rule.py')
+        if saved is not None and saved['snapshot'] is not None:
+            st.session_state.last_solution = {'timetable': saved['timetable'], 'snapshot': saved['snapshot'],
+                                              'trace': saved['trace']}
 
-if 'time_slots' not in st.session_state:
-    st.session_state.time_slots = ['Mon-9AM','Mon-11AM','Mon-2PM','Tue-9AM','Tue-11AM', 'Tue-2PM',
-                                  'Wed-9AM','Wed-11AM','Wed-2PM','Thu-9AM','Thu-11AM','Thu-2PM',
-                                  'Fri-9AM','Fri-11AM','Fri-2PM']
+    if 'time_slots' not in st.session_state:
+        st.session_state.time_slots = ['Mon-9AM','Mon-11AM','Mon-2PM','Tue-9AM','Tue-11AM', 'Tue-2PM',
+                                      'Wed-9AM','Wed-11AM','Wed-2PM','Thu-9AM','Thu-11AM','Thu-2PM',
+                                      'Fri-9AM','Fri-11AM','Fri-2PM']
 
 # ----- ADMIN PANEL FOR DATA INPUT -----
 def admin_panel():
@@ -32,28 +71,24 @@ def admin_panel():
     if menu == 'Import Data':
         st.subheader("Import Teachers, Courses, Rooms, Students")
         uploaded_files = st.file_uploader("Upload CSV or Excel files (Teachers, Courses, Rooms, Students)", accept_multiple_files=True)
-        for file in uploaded_files:
-            try:
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file)
-                if 'TeacherID' in df.columns:
-                    st.session_state.teachers = df
-                    st.success(f'Teachers loaded: {len(df)}')
-                elif 'CourseID' in df.columns:
-                    st.session_state.courses = df
-                    st.success(f'Courses loaded: {len(df)}')
-                elif 'RoomID' in df.columns:
-                    st.session_state.rooms = df
-                    st.success(f'Rooms loaded: {len(df)}')
-                elif 'StudentID' in df.columns:
-                    st.session_state.students = df
-                    st.success(f'Students loaded: {len(df)}')
-                else:
-                    st.warning(f'Unknown file type: {file.name}')
-            except Exception as e:
-                st.error(f'Failed to load {file.name}: {e}')
+        # Parsed frames are cached by content hash, so reruns do not re-parse unchanged uploads
+        for result in load_uploads(uploaded_files, candidates=['teachers', 'courses', 'rooms', 'students']):
+            name, df, entity = result['name'], result['frame'], result['entity']
+            if df is None:
+                st.error(f"Failed to load {name}: {'; '.join(result['errors'])}")
+                continue
+            if entity is None:
+                st.warning(f'Unknown file type: {name}')
+                continue
+            for error in result['errors']:
+                st.warning(f'{name}: {error}')
+            # Only replace the table when the upload changed, so later Add actions are kept
+            # Keyed on the content hash: a re-parse of the same file (cache eviction) is not a new upload
+            if st.session_state.get(f'{entity}_source') != result['digest']:
+                open_store().save_table(STORE_TABLES[entity], df)
+                st.session_state[entity] = EntityStore.from_frame(df)
+                st.session_state[f'{entity}_source'] = result['digest']
+            st.success(f'{entity.title()} loaded: {len(df)}')
 
     elif menu == 'Add Teacher':
         st.subheader("Add Teacher")
@@ -65,7 +100,7 @@ def admin_panel():
         if st.button("Add Teacher"):
             new_teacher = {'TeacherID': tid, 'Name': name, 'Expertise': expertise,
                            'MaxLoad': max_load, 'Availability': [a.strip() for a in availability.split(',')]}
-            st.session_state.teachers = st.session_state.teachers.append(new_teacher, ignore_index=True)
+            add_entity('teachers', new_teacher)
             st.success(f"Teacher {name} added.")
 
     elif menu == 'Add Course':
@@ -78,7 +113,7 @@ def admin_panel():
         if st.button("Add Course"):
             new_course = {'CourseID': cid, 'Name': cname, 'Credits': credits,
                           'TheoryHours': theory, 'PracticalHours': practical}
-            st.session_state.courses = st.session_state.courses.append(new_course, ignore_index=True)
+            add_entity('courses', new_course)
             st.success(f"Course {cname} added.")
 
     elif menu == 'Add Room':
@@ -86,9 +121,13 @@ def admin_panel():
         rid = st.text_input("Room ID")
         capacity = st.number_input("Room Capacity", min_value=5, max_value=200, value=40)
         typ = st.selectbox("Room Type", ['Classroom', 'Lab'])
+        # Building and campus feed the travel-time soft constraint; blank means not known
+        building = st.text_input("Building (e.g. Science Block)")
+        campus = st.text_input("Campus (leave blank for a single campus)")
         if st.button("Add Room"):
-            new_room = {'RoomID': rid, 'Capacity': capacity, 'Type': typ}
-            st.session_state.rooms = st.session_state.rooms.append(new_room, ignore_index=True)
+            new_room = {'RoomID': rid, 'Capacity': capacity, 'Type': typ,
+                        'Building': building.strip() or None, 'Campus': campus.strip() or None}
+            add_entity('rooms', new_room)
             st.success(f"Room {rid} added.")
 
     elif menu == 'Add Student':
@@ -100,79 +139,460 @@ def admin_panel():
         if st.button("Add Student"):
             new_student = {'StudentID': sid, 'Name': sname, 'Program': program,
                            'EnrolledCourses': [c.strip() for c in enrolled_courses.split(',')]}
-            st.session_state.students = st.session_state.students.append(new_student, ignore_index=True)
+            add_entity('students', new_student)
             st.success(f"Student {sname} added.")
 
+def add_entity(entity, record):
+    # Store first: if the write fails, the session still matches what a restart would load
+    open_store().append_rows(STORE_TABLES[entity], [record], st.session_state[entity].columns)
+    st.session_state[entity].append(record)
+
 # ----- GENETIC ALGORITHM ENGINE (Very simplified skeleton) -----
-def fitness_function(timetable):
-    # Placeholder: Calculate fitness considering hard and soft constraints
-    # e.g. count conflicts, room capacity violations, faculty overload, gaps
+def _as_list(value):
+    # Session-state rows hold lists; imported CSV rows hold comma-separated strings
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    return []
+
+def enrollment_pairs(students):
+    """Students table as (student_id, course_id) rows for the timetable lookup"""
+    return pd.DataFrame([(sid, cid) for sid, enrolled in zip(students['StudentID'], students['EnrolledCourses'])
+                         for cid in _as_list(enrolled)], columns=['student_id', 'course_id'])
+
+@timed()
+def build_fitness_context(courses, timeslots, rooms, teachers, students=None, weights=None,
+                          break_minutes=BREAK_MINUTES):
+    # One-time integer encoding of the entities so fitness never does string work per gene
+    grid = TimeGrid.from_labels(timeslots)
+    course_pos = {cid: i for i, cid in enumerate(courses['CourseID'])}
+    teacher_pos = {tid: i for i, tid in enumerate(teachers['TeacherID'])}
+    room_pos = {rid: i for i, rid in enumerate(rooms['RoomID'])}
+    buildings = rooms['Building'] if 'Building' in rooms.columns else pd.Series([None] * len(rooms))
+    building_codes, building_names = pd.factorize(buildings)  # missing building -> -1
+    room_building = dict(zip(rooms['RoomID'], building_codes))
+    campus = building_campus(building_codes, rooms['Campus'], len(building_names)) \
+        if 'Campus' in rooms.columns else None
+    travel = travel_matrix(list(building_names), campus) if len(building_names) else None
+    shift_col = 'Shift' if 'Shift' in courses.columns else None
+    course_shift = np.array([{'Morning': 0, 'Afternoon': 1}.get(v, -1) for v in courses[shift_col]]
+                            if shift_col else [-1] * len(courses), dtype=np.int64)
+
+    # Course -> attending students as CSR (each student is a gap/building-change entity)
+    members = [[] for _ in range(len(courses))]
+    n_students = 0
+    if students is not None and not students.empty:
+        for s_idx, enrolled in enumerate(students['EnrolledCourses']):
+            for cid in _as_list(enrolled):
+                if cid in course_pos:
+                    members[course_pos[cid]].append(s_idx)
+        n_students = len(students)
+    indptr = np.zeros(len(courses) + 1, dtype=np.int64)
+    np.cumsum([len(m) for m in members], out=indptr[1:])
+    indices = np.array([s for m in members for s in m], dtype=np.int64)
+
+    engine = SoftConstraints(grid, weights=weights, course_groups=(indptr, indices), n_groups=n_students,
+                             n_faculty=len(teachers), travel=travel, break_minutes=break_minutes)
+    return {'grid': grid, 'course_pos': course_pos, 'teacher_pos': teacher_pos, 'room_pos': room_pos,
+            'room_building': room_building, 'course_shift': course_shift, 'soft': engine,
+            'room_options': build_room_options(courses, rooms, np.diff(indptr)),
+            'calendar': TeacherCalendar.from_teachers(teachers, grid)}
+
+def build_room_options(courses, rooms, enrolled):
+    # Feasible RoomIDs per (CourseID, is lab session): labs for practical blocks, classrooms otherwise,
+    # capacity >= enrolled students. Built once with RoomFeasibility; genes only sample from these lists.
+    n = len(courses)
+    is_lab = np.repeat([False, True], n)
+    demand = np.tile(enrolled, 2)
+    room_type = rooms['Type'].to_numpy() if 'Type' in rooms.columns else None
+    capacity = pd.to_numeric(rooms.get('Capacity', pd.Series(index=rooms.index, dtype=float)), errors='coerce')
+    capacity = capacity.fillna(np.iinfo(np.int32).max).to_numpy()  # unknown capacity fits everyone
+    feasibility = RoomFeasibility(room_class(np.full(2 * n, None), demand, is_lab), demand, room_type, capacity)
+    room_ids = rooms['RoomID'].to_numpy()
+    return {(cid, lab): room_ids[feasibility.choices(i + lab * n)].tolist()
+            for lab in (False, True) for i, cid in enumerate(courses['CourseID'])}
+
+def random_room(gene, options, room_ids):
+    return random.choice(options.get((gene['CourseID'], gene.get('Kind') == 'Lab')) or room_ids)
+
+def random_teacher(gene, calendar, load=None):
+    # A teacher free for the gene's whole block and under MaxLoad; `load` holds the individual's running counters
+    length = gene.get('Length', 1)
+    t = calendar.choose(calendar.slot_index.get(gene['Time'], -1), length, load)
+    if load is not None:
+        load[t] += length
+    return calendar.ids[t]
+
+@timed()
+def encode_timetable(timetable, context):
+    """Integer arrays with one row per occupied period (a 2-period lab gene gives two rows)"""
+    grid = context['grid']
+    course = np.array([context['course_pos'].get(g['CourseID'], -1) for g in timetable], dtype=np.int64)
+    day, start = grid.index_labels([g['Time'] for g in timetable])
+    length = np.array([g.get('Length', 1) for g in timetable], dtype=np.int64)
+    gene = np.repeat(np.arange(len(timetable)), length)
+    offset = np.arange(len(gene)) - np.repeat(np.cumsum(length) - length, length)
+    period = start[gene] + offset
+    overflow = (start[gene] < 0) | (period >= grid.n_periods)
+    faculty = np.array([context['teacher_pos'].get(g['Teacher'], -1) for g in timetable], dtype=np.int64)
+    room = np.array([context['room_pos'].get(g['Room'], -1) for g in timetable], dtype=np.int64)
+    building = np.array([context['room_building'].get(g['Room'], -1) for g in timetable], dtype=np.int64)
+    return {
+        'gene': gene,
+        'course': course[gene],
+        'day': np.where(overflow, -1, day[gene]),
+        'period': np.where(overflow, -1, period),
+        'faculty': faculty[gene],
+        'room': room[gene],
+        'building': building[gene],
+        'block': np.where(length[gene] > 1, gene, -1),
+        'shift_pref': np.where(course[gene] >= 0, context['course_shift'][course[gene]], -1),
+        'gene_course': course,
+        'gene_day': day,
+        'overflow': int(((start >= 0) & (start + length > grid.n_periods)).sum()),
+    }
+
+def soft_penalty(timetable, context):
+    """Weighted soft penalty, per-constraint violations and per-kernel seconds"""
+    return context['soft'].evaluate(encode_timetable(timetable, context))
+
+HARD_WEIGHT = 10  # one double booking outweighs any realistic soft trade-off
+STABILITY_WEIGHT = 0.5  # per assignment moved away from the previous timetable (incremental re-solve)
+
+def _double_bookings(resource, slot):
+    # Extra bookings beyond the first for each (resource, slot) pair
+    ok = (resource >= 0) & (slot >= 0)
+    pairs = resource[ok] * (slot.max() + 1) + slot[ok]
+    return int(len(pairs) - len(np.unique(pairs)))
+
+def hard_violations(timetable, context):
+    """Teacher and room double bookings, two sessions of a course on one day, labs past the day end,
+    periods outside the teacher's availability and periods above their MaxLoad"""
+    sched = encode_timetable(timetable, context)
+    slot = np.where(sched['day'] >= 0, context['grid'].slot(sched['day'], sched['period']), -1)
+    violations = (_double_bookings(sched['faculty'], slot) + _double_bookings(sched['room'], slot) +
+                  _double_bookings(sched['gene_course'], sched['gene_day']) + sched['overflow'])
+    calendar = context.get('calendar')
+    if calendar is not None:
+        load = calendar.loads(sched['faculty'])
+        violations += calendar.unavailable(sched['faculty'], slot) + calendar.overload(load)
+    return violations
+
+def fitness_function(timetable, context=None):
     fitness = 100  # Higher better
-    # Penalize conflicts and violations (decrease fitness)
-    return fitness
+    if context is None:
+        return fitness
+    fitness -= HARD_WEIGHT * hard_violations(timetable, context)
+    # Soft constraints: student gaps, faculty daily load, lab contiguity, shift preference, building changes,
+    # travel time between back-to-back buildings
+    penalty, _, _ = soft_penalty(timetable, context)
+    if context.get('previous'):
+        # Minimal-change re-solve: prefer timetables close to the last published one
+        penalty += STABILITY_WEIGHT * changed_assignments(timetable, context['previous'])
+    return fitness - penalty
+
+def course_sessions(courses):
+    """One entry per weekly session: each theory hour alone, practical hours as one contiguous lab block"""
+    theory = pd.to_numeric(courses['TheoryHours'], errors='coerce').fillna(0).astype(int) \
+        if 'TheoryHours' in courses.columns else pd.Series(1, index=courses.index)
+    practical = pd.to_numeric(courses['PracticalHours'], errors='coerce').fillna(0).astype(int) \
+        if 'PracticalHours' in courses.columns else pd.Series(0, index=courses.index)
+    sessions = []
+    for cid, n_theory, n_practical in zip(courses['CourseID'], theory, practical):
+        lengths = [1] * n_theory + ([n_practical] if n_practical > 0 else [])
+        for number, length in enumerate(lengths or [1], start=1):
+            kind = 'Lab' if number > n_theory else 'Theory'
+            sessions.append({'CourseID': cid, 'Session': number, 'Length': length, 'Kind': kind})
+    return sessions
+
+@lru_cache(maxsize=32)
+def session_starts(timeslots, length):
+    """Start labels per day at which a block of `length` periods fits (timeslots as a tuple)"""
+    grid = TimeGrid.from_labels(timeslots)
+    day, period = grid.index_labels(timeslots)
+    starts = {}
+    for label, d, p in zip(timeslots, day, period):
+        if p + length <= grid.n_periods:
+            starts.setdefault(int(d), []).append(label)
+    return starts
+
+def random_start(timeslots, length, day=None):
+    starts = session_starts(tuple(timeslots), length) or session_starts(tuple(timeslots), 1)
+    return random.choice(starts.get(day) or random.choice(list(starts.values())))
 
-def initial_population(pop_size, courses, timeslots, rooms, teachers):
+@timed()
+def initial_population(pop_size, courses, timeslots, rooms, teachers, room_options=None, calendar=None):
     population = []
+    sessions = course_sessions(courses)
+    n_days = TimeGrid.from_labels(timeslots).n_days
+    room_ids, teacher_ids = rooms['RoomID'].tolist(), teachers['TeacherID'].tolist()
     for _ in range(pop_size):
         timetable = []
-        # Random assignment for each course - simplistic
-        for idx, course in courses.iterrows():
-            slot = random.choice(timeslots)
-            room = random.choice(rooms['RoomID'].tolist())
-            teacher = random.choice(teachers['TeacherID'].tolist())
-            timetable.append({'CourseID': course['CourseID'], 'Time': slot, 'Room': room, 'Teacher': teacher})
+        # Random assignment for each session; the sessions of a course start on different days
+        days = {}
+        load = np.zeros(calendar.n_teachers) if calendar is not None else None
+        for session in sessions:
+            order = days.setdefault(session['CourseID'], random.sample(range(n_days), n_days))
+            day = order[(session['Session'] - 1) % n_days]
+            gene = dict(session, Time=random_start(timeslots, session['Length'], day),
+                        Room=random_room(session, room_options or {}, room_ids))
+            gene['Teacher'] = random_teacher(gene, calendar, load) if calendar is not None \
+                else random.choice(teacher_ids)
+            timetable.append(gene)
         population.append(timetable)
     return population
 
 def crossover(parent1, parent2):
-    # One-point crossover example
+    # One-point crossover example; genes are copied so mutating the child leaves the elite parents intact
     pivot = len(parent1) // 2
-    child = parent1[:pivot] + parent2[pivot:]
+    child = [dict(gene) for gene in parent1[:pivot] + parent2[pivot:]]
     return child
 
-def mutate(timetable, timeslots, rooms, teachers, mutation_rate=0.1):
-    for gene in timetable:
+def mutate(timetable, timeslots, rooms, teachers, mutation_rate=0.1, frozen=None, room_options=None,
+           calendar=None):
+    room_ids = rooms['RoomID'].tolist()
+    if calendar is not None:
+        # Running per-teacher load of this child; a gene moved to a slot its teacher can't make is reassigned
+        teacher = [calendar.pos.get(gene['Teacher'], -1) for gene in timetable]
+        load = calendar.loads(teacher, [gene.get('Length', 1) for gene in timetable])
+    for pos, gene in enumerate(timetable):
+        if frozen and pos in frozen:
+            continue
+        moved = random.random() < mutation_rate
+        if moved:
+            gene['Time'] = random_start(timeslots, gene.get('Length', 1))
         if random.random() < mutation_rate:
-            gene['Time'] = random.choice(timeslots)
-        if random.random() < mutation_rate:
-            gene['Room'] = random.choice(rooms['RoomID'].tolist())
-        if random.random() < mutation_rate:
-            gene['Teacher'] = random.choice(teachers['TeacherID'].tolist())
+            gene['Room'] = random_room(gene, room_options or {}, room_ids)
+        if calendar is None:
+            if random.random() < mutation_rate:
+                gene['Teacher'] = random.choice(teachers['TeacherID'].tolist())
+            continue
+        t, length = teacher[pos], gene.get('Length', 1)
+        if random.random() < mutation_rate or \
+                (moved and not calendar.available(t, calendar.slot_index.get(gene['Time'], -1), length)):
+            if t >= 0:
+                load[t] -= length
+            gene['Teacher'] = random_teacher(gene, calendar, load)
     return timetable
 
-def genetic_algorithm(population, generations, courses, timeslots, rooms, teachers):
-    for gen in range(generations):
-        population = sorted(population, key=lambda x: fitness_function(x), reverse=True)
+def genetic_algorithm(population, generations, courses, timeslots, rooms, teachers, cache=None, context=None,
+                      monitor=None, frozen=None, progress=None, should_stop=None, checkpoint=None):
+    # Elites and duplicate children are scored once through the genome-hash cache
+    cache = cache if cache is not None else FitnessCache()
+    # Stops early on feasibility, stagnation or time budget and records the convergence trace
+    monitor = monitor if monitor is not None else ConvergenceMonitor(RunControls(max_generations=generations))
+    monitor.start()
+    # progress(dict) replaces per-generation st.write so the GA can run off the script thread
+    if progress is None:
+        progress = lambda update: st.write(f"Generation {update['generation']}: Best Fitness = "
+                                           f"{update['best']} ({update['cache']})")
+    # checkpoint keeps the population between runs so a cancelled solve can resume
+    checkpoint = checkpoint if checkpoint is not None else {}
+    population = checkpoint.get('population', population)
+    for gen in range(checkpoint.get('generation', 0), generations):
+        if should_stop is not None and should_stop():
+            monitor.trace.stop_reason = 'cancelled'
+            break
+        with timer('fitness'):
+            scores = [cache.score(x, fitness_function, context) for x in population]
+        with timer('selection'):
+            order = sorted(range(len(population)), key=scores.__getitem__, reverse=True)
+            population = [population[i] for i in order]
+        best_fit = scores[order[0]]
+        with timer('hard_violations'):
+            hard = hard_violations(population[0], context) if context is not None else None
+        count('generations')
+        reason = monitor.update(gen + 1, best_fit, float(np.mean(scores)), hard)
+        progress({'generation': gen + 1, 'best': best_fit, 'hard_violations': hard, 'elapsed': monitor.elapsed,
+                  'cache': cache.stats(), 'stop_reason': reason})
+        checkpoint.update(population=population, generation=gen + 1, best=population[0])
+        if reason:
+            break
         next_gen = population[:len(population)//2]  # Keep best half
         while len(next_gen) < len(population):
             parent1, parent2 = random.sample(next_gen, 2)
-            child = crossover(parent1, parent2)
-            child = mutate(child, timeslots, rooms, teachers)
+            with timer('crossover'):
+                child = crossover(parent1, parent2)
+            with timer('mutation'):
+                child = mutate(child, timeslots, rooms, teachers, mutation_rate=monitor.mutation_rate,
+                               frozen=frozen, room_options=context['room_options'] if context else None,
+                               calendar=context.get('calendar') if context else None)
             next_gen.append(child)
         population = next_gen
-        best_fit = fitness_function(population[0])
-        st.write(f"Generation {gen+1}: Best Fitness = {best_fit}")
-    return population[0]
+        checkpoint['population'] = population
+    return checkpoint.get('best', population[0])
 
 # ----- MAIN APP -----
 def main():
     st.title("AI/ML Timetable Generator - NEP 2020")
 
+    init_state()
     admin_panel()
 
+    with st.sidebar.expander("Run Controls"):
+        max_generations = st.number_input("Max Generations", min_value=1, max_value=1000, value=30)
+        time_budget = st.number_input("Time Budget (seconds, 0 = none)", min_value=0, max_value=3600, value=0)
+        stagnation = st.number_input("Stop After Generations Without Improvement (0 = never)",
+                                     min_value=0, max_value=500, value=10)
+        stop_when_feasible = st.checkbox("Stop When No Hard Violations", value=True)
+        adaptive = st.checkbox("Adaptive Mutation Rate", value=True)
+        profiler = st.selectbox("Profiler", ['off'] + PROFILERS,
+                                help="Capture a cProfile/pyinstrument report of the solve (slows it down)")
+        break_minutes = st.number_input("Changeover Break (minutes)", min_value=0, max_value=60,
+                                        value=BREAK_MINUTES,
+                                        help="Walks longer than this between back-to-back periods count as late")
+        incremental = st.checkbox("Incremental Re-solve (keep previous timetable)",
+                                  value='last_solution' in st.session_state,
+                                  disabled='last_solution' not in st.session_state)
+
     if st.sidebar.button("Generate Timetable"):
         if st.session_state.courses.empty or st.session_state.teachers.empty or st.session_state.rooms.empty:
             st.error("Please ensure you have added courses, teachers, and rooms.")
             return
-        population = initial_population(20, st.session_state.courses, st.session_state.time_slots,
-                                        st.session_state.rooms, st.session_state.teachers)
-        best_timetable = genetic_algorithm(population, 30, st.session_state.courses,
-                                           st.session_state.time_slots, st.session_state.rooms,
-                                           st.session_state.teachers)
-
-        st.subheader("Generated Timetable")
-        df = pd.DataFrame(best_timetable)
-        st.dataframe(df)
+        # Materialize the entity stores once for the whole solve
+        courses, time_slots = st.session_state.courses.frame(), st.session_state.time_slots
+        rooms, teachers = st.session_state.rooms.frame(), st.session_state.teachers.frame()
+        students = st.session_state.students.frame()
+        # Per-run stage timers; the solver thread records into the same registry
+        instruments = Instruments()
+        profile = Profile(profiler) if profiler != 'off' else None
+        with recording(instruments):
+            context = build_fitness_context(courses, time_slots, rooms, teachers, students,
+                                            break_minutes=break_minutes)
+        snapshot = snapshot_entities(courses, rooms, teachers)
+        frozen = None
+        if incremental and 'last_solution' in st.session_state:
+            # Warm start: keep the last timetable and only re-solve genes touched by the edits
+            last = st.session_state.last_solution
+            changes = changed_entities(last['snapshot'], snapshot)
+            room_ids = rooms['RoomID'].tolist()
+            pick_room = lambda gene: random_room(gene, context['room_options'], room_ids)
+            pick_teacher = lambda gene: random_teacher(gene, context['calendar'])
+            base, free = warm_start(last['timetable'], changes, course_sessions(courses), time_slots, rooms,
+                                    teachers, random_start, pick_room, pick_teacher)
+            frozen = set(range(len(base))) - free
+            context['previous'] = {session_key(gene): gene for gene in last['timetable']}
+            with recording(instruments):
+                population = seed_population(base, free, 20, time_slots, rooms, teachers, random_start, pick_room,
+                                             pick_teacher)
+            st.info(f"Incremental re-solve: {len(free)} of {len(base)} assignments open, "
+                    f"{len(frozen)} kept from the previous timetable.")
+        else:
+            with recording(instruments):
+                population = initial_population(20, courses, time_slots, rooms, teachers, context['room_options'],
+                                                context['calendar'])
+        controls = RunControls(max_generations=max_generations, time_budget=time_budget or None,
+                               stop_when_feasible=stop_when_feasible, stagnation_window=stagnation or None,
+                               adaptive_mutation=adaptive)
+        monitor = ConvergenceMonitor(controls)
+
+        def run(progress, should_stop, checkpoint):
+            with recording(instruments), profile or nullcontext():
+                return genetic_algorithm(population, max_generations, courses, time_slots, rooms, teachers,
+                                         cache=checkpoint.setdefault('cache', FitnessCache()), context=context,
+                                         monitor=monitor, frozen=frozen, progress=progress,
+                                         should_stop=should_stop, checkpoint=checkpoint)
+
+        run_id = open_store().start_run('rule.py', {'controls': controls.to_dict(), 'incremental': frozen is not None})
+        # The solve runs in a background thread; the job handle survives reruns in session state
+        st.session_state.solver_job = SolverJob(run).start()
+        st.session_state.solver_run = {'context': context, 'snapshot': snapshot, 'monitor': monitor,
+                                       'controls': controls, 'instruments': instruments, 'profile': profile,
+                                       'students': students, 'recorded': False, 'index': None, 'run_id': run_id}
+
+    show_solver_job()
+    show_saved()
+
+def show_solver_job():
+    if 'solver_job' not in st.session_state:
+        return
+    job, run = st.session_state.solver_job, st.session_state.solver_run
+
+    cancel_col, resume_col = st.columns(2)
+    if job.running and cancel_col.button("Cancel Solve"):
+        job.cancel()
+    if job.status == 'cancelled' and resume_col.button("Resume Solve"):
+        run['recorded'] = False
+        job.resume()
+
+    # Single element updated in place instead of one st.write per generation
+    status = st.empty()
+
+    def render(update):
+        if update:
+            status.info(f"{job.status.title()} · generation {update['generation']} · best fitness "
+                        f"{update['best']} · hard violations {update['hard_violations']} · "
+                        f"{update['elapsed']:.1f}s · {update['cache']}")
+        else:
+            status.info(f"{job.status.title()} · waiting for first generation")
+
+    while job.running:
+        render(job.poll())
+        time.sleep(0.25)
+    render(job.poll())
+
+    if job.error is not None:
+        if not run['recorded']:
+            open_store().finish_run(run['run_id'], 'failed', run['monitor'].trace, run['controls'])
+            run['recorded'] = True
+        st.error(f"Solver failed: {job.error}")
+        return
+    if job.result is None:
+        return
+    best_timetable, context, monitor = job.result, run['context'], run['monitor']
+    if not run['recorded']:
+        previous = st.session_state.get('last_solution')
+        run['changes'] = diff(pd.DataFrame(previous['timetable']), pd.DataFrame(best_timetable)) \
+            if previous is not None and previous['timetable'] else None
+        st.session_state.last_solution = {'timetable': best_timetable, 'snapshot': run['snapshot']}
+        store = open_store()
+        store.finish_run(run['run_id'], job.status, monitor.trace, run['controls'])
+        best = monitor.trace.generations[-1]['best'] if len(monitor.trace) else None
+        store.save_solution(best_timetable, run['run_id'], best, run['snapshot'])
+        run['recorded'] = True
+        run['index'] = None  # new (or resumed) result: rebuild the lookup index
+    if monitor.trace.stop_reason:
+        st.caption(f"Stopped: {monitor.trace.stop_reason}")
+    st.download_button("Download Convergence Trace (JSON)", monitor.trace.to_json(run['controls']),
+                       "convergence_trace.json")
+
+    st.subheader("Generated Timetable")
+    df = pd.DataFrame(best_timetable)
+    st.dataframe(df)
+    if run.get('changes') is not None:
+        show_changes(run['changes'])
+
+    # Built once per finished solve; reruns from the lookup widgets reuse it
+    if run.get('index') is None:
+        with run['instruments'].timer('query_index'):
+            run['index'] = TimetableIndex(df, enrollment_pairs(run['students']))
+    show_query(run['index'])
+
+    st.subheader("Soft Constraint Breakdown")
+    _, breakdown, _ = soft_penalty(best_timetable, context)
+    engine = context['soft']
+    st.dataframe(pd.DataFrame(
+        [{'Constraint': name, 'Violations': breakdown.get(name, 0), 'Weight': engine.weights[name],
+          'Total Seconds': secs, 'Seconds per Call': per_call}
+         for name, secs, per_call in engine.timing_report()]))
+
+    show_summary(run['instruments'], run['profile'])
+
+def show_saved():
+    """Timetable restored from the store (when nothing was solved this session) and the run history"""
+    store = open_store()
+    saved = st.session_state.get('last_solution')
+    if 'solver_job' not in st.session_state and saved is not None:
+        st.subheader("Last Saved Timetable")
+        st.dataframe(pd.DataFrame(saved['timetable']))
+        if saved.get('trace'):
+            st.download_button("Download Convergence Trace (JSON)", json.dumps(saved['trace'], indent=2),
+                               "convergence_trace.json")
+    history = store.run_history()
+    if not history.empty:
+        with st.expander("Run History"):
+            st.dataframe(history)
 
 if __name__ == "__main__":
     main()
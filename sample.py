@@ -1,12 +1,9 @@
-import pandas as pd
-import numpy as np
 import random
 from datetime import datetime
 import json
 
-# Set random seed for reproducibility
-random.seed(42)
-np.random.seed(42)
+from instrumentation import active, timer
+from room_feasibility import RoomFeasibility
 
 # Define programme structures according to NEP 2020
 PROGRAMMES = {
@@ -162,6 +159,8 @@ ROOMS = {
     'Conference Room': {'prefix': 'CONF', 'capacity_range': (10, 20), 'count': 20}
 }
 
+BUILDINGS = ['Main Building', 'Science Block', 'Commerce Block', 'Arts Block', 'Education Block']
+
 def generate_course_code(category, subject, programme, year, semester):
     """Generate course code based on NEP 2020 structure"""
     prog_code = PROGRAMMES[programme]['code_prefix']
@@ -170,8 +169,13 @@ def generate_course_code(category, subject, programme, year, semester):
     subject_code = ''.join([word[0] for word in subject.split()[:3]]).upper()
     return f"{prog_code}{category_code}{year_sem}{subject_code}"
 
-def generate_rooms():
-    """Generate room database"""
+def generate_rooms(campuses=1):
+    """Generate room database
+
+    With campuses > 1 every room type is spread over that many campuses:
+    rooms get a 'campus' column and buildings are named "<campus> - <block>"
+    so the travel matrix (travel.py) sees campus changes.
+    """
     rooms = []
     room_id = 1
     
@@ -179,12 +183,19 @@ def generate_rooms():
         for i in range(details['count']):
             room_number = f"{details['prefix']}-{i+1:03d}"
             capacity = random.randint(*details['capacity_range'])
+            building = random.choice(BUILDINGS)
+            campus = {}
+            if campuses > 1:
+                name = f"Campus {random.randint(1, campuses)}"
+                campus = {'campus': name}
+                building = f"{name} - {building}"
             rooms.append({
                 'room_id': room_id,
                 'room_number': room_number,
                 'room_type': room_type,
                 'capacity': capacity,
-                'building': random.choice(['Main Building', 'Science Block', 'Commerce Block', 'Arts Block', 'Education Block']),
+                'building': building,
+                **campus,
                 'floor': random.randint(1, 4),
                 'amenities': random.choice([
                     'Projector, Whiteboard',
@@ -313,23 +324,14 @@ def assign_rooms_to_courses(courses, rooms):
     """Assign appropriate rooms to courses"""
     course_room_assignments = []
     assignment_id = 1
+    # Room type rule (labs, seminar halls for > 60, ...) and capacity, evaluated once for all courses
+    feasibility = RoomFeasibility.from_records(courses, rooms)
     
-    for course in courses:
-        # Determine suitable room type
-        if course['course_type'] == 'Lab':
-            suitable_rooms = [r for r in rooms if r['room_type'] in ['Laboratory', 'Computer Lab']]
-        elif course['enrollment'] > 60:
-            suitable_rooms = [r for r in rooms if r['room_type'] == 'Seminar Hall']
-        elif course['course_type'] == 'Practical':
-            suitable_rooms = [r for r in rooms if r['room_type'] in ['Laboratory', 'Classroom']]
-        else:
-            suitable_rooms = [r for r in rooms if r['room_type'] in ['Classroom', 'Tutorial Room']]
-        
-        # Filter by capacity
-        suitable_rooms = [r for r in suitable_rooms if r['capacity'] >= course['enrollment']]
+    for i, course in enumerate(courses):
+        suitable_rooms = feasibility.choices(i)
         
-        if suitable_rooms:
-            assigned_room = random.choice(suitable_rooms)
+        if len(suitable_rooms):
+            assigned_room = rooms[random.choice(suitable_rooms)]
             course_room_assignments.append({
                 'assignment_id': assignment_id,
                 'course_id': course['course_id'],
@@ -412,15 +414,16 @@ def generate_timetable_schedule(courses, rooms, time_slots):
     """Generate actual timetable schedule"""
     schedule = []
     schedule_id = 1
+    feasibility = RoomFeasibility.from_records(courses[:500], rooms)
     
-    for course in courses[:500]:  # Limit to first 500 courses for timetable
+    for i, course in enumerate(courses[:500]):  # Limit to first 500 courses for timetable
         # Assign random time slots for each course
         weekly_hours = course['total_weekly_hours']
-        suitable_rooms = [r for r in rooms if r['capacity'] >= course['enrollment']]
-        if not suitable_rooms:
-            suitable_rooms = rooms[:10]  # Fallback to first 10 rooms
+        suitable_rooms = feasibility.choices(i)
+        if not len(suitable_rooms):
+            suitable_rooms = range(10)  # Fallback to first 10 rooms
         
-        assigned_room = random.choice(suitable_rooms)
+        assigned_room = rooms[random.choice(suitable_rooms)]
         
         for hour in range(weekly_hours):
             day = random.choice(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'])
@@ -440,73 +443,104 @@ def generate_timetable_schedule(courses, rooms, time_slots):
     
     return schedule
 
-# Generate all datasets
-print("Generating NEP 2020 University Timetable Dataset...")
-
-courses = generate_courses()
-rooms = generate_rooms()
-course_room_assignments = assign_rooms_to_courses(courses, rooms)
-time_slots = generate_time_slots()
-student_enrollments = generate_student_enrollments(courses)
-timetable_schedule = generate_timetable_schedule(courses, rooms, time_slots)
-
-# Create DataFrames
-courses_df = pd.DataFrame(courses)
-rooms_df = pd.DataFrame(rooms)
-assignments_df = pd.DataFrame(course_room_assignments)
-slots_df = pd.DataFrame(time_slots)
-enrollments_df = pd.DataFrame(student_enrollments)
-schedule_df = pd.DataFrame(timetable_schedule)
-
-# Create faculty dataset
-faculty_courses = courses_df.groupby('faculty_assigned').agg({
-    'course_id': 'count',
-    'total_weekly_hours': 'sum',
-    'enrollment': 'sum'
-}).rename(columns={
-    'course_id': 'total_courses',
-    'total_weekly_hours': 'total_teaching_hours',
-    'enrollment': 'total_students'
-}).reset_index()
-
-faculty_courses['faculty_id'] = range(1, len(faculty_courses) + 1)
-faculty_courses['department'] = [random.choice(['Education', 'Science', 'Commerce', 'Humanities', 'Skill Development']) for _ in range(len(faculty_courses))]
-faculty_courses['experience_years'] = [random.randint(2, 35) for _ in range(len(faculty_courses))]
-faculty_courses['qualification'] = [random.choice(['Ph.D.', 'M.Phil.', 'M.Ed.', 'M.Sc.', 'M.A.', 'M.Com.']) for _ in range(len(faculty_courses))]
-faculty_courses['specialization'] = [random.choice(['Curriculum Studies', 'Educational Psychology', 'Assessment', 'Technology Integration', 'Special Education', 'Subject Teaching']) for _ in range(len(faculty_courses))]
-faculty_courses = faculty_courses[['faculty_id', 'faculty_assigned', 'department', 'qualification', 'specialization', 'experience_years', 'total_courses', 'total_teaching_hours', 'total_students']]
-
-# Display summary statistics
-print(f"\n=== DATASET SUMMARY ===")
-print(f"Total Courses Generated: {len(courses)}")
-print(f"Total Faculty: {len(faculty_courses)}")
-print(f"Total Rooms: {len(rooms)}")
-print(f"Total Time Slots: {len(time_slots)}")
-print(f"Total Student Enrollments: {len(student_enrollments)}")
-print(f"Total Schedule Entries: {len(timetable_schedule)}")
-
-print(f"\n=== COURSES BY PROGRAMME ===")
-print(courses_df['programme'].value_counts())
-
-print(f"\n=== COURSES BY CATEGORY ===")
-print(courses_df['category'].value_counts())
-
-print(f"\n=== COURSES BY TYPE ===")
-print(courses_df['course_type'].value_counts())
-
-print(f"\n=== ROOM DISTRIBUTION ===")
-print(rooms_df['room_type'].value_counts())
-
-# Display sample data
-print(f"\n=== SAMPLE COURSES ===")
-print(courses_df[['course_code', 'course_name', 'category', 'programme', 'credits', 'faculty_assigned', 'enrollment']].head(10))
-
-print(f"\n=== SAMPLE ROOMS ===")
-print(rooms_df[['room_number', 'room_type', 'capacity', 'building']].head(10))
-
-print(f"\n=== SAMPLE FACULTY WORKLOAD ===")
-print(faculty_courses.head(10))
-
-# Save all datasets to CSV
-print(f"\nSaving datasets to CSV files...")
-courses_df.to_csv('nep2020_courses.csv', index=False)
\ No newline at end of file
+def save_to_store(path, courses_df, rooms_df, faculty_df, slots_df, enrollments_df):
+    """Bulk-load the generated tables into a TimetableStore (one executemany transaction per table)"""
+    from store import TimetableStore
+    store = TimetableStore(path)
+    students_df = enrollments_df[['student_id', 'student_name', 'programme']].drop_duplicates('student_id')
+    for name, frame in (('courses', courses_df), ('rooms', rooms_df), ('faculty', faculty_df),
+                        ('time_slots', slots_df), ('students', students_df), ('enrollments', enrollments_df)):
+        store.save_table(name, frame)
+    store.close()
+
+def main(db=None, campuses=1):
+    # The generators are pure Python; numpy/pandas are only needed here, so importing the module stays cheap
+    import numpy as np
+    import pandas as pd
+
+    # Set random seed for reproducibility
+    random.seed(42)
+    np.random.seed(42)
+
+    # Generate all datasets
+    print("Generating NEP 2020 University Timetable Dataset...")
+
+    # Each stage is timed; the per-stage table is printed at the end
+    with timer('generate_courses'):
+        courses = generate_courses()
+    with timer('generate_rooms'):
+        rooms = generate_rooms(campuses)
+    with timer('assign_rooms_to_courses'):
+        course_room_assignments = assign_rooms_to_courses(courses, rooms)
+    with timer('generate_time_slots'):
+        time_slots = generate_time_slots()
+    with timer('generate_student_enrollments'):
+        student_enrollments = generate_student_enrollments(courses)
+    with timer('generate_timetable_schedule'):
+        timetable_schedule = generate_timetable_schedule(courses, rooms, time_slots)
+
+    # Create DataFrames
+    with timer('build_dataframes'):
+        courses_df = pd.DataFrame(courses)
+        rooms_df = pd.DataFrame(rooms)
+        assignments_df = pd.DataFrame(course_room_assignments)
+        slots_df = pd.DataFrame(time_slots)
+        enrollments_df = pd.DataFrame(student_enrollments)
+        schedule_df = pd.DataFrame(timetable_schedule)
+
+    # Create faculty dataset
+    faculty_courses = courses_df.groupby('faculty_assigned').agg({
+        'course_id': 'count',
+        'total_weekly_hours': 'sum',
+        'enrollment': 'sum'
+    }).rename(columns={
+        'course_id': 'total_courses',
+        'total_weekly_hours': 'total_teaching_hours',
+        'enrollment': 'total_students'
+    }).reset_index()
+
+    faculty_courses['faculty_id'] = range(1, len(faculty_courses) + 1)
+    faculty_courses['department'] = [random.choice(['Education', 'Science', 'Commerce', 'Humanities', 'Skill Development']) for _ in range(len(faculty_courses))]
+    faculty_courses['experience_years'] = [random.randint(2, 35) for _ in range(len(faculty_courses))]
+    faculty_courses['qualification'] = [random.choice(['Ph.D.', 'M.Phil.', 'M.Ed.', 'M.Sc.', 'M.A.', 'M.Com.']) for _ in range(len(faculty_courses))]
+    faculty_courses['specialization'] = [random.choice(['Curriculum Studies', 'Educational Psychology', 'Assessment', 'Technology Integration', 'Special Education', 'Subject Teaching']) for _ in range(len(faculty_courses))]
+    faculty_courses = faculty_courses[['faculty_id', 'faculty_assigned', 'department', 'qualification', 'specialization', 'experience_years', 'total_courses', 'total_teaching_hours', 'total_students']]
+
+    # Display summary statistics
+    print(f"\n=== DATASET SUMMARY ===")
+    print(f"Total Courses Generated: {len(courses)}")
+    print(f"Total Faculty: {len(faculty_courses)}")
+    print(f"Total Rooms: {len(rooms)}")
+    print(f"Total Time Slots: {len(time_slots)}")
+    print(f"Total Student Enrollments: {len(student_enrollments)}")
+    print(f"Total Schedule Entries: {len(timetable_schedule)}")
+
+    # Distributions plus feasibility checks (room capacity, demand vs supply, faculty load, schedule collisions)
+    print(f"\n=== DATA QUALITY REPORT ===")
+    from data_report import dataset_report, print_report
+    from time_grid import TimeGrid
+    report = dataset_report(courses_df, rooms=rooms_df, schedule=schedule_df, grid=TimeGrid.from_slots(slots_df))
+    print_report(report)
+    with open('dataset_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+    # Save all datasets to CSV
+    print(f"\nSaving datasets to CSV files...")
+    with timer('save_csv'):
+        courses_df.to_csv('nep2020_courses.csv', index=False)
+    if db:
+        print(f"Saving all tables to {db}...")
+        with timer('save_store'):
+            save_to_store(db, courses_df, rooms_df, faculty_courses, slots_df, enrollments_df)
+
+    print(f"\n=== STAGE TIMINGS ===")
+    print(active().to_frame().to_string(index=False))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the NEP 2020 timetable dataset")
+    parser.add_argument('--db', help="also write every generated table to this SQLite store (see store.py)")
+    parser.add_argument('--campuses', type=int, default=1,
+                        help="spread the rooms over this many campuses (multi-campus travel instances)")
+    args = parser.parse_args()
+    main(args.db, args.campuses)
@@ -0,0 +1,185 @@
+import numpy as np
+
+from fitness_cache import FitnessCache
+from ga_controls import ConvergenceMonitor, RunControls
+from instrumentation import count, timed, timer
+from room_feasibility import RoomFeasibility
+from sessions import SessionLayout
+from soft_constraints import SoftConstraints
+from travel import BREAK_MINUTES
+
+KIND_NAMES = ['Theory', 'Lab', 'Tutorial']
+
+
+def _double_bookings(resource, slot):
+    # Extra bookings beyond the first for each (resource, slot) pair
+    ok = (resource >= 0) & (slot >= 0)
+    if not ok.any():
+        return 0
+    pairs = resource[ok].astype(np.int64) * (slot.max() + 1) + slot[ok]
+    return int(len(pairs) - len(np.unique(pairs)))
+
+
+def violations(problem, layout, slots, rooms=None):
+    """Hard-constraint violations of a session genome, by constraint"""
+    gene, day, period = layout.cells(slots)
+    cell_slot = np.where(period >= 0, layout.grid.slot(day, period), -1)
+    course = layout.gene_course[gene]
+    result = {
+        'faculty_clashes': _double_bookings(problem.course_faculty[course], cell_slot),
+        'room_clashes': _double_bookings(rooms[gene], cell_slot) if rooms is not None else 0,
+        'same_day_sessions': layout.same_day_violations(slots),
+        'split_lab_blocks': layout.overflow_violations(slots),
+        'student_clashes': 0,
+    }
+    if problem.clashes is not None:
+        ok = cell_slot >= 0
+        result['student_clashes'] = problem.clashes.penalty(course[ok], cell_slot[ok])
+    return result
+
+
+def fitness(genome, problem, layout, soft=None):
+    """Negated hard violations, less the ``soft`` engine's penalty squashed into [0, 1).
+
+    The soft term only orders genomes with the same number of hard
+    violations: no soft trade-off outweighs one double booking.
+    """
+    # genome is slots followed by rooms, so the fitness cache hashes one buffer
+    slots, rooms = genome[:layout.n_genes], genome[layout.n_genes:]
+    hard = float(sum(violations(problem, layout, slots, rooms if len(rooms) else None).values()))
+    if soft is None:
+        return -hard
+    penalty, _, _ = soft.evaluate(schedule_arrays(problem, layout, genome))
+    return -(hard + penalty / (1.0 + penalty))
+
+
+def hard_violations(score):
+    """Hard-violation count behind a fitness() score"""
+    return int(-score)
+
+
+def soft_penalty(score):
+    """Weighted soft penalty behind a fitness() score (0.0 for a score without a soft term)"""
+    squashed = -score - hard_violations(score)
+    return squashed / (1.0 - squashed)
+
+
+def random_genome(problem, layout, rng, feasibility=None):
+    # Rooms come from the gene's feasible set (type rule + capacity) when a RoomFeasibility is given
+    slots = layout.random_slots(rng)
+    if not problem.n_rooms:
+        rooms = np.empty(0, dtype=np.int64)
+    elif feasibility is not None:
+        rooms = feasibility.sample(np.arange(layout.n_genes), rng)
+    else:
+        rooms = rng.integers(0, problem.n_rooms, layout.n_genes)
+    return np.concatenate((slots, rooms))
+
+
+def mutate(genome, problem, layout, rate, rng, feasibility=None):
+    n = layout.n_genes
+    slots = layout.mutate(genome[:n], rate, rng)
+    rooms = genome[n:].copy()
+    if len(rooms):
+        hit = np.flatnonzero(rng.random(n) < rate)
+        rooms[hit] = feasibility.sample(hit, rng) if feasibility is not None \
+            else rng.integers(0, problem.n_rooms, len(hit))
+    return np.concatenate((slots, rooms))
+
+
+def crossover(parent1, parent2, layout, rng):
+    # Course-wise: a course keeps slots and rooms of all its sessions from one parent
+    take = rng.random(layout.n_courses) < 0.5
+    gene_take = take[layout.gene_course]
+    mask = np.concatenate((gene_take, gene_take[:len(parent1) - layout.n_genes]))
+    return np.where(mask, parent2, parent1)
+
+
+def genetic_algorithm(problem, population_size=50, generations=100, elite=10, seed=None, cache=None,
+                      monitor=None, progress=None, layout=None, soft=None):
+    """Session-level GA over a ProblemInstance; returns (best genome, layout).
+
+    ``soft`` is the SoftConstraints engine ranking equally feasible
+    genomes (default: soft_engine(problem), travel included).
+    """
+    rng = np.random.default_rng(seed)
+    layout = layout or SessionLayout.from_problem(problem)
+    soft = soft if soft is not None else soft_engine(problem)
+    cache = cache if cache is not None else FitnessCache(maxsize=4 * population_size)
+    monitor = monitor if monitor is not None else ConvergenceMonitor(RunControls(max_generations=generations))
+    monitor.start()
+    with timer('room_feasibility'):
+        feasibility = RoomFeasibility.from_problem(problem, layout) if problem.n_rooms else None
+    with timer('initial_population'):
+        population = [random_genome(problem, layout, rng, feasibility) for _ in range(population_size)]
+    for gen in range(generations):
+        with timer('fitness'):
+            scores = [cache.score(ind, fitness, problem, layout, soft) for ind in population]
+        with timer('selection'):
+            order = np.argsort(scores)[::-1]
+            population = [population[i] for i in order]
+        best = scores[order[0]]
+        count('generations')
+        reason = monitor.update(gen + 1, best, float(np.mean(scores)), hard_violations(best))
+        if progress is not None:
+            progress(f"Generation {gen+1}, Best Fitness: {best} ({cache.stats()})"
+                     + (f" - stopped: {reason}" if reason else ""))
+        if reason:
+            break
+        next_gen = population[:elite]
+        parents = population[:max(2 * elite, 2)]
+        while len(next_gen) < population_size:
+            i, j = rng.choice(len(parents), 2, replace=False)
+            with timer('crossover'):
+                child = crossover(parents[i], parents[j], layout, rng)
+            with timer('mutation'):
+                next_gen.append(mutate(child, problem, layout, monitor.mutation_rate, rng, feasibility))
+        population = next_gen
+    return population[0], layout
+
+
+def schedule_arrays(problem, layout, genome):
+    """Per-period arrays in the form SoftConstraints.evaluate expects"""
+    slots, rooms = genome[:layout.n_genes], genome[layout.n_genes:]
+    gene, day, period = layout.cells(slots)
+    course = layout.gene_course[gene]
+    building = problem.room_building[rooms[gene]] if len(rooms) and problem.room_building is not None \
+        else np.full(len(gene), -1)
+    return {
+        'course': course,
+        'day': np.where(period >= 0, day, -1),
+        'period': period,
+        'faculty': problem.course_faculty[course].astype(np.int64),
+        'building': building.astype(np.int64),
+        'block': np.where(layout.gene_length[gene] > 1, gene, -1),
+    }
+
+
+def soft_engine(problem, weights=None, break_minutes=BREAK_MINUTES):
+    """SoftConstraints with each course's cohort as its student group"""
+    course_groups = (np.arange(problem.n_courses + 1), problem.course_cohort.astype(np.int64))
+    return SoftConstraints(problem.grid, weights=weights, course_groups=course_groups,
+                           n_groups=problem.n_cohorts, n_faculty=problem.n_faculty,
+                           travel=getattr(problem, 'travel', None), break_minutes=break_minutes)
+
+
+@timed()
+def to_frame(problem, layout, genome):
+    """One row per session with readable ids, day and period labels"""
+    import pandas as pd  # lazy: the solver core imports without pandas
+    slots, rooms = genome[:layout.n_genes], genome[layout.n_genes:]
+    grid = layout.grid
+    day, period = grid.split(slots)
+    course = layout.gene_course
+    faculty = problem.course_faculty[course]
+    return pd.DataFrame({
+        'Course_ID': problem.course_ids[course],
+        'Course_Code': problem.course_codes[course],
+        'Session': layout.gene_rank + 1,
+        'Kind': np.array(KIND_NAMES)[layout.gene_kind],
+        'Day': np.array(grid.days)[day],
+        'Time_Slot': np.array(grid.periods)[period],
+        'Periods': layout.gene_length,
+        'Room': problem.room_ids[rooms] if len(rooms) else None,
+        'Faculty': np.where(faculty >= 0, np.array(problem.faculty + [None], dtype=object)[faculty], None),
+    })
@@ -0,0 +1,113 @@
+import numpy as np
+
+from problem import LAB, THEORY, TUTORIAL
+
+
+class SessionLayout:
+    """Gene layout for a session-level genome.
+
+    One gene per teaching session: every theory and tutorial hour is its
+    own single-period gene, and a course's lab hours form one gene that
+    occupies ``gene_length`` contiguous periods (the double lab period).
+    Genes are ordered by course and ``course_offsets[c]:course_offsets[c + 1]``
+    are the genes of course ``c``. A genome is an int array of start slots
+    (``day * n_periods + period``), one per gene.
+    """
+
+    def __init__(self, gene_course, gene_kind, gene_length, course_offsets, grid):
+        self.gene_course = gene_course
+        self.gene_kind = gene_kind
+        self.gene_length = gene_length
+        self.course_offsets = course_offsets
+        self.grid = grid
+        self.gene_rank = np.arange(len(gene_course)) - course_offsets[gene_course]  # position within course
+        # Expanded occupancy: one row per occupied period, pointing back at its gene
+        self.cell_gene = np.repeat(np.arange(len(gene_course)), gene_length)
+        self.cell_offset = np.arange(len(self.cell_gene)) - np.repeat(np.cumsum(gene_length) - gene_length,
+                                                                     gene_length)
+
+    @property
+    def n_genes(self):
+        return len(self.gene_course)
+
+    @property
+    def n_courses(self):
+        return len(self.course_offsets) - 1
+
+    @classmethod
+    def from_problem(cls, problem):
+        theory, lab, tutorial = problem.theory_hours, problem.lab_hours, problem.tutorial_hours
+        has_lab = (lab > 0).astype(np.int64)
+        genes_per_course = theory + has_lab + tutorial
+        offsets = np.zeros(problem.n_courses + 1, dtype=np.int64)
+        np.cumsum(genes_per_course, out=offsets[1:])
+        gene_course = np.repeat(np.arange(problem.n_courses, dtype=np.int64), genes_per_course)
+        rank = np.arange(offsets[-1]) - offsets[gene_course]
+        gene_kind = np.where(rank < theory[gene_course], THEORY,
+                             np.where(rank < (theory + has_lab)[gene_course], LAB, TUTORIAL)).astype(np.int8)
+        gene_length = np.where(gene_kind == LAB, np.maximum(lab[gene_course], 1), 1).astype(np.int64)
+        return cls(gene_course, gene_kind, gene_length, offsets, problem.grid)
+
+    def cells(self, slots):
+        """Occupied (gene, day, period) rows of a genome; block periods past the day end get period -1"""
+        grid = self.grid
+        day, start = grid.split(slots[self.cell_gene])
+        period = start + self.cell_offset
+        period = np.where(period < grid.n_periods, period, -1)
+        return self.cell_gene, day, period
+
+    def random_slots(self, rng):
+        """Random genome with distinct days for the genes of each course and blocks that fit the day"""
+        grid = self.grid
+        # Random day permutation per course; gene k of a course takes the k-th day of it
+        day_perm = np.argsort(rng.random((self.n_courses, grid.n_days)), axis=1)
+        rank = np.minimum(self.gene_rank, grid.n_days - 1)
+        day = day_perm[self.gene_course, rank]
+        extra = self.gene_rank >= grid.n_days  # more sessions than days: any day
+        day[extra] = rng.integers(0, grid.n_days, extra.sum())
+        period = rng.integers(0, np.maximum(grid.n_periods - self.gene_length + 1, 1))
+        return grid.slot(day, period)
+
+    def same_day_violations(self, slots):
+        """Genes sharing a day with an earlier gene of the same course"""
+        day = slots // self.grid.n_periods
+        keys = self.gene_course * self.grid.n_days + day
+        return int(len(keys) - len(np.unique(keys)))
+
+    def overflow_violations(self, slots):
+        """Blocks that run past the last period of their day"""
+        period = slots % self.grid.n_periods
+        return int((period + self.gene_length > self.grid.n_periods).sum())
+
+    def repair(self, slots, rng, rounds=3):
+        """Move genes off days already used by their course and pull blocks back inside the day"""
+        grid = self.grid
+        slots = slots.copy()
+        day, period = grid.split(slots)
+        period = np.minimum(period, np.maximum(grid.n_periods - self.gene_length, 0))
+        for _ in range(rounds):
+            keys = self.gene_course * grid.n_days + day
+            _, first = np.unique(keys, return_index=True)
+            dup = np.ones(len(keys), dtype=bool)
+            dup[first] = False
+            if not dup.any():
+                break
+            used = np.zeros((self.n_courses, grid.n_days), dtype=bool)
+            used[self.gene_course, day] = True
+            # Random free day for each duplicate (argmin over random keys, used days pushed last)
+            courses = self.gene_course[dup]
+            keys = rng.random((len(courses), grid.n_days)) + used[courses] * 2
+            day[dup] = keys.argmin(axis=1)
+        return grid.slot(day, period)
+
+    def mutate(self, slots, rate, rng):
+        """Re-draw the start slot of a random subset of genes, then repair"""
+        grid = self.grid
+        slots = slots.copy()
+        hit = rng.random(self.n_genes) < rate
+        n = int(hit.sum())
+        if n:
+            day = rng.integers(0, grid.n_days, n)
+            period = rng.integers(0, np.maximum(grid.n_periods - self.gene_length[hit] + 1, 1))
+            slots[hit] = grid.slot(day, period)
+        return self.repair(slots, rng)
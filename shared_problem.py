@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from clash_matrix import ClashMatrix
+from ga_controls import ConvergenceMonitor
+from problem import ProblemInstance
+import session_solver
+from sessions import SessionLayout
+from time_grid import TimeGrid
+
+# ProblemInstance attributes stored as one .npy file each; the course table itself stays in the parent
+ARRAYS = ['course_ids', 'course_codes', 'course_programme', 'course_cohort', 'course_type', 'course_faculty',
+          'course_enrollment', 'theory_hours', 'lab_hours', 'tutorial_hours', 'session_course', 'session_kind',
+          'course_offsets', 'room_ids', 'room_type', 'room_capacity', 'room_building', 'travel']
+LABELS = ['programmes', 'cohorts', 'course_types', 'faculty', 'room_types', 'buildings']
+
+
+def save_problem(problem, directory):
+    """Write the integer arrays of a ProblemInstance (and its clash matrix) as .npy files.
+
+    String arrays are stored as fixed-width unicode so every file loads
+    without pickle and can be memory-mapped.
+    """
+    os.makedirs(directory, exist_ok=True)
+    saved = []
+    for name in ARRAYS:
+        values = getattr(problem, name)
+        if values is None:
+            continue
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = values.astype(str)
+        np.save(os.path.join(directory, f'{name}.npy'), values, allow_pickle=False)
+        saved.append(name)
+    if problem.clashes is not None:
+        problem.clashes.save(os.path.join(directory, 'clashes'))
+    meta = {
+        'arrays': saved,
+        'labels': {name: [str(label) for label in getattr(problem, name)] for name in LABELS},
+        'grid': {'days': problem.grid.days, 'periods': problem.grid.periods},
+        'clashes': problem.clashes is not None,
+        'qualified_ids': bool(getattr(problem, 'qualified_ids', False)),
+    }
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return directory
+
+
+def open_problem(directory, mmap=True):
+    """ProblemInstance backed by the files from save_problem (read-only memory maps by default).
+
+    Every process that opens the same directory shares the page cache, so
+    attaching costs a few file opens rather than a copy of the data.
+    """
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    mode = 'r' if mmap else None
+    arrays = {name: None for name in ARRAYS}
+    for name in meta['arrays']:
+        arrays[name] = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode, allow_pickle=False)
+    clashes = ClashMatrix.load(os.path.join(directory, 'clashes'), mmap=mmap) if meta['clashes'] else None
+    return ProblemInstance(courses=None, grid=TimeGrid(**meta['grid']), clashes=clashes, **meta['labels'],
+                           qualified_ids=meta.get('qualified_ids', False), **arrays)
+
+
+# ----- WORKER PROCESSES -----
+_problem = None  # set once per worker by _attach
+_attach_seconds = 0.0
+_attach_rss_mb = None
+
+
+def _memory_mb():
+    """(RSS, PSS) of this process right now in MB; None where /proc is not available.
+
+    ru_maxrss is no use in a spawned worker: on Linux it carries the parent's
+    peak across fork and exec. PSS splits the shared problem maps between
+    the processes mapping them, so it adds up across workers.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return None, None
+    pss = None
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            pss = next((int(line.split()[1]) / 1024 for line in f if line.startswith('Pss:')), None)
+    except OSError:
+        pass
+    return rss, pss
+
+
+def _attach(directory):
+    global _problem, _attach_seconds, _attach_rss_mb
+    start = time.perf_counter()
+    _problem = open_problem(directory)
+    _attach_seconds = time.perf_counter() - start
+    _attach_rss_mb = _memory_mb()[0]
+
+
+def _island(seed, controls, ga_kwargs):
+    monitor = ConvergenceMonitor(controls) if controls is not None else None
+    genome, layout = session_solver.genetic_algorithm(_problem, seed=seed, monitor=monitor, **ga_kwargs)
+    rss, pss = _memory_mb()
+    return {
+        'genome': np.asarray(genome),
+        'fitness': session_solver.fitness(genome, _problem, layout, session_solver.soft_engine(_problem)),
+        'trace': monitor.trace if monitor is not None else None,
+        'attach_seconds': _attach_seconds,
+        'attach_rss_mb': _attach_rss_mb,
+        'rss_mb': rss,
+        'solve_mb': rss - _attach_rss_mb if rss is not None and _attach_rss_mb is not None else None,
+        'pss_mb': pss,
+        'pid': os.getpid(),
+    }
+
+
+def solve_parallel(problem, n_workers=2, seed=None, controls=None, directory=None, **ga_kwargs):
+    """Run independent session-GA islands in worker processes; return (best genome, layout, islands).
+
+    The problem is written once as .npy files and every worker memory-maps
+    them in its initializer, so nothing problem-sized is pickled. Workers
+    use the spawn start method: forking the threaded Streamlit server is
+    unsafe, and with shared files a fresh interpreter starts just as fast.
+    ``islands`` is one dict per worker with its fitness, convergence trace,
+    attach time, RSS after attaching and after the GA (``solve_mb`` is the
+    difference) and PSS.
+    """
+    cleanup = directory is None
+    directory = directory or tempfile.mkdtemp(prefix='timetable-problem-')
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_workers)]
+    try:
+        save_problem(problem, directory)
+        with ProcessPoolExecutor(n_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_attach, initargs=(directory,)) as pool:
+            islands = list(pool.map(_island, seeds, [controls] * n_workers, [ga_kwargs] * n_workers))
+    finally:
+        if cleanup:
+            shutil.rmtree(directory, ignore_errors=True)
+    best = max(islands, key=lambda island: island['fitness'])
+    return best['genome'], SessionLayout.from_problem(problem), islands
@@ -0,0 +1,188 @@
+import time
+
+import numpy as np
+
+from travel import BREAK_MINUTES
+
+# Default weight per soft constraint (penalty units per violation)
+DEFAULT_WEIGHTS = {
+    'student_gaps': 1.0,
+    'faculty_daily_load': 2.0,
+    'lab_contiguity': 3.0,
+    'shift_preference': 0.5,
+    'building_changes': 1.0,
+    'travel_time': 0.1,
+}
+
+
+# ----- PENALTY KERNELS -----
+# Every kernel works on flat per-session arrays and scatters them onto an
+# entity x day x period grid (or sorts along it); none loops over sessions.
+
+def occupancy(entity, day, period, n_entities, grid):
+    """Boolean entity x day x period grid of booked periods"""
+    occ = np.zeros((n_entities, grid.n_days, grid.n_periods), dtype=bool)
+    ok = (entity >= 0) & (day >= 0) & (period >= 0)
+    occ[entity[ok], day[ok], period[ok]] = True
+    return occ
+
+
+def idle_gap_penalty(entity, day, period, n_entities, grid):
+    """Free periods between an entity's first and last class of each day"""
+    occ = occupancy(entity, day, period, n_entities, grid)
+    booked = occ.sum(axis=2)
+    first = occ.argmax(axis=2)
+    last = grid.n_periods - 1 - occ[:, :, ::-1].argmax(axis=2)
+    gaps = np.where(booked > 0, last - first + 1 - booked, 0)
+    return int(gaps.sum())
+
+
+def daily_load_penalty(entity, day, n_entities, grid, max_daily):
+    """Sessions above max_daily per entity and day"""
+    ok = (entity >= 0) & (day >= 0)
+    load = np.bincount(entity[ok] * grid.n_days + day[ok], minlength=n_entities * grid.n_days)
+    return int(np.maximum(load - max_daily, 0).sum())
+
+
+def contiguity_penalty(block, day, period):
+    """Sessions of a block (e.g. a double lab period) that are split across days or periods"""
+    ok = block >= 0
+    if not ok.any():
+        return 0
+    block, day, period = block[ok], day[ok], period[ok]
+    _, block = np.unique(block, return_inverse=True)
+    n = block.max() + 1
+    size = np.bincount(block, minlength=n)
+    lo = np.full(n, np.iinfo(np.int64).max)
+    hi = np.full(n, np.iinfo(np.int64).min)
+    np.minimum.at(lo, block, period)
+    np.maximum.at(hi, block, period)
+    day_lo = np.full(n, np.iinfo(np.int64).max)
+    day_hi = np.full(n, np.iinfo(np.int64).min)
+    np.minimum.at(day_lo, block, day)
+    np.maximum.at(day_hi, block, day)
+    spread = np.maximum(hi - lo + 1 - size, 0)
+    split_days = np.where(day_lo != day_hi, size, 0)
+    return int((spread + split_days).sum())
+
+
+def shift_penalty(shift_pref, period, grid):
+    """Sessions placed outside their preferred morning/afternoon shift"""
+    ok = (shift_pref >= 0) & (period >= 0)
+    return int((grid.shift[period[ok]] != shift_pref[ok]).sum())
+
+
+def building_change_penalty(entity, day, period, building):
+    """Back-to-back periods of an entity held in different buildings"""
+    ok = (entity >= 0) & (day >= 0) & (building >= 0)
+    entity, day, period, building = entity[ok], day[ok], period[ok], building[ok]
+    order = np.lexsort((period, day, entity))
+    entity, day, period, building = entity[order], day[order], period[order], building[order]
+    consecutive = (entity[1:] == entity[:-1]) & (day[1:] == day[:-1]) & (period[1:] - period[:-1] == 1)
+    return int((consecutive & (building[1:] != building[:-1])).sum())
+
+
+def travel_penalty(entity, day, period, building, travel, break_minutes):
+    """Travel minutes between back-to-back periods of an entity, plus again the minutes beyond the break.
+
+    Every walk counts (a short hop between blocks still eats into the
+    changeover), and what does not fit in ``break_minutes`` counts twice as
+    arriving late. ``travel`` is a buildings x buildings minutes matrix;
+    every consecutive pair is one fancy-indexed lookup into it.
+    """
+    ok = (entity >= 0) & (day >= 0) & (building >= 0)
+    entity, day, period, building = entity[ok], day[ok], period[ok], building[ok]
+    order = np.lexsort((period, day, entity))
+    entity, day, period, building = entity[order], day[order], period[order], building[order]
+    consecutive = (entity[1:] == entity[:-1]) & (day[1:] == day[:-1]) & (period[1:] - period[:-1] == 1)
+    minutes = travel[building[:-1][consecutive], building[1:][consecutive]]
+    return float(minutes.sum() + np.maximum(minutes - break_minutes, 0).sum())
+
+
+def explode_groups(course, course_groups):
+    """Repeat session rows once per attending group; returns (session_pos, group)"""
+    indptr, indices = course_groups
+    ok = course >= 0
+    pos = np.flatnonzero(ok)
+    counts = np.diff(indptr)[course[ok]]
+    session_pos = np.repeat(pos, counts)
+    starts = np.repeat(indptr[course[ok]], counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return session_pos, np.asarray(indices)[starts + offsets]
+
+
+# ----- ENGINE -----
+class SoftConstraints:
+    """Weighted soft-constraint evaluation with per-constraint breakdown and timing.
+
+    ``sched`` is a dict of equal-length int arrays, one row per session:
+    ``course``, ``day``, ``period``, ``faculty``, ``building`` and optionally
+    ``block`` (sessions that must be contiguous) and ``shift_pref``
+    (0 morning, 1 afternoon, -1 none). ``course_groups`` is a CSR pair
+    (indptr, indices) mapping each course to the student groups attending it.
+    ``travel`` is a building x building minutes matrix (travel.travel_matrix);
+    without it travel time is not scored.
+    """
+
+    def __init__(self, grid, weights=None, course_groups=None, n_groups=0, n_faculty=0, max_daily_load=4,
+                 travel=None, break_minutes=BREAK_MINUTES):
+        self.grid = grid
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.course_groups = course_groups
+        self.n_groups = n_groups
+        self.n_faculty = n_faculty
+        self.max_daily_load = max_daily_load
+        self.travel = travel
+        self.break_minutes = break_minutes
+        # Cumulative seconds spent in each kernel across evaluate() calls
+        self.timings = {name: 0.0 for name in self.weights}
+        self.calls = 0
+
+    def _kernels(self, sched):
+        grid = self.grid
+        day, period = sched['day'], sched['period']
+        faculty = sched.get('faculty')
+        building = sched.get('building')
+        missing = np.full(len(day), -1, dtype=np.int64)
+        if self.course_groups is not None and self.n_groups:
+            pos, group = explode_groups(sched['course'], self.course_groups)
+        else:
+            pos, group = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return {
+            'student_gaps': lambda: idle_gap_penalty(group, day[pos], period[pos], self.n_groups, grid),
+            'faculty_daily_load': lambda: daily_load_penalty(
+                faculty if faculty is not None else missing, day, self.n_faculty, grid, self.max_daily_load),
+            'lab_contiguity': lambda: contiguity_penalty(sched.get('block', missing), day, period),
+            'shift_preference': lambda: shift_penalty(sched.get('shift_pref', missing), period, grid),
+            'building_changes': lambda: (
+                building_change_penalty(group, day[pos], period[pos], building[pos]) +
+                building_change_penalty(faculty, day, period, building)
+                if building is not None and faculty is not None else 0),
+            'travel_time': lambda: (
+                travel_penalty(group, day[pos], period[pos], building[pos], self.travel, self.break_minutes) +
+                travel_penalty(faculty, day, period, building, self.travel, self.break_minutes)
+                if self.travel is not None and building is not None and faculty is not None else 0),
+        }
+
+    def evaluate(self, sched):
+        """Return (weighted total, {constraint: raw violations}, {constraint: seconds})"""
+        breakdown, timings = {}, {}
+        total = 0.0
+        for name, kernel in self._kernels(sched).items():
+            weight = self.weights.get(name, 0.0)
+            if not weight:
+                continue
+            start = time.perf_counter()
+            breakdown[name] = kernel()
+            timings[name] = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + timings[name]
+            total += weight * breakdown[name]
+        self.calls += 1
+        return total, breakdown, timings
+
+    def timing_report(self):
+        """Cumulative kernel timings, most expensive first"""
+        return sorted(((name, secs, secs / max(self.calls, 1)) for name, secs in self.timings.items()),
+                      key=lambda row: row[1], reverse=True)
@@ -0,0 +1,75 @@
+import queue
+import threading
+import time
+
+
+class SolverJob:
+    """Runs a solver in a background thread and streams its progress through a queue.
+
+    ``run_fn(progress, should_stop, checkpoint)`` does the solving: it calls
+    ``progress(dict)`` once per generation, returns early when
+    ``should_stop()`` is true, and keeps whatever it needs to continue in
+    the ``checkpoint`` dict. The job object is meant to live in
+    ``st.session_state`` so a solve survives Streamlit reruns.
+    """
+
+    def __init__(self, run_fn):
+        self.run_fn = run_fn
+        self.checkpoint = {}
+        self.updates = queue.Queue()
+        self.latest = None
+        self.result = None
+        self.error = None
+        self.status = 'idle'
+        self.started_at = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        try:
+            self.result = self.run_fn(self.updates.put, self._cancel.is_set, self.checkpoint)
+            self.status = 'cancelled' if self._cancel.is_set() else 'done'
+        except Exception as e:  # surfaced to the UI through job.error
+            self.error = e
+            self.status = 'failed'
+
+    def start(self):
+        if self.running:
+            return self
+        self._cancel.clear()
+        self.status = 'running'
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='timetable-solver', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the solver to stop after the current generation"""
+        self._cancel.set()
+
+    def resume(self):
+        """Continue a cancelled job from its checkpoint"""
+        if self.status == 'cancelled':
+            self.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started_at if self.started_at else 0.0
+
+    def poll(self):
+        """Drain queued progress updates; returns the most recent one"""
+        while True:
+            try:
+                self.latest = self.updates.get_nowait()
+            except queue.Empty:
+                return self.latest
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.poll()
@@ -0,0 +1,304 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = os.environ.get('TIMETABLE_STORE', 'timetable_store.db')
+
+# Id column per entity table (generator name first, then the rule.py admin panel's) and the extra indexed columns
+KEYS = {
+    'courses': ['course_id', 'CourseID'],
+    'rooms': ['room_id', 'RoomID'],
+    'faculty': ['faculty_id', 'TeacherID'],
+    'students': ['student_id', 'StudentID'],
+    'enrollments': ['enrollment_id'],
+    'time_slots': ['slot_id'],
+}
+INDEXES = {
+    'courses': ['programme', 'faculty_assigned', 'course_code'],
+    'rooms': ['room_type', 'building', 'Type'],
+    'faculty': ['faculty_assigned'],
+    'students': ['programme', 'Program'],
+    'enrollments': ['student_id', 'course_id'],
+    'time_slots': ['day'],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solver_runs (
+    run_id INTEGER PRIMARY KEY,
+    solver TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    generations INTEGER,
+    best_fitness REAL,
+    hard_violations INTEGER,
+    stop_reason TEXT,
+    params TEXT,
+    trace TEXT
+);
+CREATE INDEX IF NOT EXISTS solver_runs_started ON solver_runs (solver, started);
+CREATE TABLE IF NOT EXISTS solutions (
+    solution_id INTEGER PRIMARY KEY,
+    run_id INTEGER REFERENCES solver_runs (run_id),
+    created REAL NOT NULL,
+    fitness REAL,
+    timetable TEXT NOT NULL,
+    snapshot TEXT
+);
+CREATE INDEX IF NOT EXISTS solutions_run ON solutions (run_id, created);
+CREATE TABLE IF NOT EXISTS table_snapshots (
+    name TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+def _sql_type(values):
+    # Declared type per pandas column; list columns are stored as JSON text and decoded on load
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(values):
+        return 'REAL'
+    if values.dtype == object and any(isinstance(v, (list, tuple)) for v in values):
+        return 'JSON'
+    return 'TEXT'
+
+
+def _cell(value):
+    # sqlite3 only binds Python scalars
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+def _encode(values, sql_type):
+    """Column values as bindable Python objects for its declared type"""
+    if sql_type == 'JSON':  # lists, and the comma-separated strings of CSV imports, round-trip as JSON
+        return [json.dumps(list(v) if isinstance(v, (list, tuple)) else _cell(v)) for v in values]
+    if sql_type in ('INTEGER', 'REAL') and isinstance(values.dtype, np.dtype):
+        return values.tolist()  # numpy numeric columns come out as Python scalars
+    if values.dtype != object:  # string / nullable columns: missing values become NULL in one pass
+        return values.astype(object).where(values.notna(), None).tolist()
+    # Admin-panel rows carry lists even where a CSV import declared the column TEXT; load_table decodes them
+    return [json.dumps(list(v)) if isinstance(v, (list, tuple)) else _cell(v) for v in values]
+
+
+def _decode_text(value):
+    # A JSON list written into a TEXT column by append_rows; any other text is returned as is
+    if isinstance(value, str) and value.startswith('['):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _snapshot(frame):
+    """Arrow (feather) bytes of the encoded table, or None when a column has mixed types Arrow rejects"""
+    try:
+        buffer = io.BytesIO()
+        frame.to_feather(buffer)
+        return buffer.getvalue()
+    except (ImportError, TypeError, ValueError):  # no pyarrow, or e.g. ints and strings in one column
+        return None
+
+
+def _jsonable(value):
+    # Snapshots hold numpy hashes and tuples; JSON has neither
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _encode_snapshot(snapshot):
+    # {id: hash} maps as [id, hash] pairs: JSON object keys are always strings, and ids from CSV imports are ints
+    return {name: [[k, v] for k, v in value.items()] if isinstance(value, dict) else value
+            for name, value in snapshot.items()}
+
+
+def _decode_snapshot(snapshot):
+    # Other entries (e.g. time slot labels in snapshots saved by earlier versions) are returned unchanged
+    return {name: {k: v for k, v in value} if isinstance(value, list) and all(isinstance(p, list) for p in value)
+            else value for name, value in snapshot.items()}
+
+
+class TimetableStore:
+    """SQLite store (WAL mode) for entity tables, solver runs and their best timetables.
+
+    Entity tables are replaced wholesale with one executemany per load, so
+    the generator's output goes in as a single transaction; columns keep
+    their types (lists as JSON). Next to the indexed rows, each save stores
+    an Arrow snapshot of the table: a whole-table reload decodes that one
+    blob (a few ms for 100k rows) instead of building a row tuple per
+    record, while filtered reads use the SQL indexes. One connection is
+    shared by Streamlit's script threads behind a lock.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")  # durable at checkpoints; enough for WAL
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ----- ENTITY TABLES -----
+    def tables(self):
+        """Entity tables present, with row counts"""
+        with self._lock:
+            names = [row[0] for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+            return {name: self._conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+                    for name in names if name in KEYS}
+
+    def save_table(self, name, frame):
+        """Replace entity table `name` with `frame` (one transaction, rows bound with executemany)"""
+        if name not in KEYS:
+            raise ValueError(f"unknown entity table {name!r} (choose from {', '.join(KEYS)})")
+        frame = frame.reset_index(drop=True)
+        columns = list(frame.columns)
+        types = {c: _sql_type(frame[c]) for c in columns}
+        # Ids are indexed but not unique: the admin panel may add a row with an id that is already there
+        definition = ', '.join(f'"{c}" {types[c]}' for c in columns)
+        placeholders = ', '.join('?' * len(columns))
+        cells = [_encode(frame[c], types[c]) for c in columns]
+        snapshot = _snapshot(pd.DataFrame({c: pd.Series(values, dtype=frame[c].dtype if types[c] != 'JSON' else object)
+                                           for c, values in zip(columns, cells)}, columns=columns))
+        with self._lock, self._conn:
+            self._conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            self._conn.execute(f'CREATE TABLE "{name}" ({definition})')
+            self._conn.executemany(f'INSERT INTO "{name}" VALUES ({placeholders})', zip(*cells))
+            self._conn.execute("DELETE FROM table_snapshots WHERE name = ?", (name,))
+            if snapshot is not None:
+                self._conn.execute("INSERT INTO table_snapshots VALUES (?, ?, ?)", (name, time.time(), snapshot))
+            for column in INDEXES.get(name, []) + KEYS[name]:
+                if column in columns:
+                    self._conn.execute(f'CREATE INDEX "{name}_{column}" ON "{name}" ("{column}")')
+
+    def append_rows(self, name, records, columns):
+        """Insert records (dicts) into an entity table, creating it from `columns` if needed"""
+        frame = pd.DataFrame.from_records(records, columns=columns)
+        with self._lock:
+            types = {row[1]: row[2] for row in self._conn.execute(f'PRAGMA table_info("{name}")')}
+        if not types:
+            self.save_table(name, frame)
+            return
+        placeholders = ', '.join('?' * len(columns))
+        names = ', '.join(f'"{c}"' for c in columns)
+        cells = [_encode(frame[c], types.get(c, 'TEXT')) for c in columns]
+        with self._lock, self._conn:
+            self._conn.executemany(f'INSERT INTO "{name}" ({names}) VALUES ({placeholders})', zip(*cells))
+            self._conn.execute("DELETE FROM table_snapshots WHERE name = ?", (name,))  # stale now; SQL path
+
+    def load_table(self, name, columns=None, where=None, params=()):
+        """Entity table as a DataFrame (JSON columns decoded); None when the table does not exist.
+
+        Without ``where`` the table comes from its Arrow snapshot when one is
+        current; ``where`` (an SQL condition with ``?`` placeholders bound
+        from ``params``) runs against the indexed rows.
+        """
+        with self._lock:
+            info = self._conn.execute(f'PRAGMA table_info("{name}")').fetchall()
+            if not info:
+                return None
+            types = {row[1]: row[2] for row in info}
+            selected = columns or list(types)
+            blob = None
+            if where is None:
+                blob = self._conn.execute("SELECT data FROM table_snapshots WHERE name = ?", (name,)).fetchone()
+            if blob is None:
+                names = ', '.join(f'"{c}"' for c in selected)
+                sql = f'SELECT {names} FROM "{name}"' + (f' WHERE {where}' if where else '')
+                rows = self._conn.execute(sql, params).fetchall()
+        if blob is not None:
+            frame = pd.read_feather(io.BytesIO(blob[0]), columns=selected)
+        else:
+            frame = pd.DataFrame.from_records(rows, columns=selected)
+        for column in selected:
+            if types[column] == 'JSON':
+                frame[column] = [json.loads(v) if v is not None else None for v in frame[column]]
+            elif types[column] == 'TEXT' and frame[column].astype('string').str.startswith('[').any():
+                frame[column] = [_decode_text(v) for v in frame[column]]
+        return frame
+
+    # ----- SOLVER RUNS AND SOLUTIONS -----
+    def start_run(self, solver, params=None):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO solver_runs (solver, status, started, params) VALUES (?, 'running', ?, ?)",
+                (solver, time.time(), json.dumps(params) if params is not None else None))
+            return cursor.lastrowid
+
+    def finish_run(self, run_id, status, trace=None, controls=None):
+        """Record the outcome and convergence trace (a ConvergenceTrace) of a run"""
+        last = trace.generations[-1] if trace is not None and len(trace) else {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE solver_runs SET status = ?, finished = ?, generations = ?, best_fitness = ?, "
+                "hard_violations = ?, stop_reason = ?, trace = ? WHERE run_id = ?",
+                (status, time.time(), last.get('generation'), last.get('best'), last.get('hard_violations'),
+                 trace.stop_reason if trace is not None else None,
+                 trace.to_json(controls) if trace is not None else None, run_id))
+
+    def save_solution(self, timetable, run_id=None, fitness=None, snapshot=None):
+        """Store a timetable (list of gene dicts or a DataFrame) with the input snapshot it was solved on"""
+        if isinstance(timetable, pd.DataFrame):
+            timetable = timetable.to_dict('records')
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO solutions (run_id, created, fitness, timetable, snapshot) VALUES (?, ?, ?, ?, ?)",
+                (run_id, time.time(), fitness, json.dumps(_jsonable(timetable)),
+                 json.dumps(_jsonable(_encode_snapshot(snapshot))) if snapshot is not None else None))
+            return cursor.lastrowid
+
+    def latest_solution(self, solver=None):
+        """Most recent solution (optionally of one solver) with its run's trace; None when there is none.
+
+        Returns a dict with timetable, snapshot, fitness, run_id and trace (the
+        trace JSON as a dict, or None).
+        """
+        sql = ("SELECT s.solution_id, s.run_id, s.fitness, s.timetable, s.snapshot, r.trace FROM solutions s "
+               "LEFT JOIN solver_runs r ON r.run_id = s.run_id")
+        params = ()
+        if solver is not None:
+            sql += " WHERE r.solver = ?"
+            params = (solver,)
+        with self._lock:
+            row = self._conn.execute(sql + " ORDER BY s.created DESC, s.solution_id DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        solution_id, run_id, fitness, timetable, snapshot, trace = row
+        snapshot = _decode_snapshot(json.loads(snapshot)) if snapshot is not None else None
+        return {'solution_id': solution_id, 'run_id': run_id, 'fitness': fitness,
+                'timetable': json.loads(timetable), 'snapshot': snapshot,
+                'trace': json.loads(trace) if trace is not None else None}
+
+    def run_history(self, limit=50):
+        """Most recent runs first, without the per-generation traces"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, solver, status, started, finished, generations, best_fitness, hard_violations, "
+                "stop_reason FROM solver_runs ORDER BY started DESC LIMIT ?", (limit,)).fetchall()
+        history = pd.DataFrame.from_records(rows, columns=['run_id', 'solver', 'status', 'started', 'finished',
+                                                           'generations', 'best_fitness', 'hard_violations',
+                                                           'stop_reason'])
+        history['seconds'] = history['finished'] - history['started']
+        history['started'] = pd.to_datetime(history['started'], unit='s')
+        return history.drop(columns='finished')
@@ -0,0 +1,42 @@
+"""Travel matrix and travel-time penalty checks (run with pytest from the repository root)"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from soft_constraints import travel_penalty  # noqa: E402
+from travel import BREAK_MINUTES, BUILDING_POSITIONS, SHUTTLE_MINUTES, travel_matrix  # noqa: E402
+
+
+def _tour(minutes, break_minutes=BREAK_MINUTES):
+    # One entity in every building for consecutive periods of one day
+    n = len(minutes)
+    zeros = np.zeros(n, dtype=np.int64)
+    return travel_penalty(zeros, zeros, np.arange(n), np.arange(n), minutes, break_minutes)
+
+
+def test_single_campus_walks_are_scored():
+    minutes = travel_matrix(list(BUILDING_POSITIONS))
+    assert (minutes[~np.eye(len(minutes), dtype=bool)] > 0).all()
+    assert np.allclose(minutes, minutes.T)
+    assert _tour(minutes) > 0
+
+
+def test_walks_longer_than_the_break_cost_more():
+    minutes = travel_matrix(list(BUILDING_POSITIONS))
+    assert _tour(minutes, break_minutes=0) > _tour(minutes)
+
+
+def test_campus_change_is_a_shuttle_ride():
+    minutes = travel_matrix(['North - Main Building', 'South - Main Building', 'North - Science Block'])
+    assert minutes[0, 1] == SHUTTLE_MINUTES
+    assert minutes[0, 2] < SHUTTLE_MINUTES
+
+
+def test_same_building_is_free():
+    minutes = travel_matrix(list(BUILDING_POSITIONS))
+    n = len(minutes)
+    zeros = np.zeros(n, dtype=np.int64)
+    assert travel_penalty(zeros, zeros, np.arange(n), zeros, minutes, BREAK_MINUTES) == 0
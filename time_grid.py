@@ -0,0 +1,87 @@
+import re
+
+import numpy as np
+
+# Generator week (see generate_time_slots in sample.py)
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+PERIODS = ['08:00-09:00', '09:00-10:00', '10:00-11:00', '11:30-12:30',
+           '12:30-13:30', '14:30-15:30', '15:30-16:30', '16:30-17:30', '17:30-18:30']
+
+MORNING, AFTERNOON = 0, 1
+
+
+def _hour_of(label):
+    """Start hour (24h) of a period label such as '09:00-10:00', '9AM' or '2PM'"""
+    match = re.match(r'\s*(\d{1,2})(?::(\d{2}))?\s*(AM|PM)?', label, re.IGNORECASE)
+    if not match:
+        return 0
+    hour = int(match.group(1))
+    suffix = (match.group(3) or '').upper()
+    if suffix == 'PM' and hour != 12:
+        hour += 12
+    return hour
+
+
+class TimeGrid:
+    """Week as a day x period grid; slot index is day * n_periods + period"""
+
+    def __init__(self, days, periods):
+        self.days = list(days)
+        self.periods = list(periods)
+        # Same rule as generate_time_slots: before 14:00 is the morning shift
+        self.shift = np.array([MORNING if _hour_of(p) < 14 else AFTERNOON for p in self.periods], dtype=np.int8)
+
+    @property
+    def n_days(self):
+        return len(self.days)
+
+    @property
+    def n_periods(self):
+        return len(self.periods)
+
+    @property
+    def n_slots(self):
+        return self.n_days * self.n_periods
+
+    @classmethod
+    def default(cls):
+        return cls(DAYS, PERIODS)
+
+    @classmethod
+    def from_labels(cls, labels, sep='-'):
+        """Grid from rule.py style labels such as 'Mon-9AM'"""
+        days, periods = [], []
+        for label in labels:
+            day, period = label.split(sep, 1)
+            if day not in days:
+                days.append(day)
+            if period not in periods:
+                periods.append(period)
+        periods.sort(key=_hour_of)
+        return cls(days, periods)
+
+    @classmethod
+    def from_slots(cls, slots):
+        """Grid from a generate_time_slots frame (columns day, time_slot)"""
+        days = list(dict.fromkeys(slots['day']))
+        periods = sorted(dict.fromkeys(slots['time_slot']), key=_hour_of)
+        return cls(days, periods)
+
+    def slot(self, day, period):
+        return np.asarray(day) * self.n_periods + np.asarray(period)
+
+    def split(self, slot):
+        slot = np.asarray(slot)
+        return slot // self.n_periods, slot % self.n_periods
+
+    def index_labels(self, labels, sep='-'):
+        """Map 'Day-Period' labels to (day, period) arrays; unknown labels give -1"""
+        day_pos = {d: i for i, d in enumerate(self.days)}
+        period_pos = {p: i for i, p in enumerate(self.periods)}
+        pairs = [label.split(sep, 1) if sep in label else (label, '') for label in labels]
+        day = np.array([day_pos.get(d, -1) for d, _ in pairs], dtype=np.int64)
+        period = np.array([period_pos.get(p, -1) for _, p in pairs], dtype=np.int64)
+        return day, period
+
+    def label(self, day, period, sep='-'):
+        return f"{self.days[day]}{sep}{self.periods[period]}"
@@ -1,13 +1,7 @@
-import pandas as pd
-import numpy as np
 import random
 from datetime import datetime
 import json
 
-# Set random seed for reproducibility
-random.seed(42)
-np.random.seed(42)
-
 # Define programme structures according to NEP 2020
 PROGRAMMES = {
     'FYUP': {'years': 4, 'semesters': 8, 'code_prefix': 'UG'},
@@ -333,63 +327,6 @@ def generate_time_slots():
     
     return slots
 
-# Generate all datasets
-print("Generating NEP 2020 University Timetable Dataset...")
-
-courses = generate_courses()
-rooms = generate_rooms()
-course_room_assignments = assign_rooms_to_courses(courses, rooms)
-time_slots = generate_time_slots()
-
-# Create DataFrames
-courses_df = pd.DataFrame(courses)
-rooms_df = pd.DataFrame(rooms)
-assignments_df = pd.DataFrame(course_room_assignments)
-slots_df = pd.DataFrame(time_slots)
-
-# Create faculty dataset
-faculty_courses = courses_df.groupby('faculty_assigned').agg({
-    'course_id': 'count',
-    'total_weekly_hours': 'sum',
-    'enrollment': 'sum'
-}).rename(columns={
-    'course_id': 'total_courses',
-    'total_weekly_hours': 'total_teaching_hours',
-    'enrollment': 'total_students'
-}).reset_index()
-
-faculty_courses['faculty_id'] = range(1, len(faculty_courses) + 1)
-faculty_courses = faculty_courses[['faculty_id', 'faculty_assigned', 'total_courses', 'total_teaching_hours', 'total_students']]
-
-# Display summary statistics
-print(f"\n=== DATASET SUMMARY ===")
-print(f"Total Courses Generated: {len(courses)}")
-print(f"Total Faculty: {len(faculty_courses)}")
-print(f"Total Rooms: {len(rooms)}")
-print(f"Total Time Slots: {len(time_slots)}")
-
-print(f"\n=== COURSES BY PROGRAMME ===")
-print(courses_df['programme'].value_counts())
-
-print(f"\n=== COURSES BY CATEGORY ===")
-print(courses_df['category'].value_counts())
-
-print(f"\n=== COURSES BY TYPE ===")
-print(courses_df['course_type'].value_counts())
-
-print(f"\n=== ROOM DISTRIBUTION ===")
-print(rooms_df['room_type'].value_counts())
-
-# Display sample data
-print(f"\n=== SAMPLE COURSES ===")
-print(courses_df[['course_code', 'course_name', 'category', 'programme', 'credits', 'faculty_assigned', 'enrollment']].head(10))
-
-print(f"\n=== SAMPLE ROOMS ===")
-print(rooms_df[['room_number', 'room_type', 'capacity', 'building']].head(10))
-
-print(f"\n=== SAMPLE FACULTY WORKLOAD ===")
-print(faculty_courses.head(10))
-
 # Save to CSV files with download functionality
 def save_to_csv(dataframe, filename):
     """Save DataFrame to CSV and provide download link"""
@@ -408,7 +345,7 @@ def generate_student_enrollments(courses):
     # Generate student IDs
     student_ids = [f"STU{i:05d}" for i in range(1, 2001)]  # 2000 students
     student_names = [
-        f"{random.choice(['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan', 'Shaurya', 'Atharv', 'Advik', 'Aadhya', 'Ananya', 'Anika', 'Avni', 'Diya', 'Ira', 'Kavya', 'Kiara', 'Myra', 'Navya', 'Priya', 'Riya', 'Sara', 'Shreya']))} {random.choice(['Sharma', 'Verma', 'Singh', 'Kumar', 'Gupta', 'Agarwal', 'Patel', 'Jain', 'Mishra', 'Yadav', 'Tiwari', 'Chandra', 'Bansal', 'Saxena', 'Goyal', 'Mittal', 'Singhal', 'Joshi', 'Bhatt', 'Srivastava'])}"
+        f"{random.choice(['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan', 'Shaurya', 'Atharv', 'Advik', 'Aadhya', 'Ananya', 'Anika', 'Avni', 'Diya', 'Ira', 'Kavya', 'Kiara', 'Myra', 'Navya', 'Priya', 'Riya', 'Sara', 'Shreya'])} {random.choice(['Sharma', 'Verma', 'Singh', 'Kumar', 'Gupta', 'Agarwal', 'Patel', 'Jain', 'Mishra', 'Yadav', 'Tiwari', 'Chandra', 'Bansal', 'Saxena', 'Goyal', 'Mittal', 'Singhal', 'Joshi', 'Bhatt', 'Srivastava'])}"
         for _ in range(2000)
     ]
     
@@ -434,39 +371,8 @@ def generate_student_enrollments(courses):
     
     return enrollments
 
-courses = generate_courses()
-rooms = generate_rooms()
-course_room_assignments = assign_rooms_to_courses(courses, rooms)
-time_slots = generate_time_slots()
-student_enrollments = generate_student_enrollments(courses)
-
-# Create DataFrames
-courses_df = pd.DataFrame(courses)
-rooms_df = pd.DataFrame(rooms)
-assignments_df = pd.DataFrame(course_room_assignments)
-slots_df = pd.DataFrame(time_slots)
-enrollments_df = pd.DataFrame(student_enrollments)
-
-# Create faculty dataset
-faculty_courses = courses_df.groupby('faculty_assigned').agg({
-    'course_id': 'count',
-    'total_weekly_hours': 'sum',
-    'enrollment': 'sum'
-}).rename(columns={
-    'course_id': 'total_courses',
-    'total_weekly_hours': 'total_teaching_hours',
-    'enrollment': 'total_students'
-}).reset_index()
-
-faculty_courses['faculty_id'] = range(1, len(faculty_courses) + 1)
-faculty_courses['department'] = [random.choice(['Education', 'Science', 'Commerce', 'Humanities', 'Skill Development']) for _ in range(len(faculty_courses))]
-faculty_courses['experience_years'] = [random.randint(2, 35) for _ in range(len(faculty_courses))]
-faculty_courses['qualification'] = [random.choice(['Ph.D.', 'M.Phil.', 'M.Ed.', 'M.Sc.', 'M.A.', 'M.Com.']) for _ in range(len(faculty_courses))]
-faculty_courses['specialization'] = [random.choice(['Curriculum Studies', 'Educational Psychology', 'Assessment', 'Technology Integration', 'Special Education', 'Subject Teaching']) for _ in range(len(faculty_courses))]
-faculty_courses = faculty_courses[['faculty_id', 'faculty_assigned', 'department', 'qualification', 'specialization', 'experience_years', 'total_courses', 'total_teaching_hours', 'total_students']]
-
 # Generate timetable schedule data
-def generate_timetable_schedule(courses, rooms, time_slots):
+def generate_timetable_schedule(courses, rooms, time_slots, n_faculty):
     """Generate actual timetable schedule"""
     schedule = []
     schedule_id = 1
@@ -488,15 +394,116 @@ def generate_timetable_schedule(courses, rooms, time_slots):
                 'time_slot': time_slot,
                 'week_number': random.randint(1, 16),  # 16 weeks per semester
                 'session_type': random.choice(['Theory', 'Lab', 'Tutorial', 'Practical']),
-                'faculty_id': random.randint(1, len(faculty_courses))
+                'faculty_id': random.randint(1, n_faculty)
             })
             schedule_id += 1
     
     return schedule
 
-timetable_schedule = generate_timetable_schedule(courses, rooms, time_slots)
-schedule_df = pd.DataFrame(timetable_schedule)
-
-print(f"\n=== DATASET GENERATION COMPLETE ===")
-print(f"The dataset includes {len(courses)} courses following NEP 2020 guidelines")
-print(f"with balanced distribution across all required categories and programmes.")
\ No newline at end of file
+def main():
+    # The generators are pure Python; numpy/pandas are only needed here, so importing the module stays cheap
+    import numpy as np
+    import pandas as pd
+
+    # Set random seed for reproducibility
+    random.seed(42)
+    np.random.seed(42)
+
+    # Generate all datasets
+    print("Generating NEP 2020 University Timetable Dataset...")
+
+    courses = generate_courses()
+    rooms = generate_rooms()
+    course_room_assignments = assign_rooms_to_courses(courses, rooms)
+    time_slots = generate_time_slots()
+
+    # Create DataFrames
+    courses_df = pd.DataFrame(courses)
+    rooms_df = pd.DataFrame(rooms)
+    assignments_df = pd.DataFrame(course_room_assignments)
+    slots_df = pd.DataFrame(time_slots)
+
+    # Create faculty dataset
+    faculty_courses = courses_df.groupby('faculty_assigned').agg({
+        'course_id': 'count',
+        'total_weekly_hours': 'sum',
+        'enrollment': 'sum'
+    }).rename(columns={
+        'course_id': 'total_courses',
+        'total_weekly_hours': 'total_teaching_hours',
+        'enrollment': 'total_students'
+    }).reset_index()
+
+    faculty_courses['faculty_id'] = range(1, len(faculty_courses) + 1)
+    faculty_courses = faculty_courses[['faculty_id', 'faculty_assigned', 'total_courses', 'total_teaching_hours', 'total_students']]
+
+    # Display summary statistics
+    print(f"\n=== DATASET SUMMARY ===")
+    print(f"Total Courses Generated: {len(courses)}")
+    print(f"Total Faculty: {len(faculty_courses)}")
+    print(f"Total Rooms: {len(rooms)}")
+    print(f"Total Time Slots: {len(time_slots)}")
+
+    print(f"\n=== COURSES BY PROGRAMME ===")
+    print(courses_df['programme'].value_counts())
+
+    print(f"\n=== COURSES BY CATEGORY ===")
+    print(courses_df['category'].value_counts())
+
+    print(f"\n=== COURSES BY TYPE ===")
+    print(courses_df['course_type'].value_counts())
+
+    print(f"\n=== ROOM DISTRIBUTION ===")
+    print(rooms_df['room_type'].value_counts())
+
+    # Display sample data
+    print(f"\n=== SAMPLE COURSES ===")
+    print(courses_df[['course_code', 'course_name', 'category', 'programme', 'credits', 'faculty_assigned', 'enrollment']].head(10))
+
+    print(f"\n=== SAMPLE ROOMS ===")
+    print(rooms_df[['room_number', 'room_type', 'capacity', 'building']].head(10))
+
+    print(f"\n=== SAMPLE FACULTY WORKLOAD ===")
+    print(faculty_courses.head(10))
+
+
+    courses = generate_courses()
+    rooms = generate_rooms()
+    course_room_assignments = assign_rooms_to_courses(courses, rooms)
+    time_slots = generate_time_slots()
+    student_enrollments = generate_student_enrollments(courses)
+
+    # Create DataFrames
+    courses_df = pd.DataFrame(courses)
+    rooms_df = pd.DataFrame(rooms)
+    assignments_df = pd.DataFrame(course_room_assignments)
+    slots_df = pd.DataFrame(time_slots)
+    enrollments_df = pd.DataFrame(student_enrollments)
+
+    # Create faculty dataset
+    faculty_courses = courses_df.groupby('faculty_assigned').agg({
+        'course_id': 'count',
+        'total_weekly_hours': 'sum',
+        'enrollment': 'sum'
+    }).rename(columns={
+        'course_id': 'total_courses',
+        'total_weekly_hours': 'total_teaching_hours',
+        'enrollment': 'total_students'
+    }).reset_index()
+
+    faculty_courses['faculty_id'] = range(1, len(faculty_courses) + 1)
+    faculty_courses['department'] = [random.choice(['Education', 'Science', 'Commerce', 'Humanities', 'Skill Development']) for _ in range(len(faculty_courses))]
+    faculty_courses['experience_years'] = [random.randint(2, 35) for _ in range(len(faculty_courses))]
+    faculty_courses['qualification'] = [random.choice(['Ph.D.', 'M.Phil.', 'M.Ed.', 'M.Sc.', 'M.A.', 'M.Com.']) for _ in range(len(faculty_courses))]
+    faculty_courses['specialization'] = [random.choice(['Curriculum Studies', 'Educational Psychology', 'Assessment', 'Technology Integration', 'Special Education', 'Subject Teaching']) for _ in range(len(faculty_courses))]
+    faculty_courses = faculty_courses[['faculty_id', 'faculty_assigned', 'department', 'qualification', 'specialization', 'experience_years', 'total_courses', 'total_teaching_hours', 'total_students']]
+
+    timetable_schedule = generate_timetable_schedule(courses, rooms, time_slots, len(faculty_courses))
+    schedule_df = pd.DataFrame(timetable_schedule)
+
+    print(f"\n=== DATASET GENERATION COMPLETE ===")
+    print(f"The dataset includes {len(courses)} courses following NEP 2020 guidelines")
+    print(f"with balanced distribution across all required categories and programmes.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Read-only HTTP API serving published timetables per student, faculty, room and course.
+
+    python timetable_api.py publish timetable.csv --enrollments enrollments.csv --db timetable.db
+    python timetable_api.py serve --db timetable.db --port 8000
+
+    GET /students/{id}  /faculty/{id}  /rooms/{id}  /courses/{id}  /health
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from data_import import read_table
+from time_grid import _hour_of
+from timetable_query import COLUMNS, _day_order, _find
+
+DEFAULT_DB = os.environ.get('TIMETABLE_DB', 'timetable.db')
+# URL segment -> indexed column; students go through the enrollments table
+KINDS = {'students': 'student', 'faculty': 'faculty', 'rooms': 'room', 'courses': 'course'}
+CACHE_CONTROL = 'public, max-age=60'
+
+
+# ----- PUBLISHING -----
+def normalize(timetable):
+    """Solver result frame (new.py, session mode or rule.py columns) in the published column layout.
+
+    Ids become text, 'Mon-9AM' style labels are split into day and period,
+    and ``slot`` orders the rows through the week. Unrecognised columns
+    (Session, Kind, Course_Code, ...) are kept as they are.
+    """
+    col = {kind: _find(timetable, kind) for kind in COLUMNS}
+    times = timetable[col['time']].astype(str)
+    if col['day'] is not None:
+        days = timetable[col['day']].astype(str)
+    else:
+        parts = times.str.partition('-')
+        days, times = parts[0], parts[2]
+    frame = pd.DataFrame({
+        'course': timetable[col['course']].astype('string').to_numpy(),
+        'day': days.to_numpy(),
+        'period': times.to_numpy(),
+        'room': timetable[col['room']].astype('string').to_numpy() if col['room'] else None,
+        'faculty': timetable[col['faculty']].astype('string').to_numpy() if col['faculty'] else None,
+        'length': (pd.to_numeric(timetable[col['length']], errors='coerce').fillna(1).astype(int).to_numpy()
+                   if col['length'] else 1),
+    })
+    day_rank = {d: _day_order(d) for d in frame['day'].unique()}
+    period_rank = {p: _hour_of(p) for p in frame['period'].unique()}
+    frame['slot'] = frame['day'].map(day_rank) * 24 + frame['period'].map(period_rank)
+    extra = timetable.drop(columns=[c for c in col.values() if c is not None]).reset_index(drop=True)
+    return pd.concat([frame, extra], axis=1)
+
+
+def publish(timetable, path=DEFAULT_DB, enrollments=None):
+    """Write a solved timetable (and optional enrollments) to a SQLite file for the API; returns its version.
+
+    The file is written next to ``path`` and renamed over it, so a running
+    server never sees a half-written database; it notices the new file and
+    drops its cached responses.
+    """
+    frame = normalize(timetable)
+    pairs = pd.DataFrame(columns=['student_id', 'course_id'])
+    if enrollments is not None:
+        if 'status' in enrollments.columns:
+            enrollments = enrollments[enrollments['status'] != 'Dropped']
+        pairs = pd.DataFrame({'student_id': enrollments['student_id'].astype('string').to_numpy(),
+                              'course_id': enrollments['course_id'].astype('string').to_numpy()}).drop_duplicates()
+    version = hashlib.blake2b(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()
+                              + pd.util.hash_pandas_object(pairs, index=False).to_numpy().tobytes(),
+                              digest_size=8).hexdigest()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(suffix='.db', dir=directory)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp)
+        with conn:
+            frame.to_sql('sessions', conn, index=False, if_exists='replace')
+            pairs.to_sql('enrollments', conn, index=False, if_exists='replace')
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             [('version', version), ('published', time.strftime('%Y-%m-%dT%H:%M:%S'))])
+            for column in ('course', 'room', 'faculty'):
+                conn.execute(f"CREATE INDEX sessions_{column} ON sessions ({column}, slot)")
+            conn.execute("CREATE INDEX enrollments_student ON enrollments (student_id, course_id)")
+        conn.close()
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return version
+
+
+# ----- SERVING -----
+class ConnectionPool:
+    """Fixed set of read-only SQLite connections shared by the request worker threads.
+
+    When a newer file is published the pool is retired with close(): idle
+    connections close at once, connections still in use close as their
+    requests release them, and a request that captured the pool before the
+    swap gets a private connection instead of waiting on the emptied pool.
+    """
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self.size = size
+        self.mtime = os.stat(path).st_mtime_ns
+        self._idle = [self._connect() for _ in range(size)]
+        self._available = threading.Condition()
+        self._retired = False
+        with self.connection() as conn:
+            self.version = dict(conn.execute("SELECT key, value FROM meta").fetchall())['version']
+
+    def _connect(self):
+        conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        with self._available:
+            while not self._idle and not self._retired:
+                self._available.wait()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:  # retired while this request held the pool
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._available:
+                if self._retired:
+                    conn.close()
+                else:
+                    self._idle.append(conn)
+                    self._available.notify()
+
+    def close(self):
+        with self._available:
+            self._retired = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for conn in idle:
+            conn.close()
+
+
+class ResponseCache:
+    """Bounded LRU of encoded responses keyed by (version, kind, id); safe across threads"""
+
+    def __init__(self, maxsize=10_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._store.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._store.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._store[key] = value
+            if len(self._store) > self.maxsize:
+                self._store.popitem(last=False)  # evict least recently used
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'entries': len(self._store), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0}
+
+
+def query(conn, kind, key):
+    """Sessions of one entity in week order, as plain dicts"""
+    if kind == 'student':
+        rows = conn.execute("SELECT s.* FROM enrollments e JOIN sessions s ON s.course = e.course_id "
+                            "WHERE e.student_id = ? ORDER BY s.slot", (key,))
+    else:
+        rows = conn.execute(f"SELECT * FROM sessions WHERE {kind} = ? ORDER BY slot", (key,))
+    return [dict(row) for row in rows]
+
+
+def render(kind, key, version, sessions):
+    """(ETag, JSON body) for one entity's timetable"""
+    body = json.dumps({kind: key, 'version': version, 'sessions': sessions}, separators=(',', ':')).encode()
+    return f'"{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"', body
+
+
+def create_app(path=DEFAULT_DB, pool_size=4, cache_size=10_000, check_interval=1.0):
+    """Starlette app over a database written by publish().
+
+    Lookups hit the LRU first (no thread hop); misses run the indexed query
+    on a pooled connection in a worker thread. Every response carries an
+    ETag, and a matching If-None-Match gets an empty 304. At most once per
+    ``check_interval`` seconds the file is stat'ed; a newly published file
+    swaps in a fresh pool and empties the cache.
+    """
+    state = {'pool': ConnectionPool(path, pool_size), 'checked': time.monotonic()}
+    cache = ResponseCache(cache_size)
+
+    def current_pool():
+        # Only called from the event loop thread, so the swap needs no lock
+        now = time.monotonic()
+        if now - state['checked'] >= check_interval:
+            state['checked'] = now
+            if os.stat(path).st_mtime_ns != state['pool'].mtime:
+                old, state['pool'] = state['pool'], ConnectionPool(path, pool_size)
+                cache.clear()
+                old.close()
+        return state['pool']
+
+    def load(pool, kind, key):
+        with pool.connection() as conn:
+            sessions = query(conn, kind, key)
+        return render(kind, key, pool.version, sessions) if sessions else None
+
+    async def entity(request):
+        kind, key = KINDS[request.url.path.split('/')[1]], request.path_params['key']
+        pool = current_pool()
+        cache_key = (pool.version, kind, key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            cached = await run_in_threadpool(load, pool, kind, key)
+            if cached is None:
+                return JSONResponse({'error': f'no sessions for {kind} {key}'}, status_code=404)
+            cache.put(cache_key, cached)
+        etag, body = cached
+        headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+
+    async def health(request):
+        pool = current_pool()
+        return JSONResponse({'version': pool.version, 'pool_size': pool.size, 'cache': cache.stats()})
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        state['pool'].close()
+
+    routes = [Route(f'/{segment}/{{key}}', entity) for segment in KINDS] + [Route('/health', health)]
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.cache = cache
+    return app
+
+
+# ----- COMMAND LINE -----
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    pub = commands.add_parser('publish', help="write a solved timetable CSV/Parquet into the API database")
+    pub.add_argument('timetable')
+    pub.add_argument('--enrollments', help="generator enrollments table (course_id, student_id[, status])")
+    pub.add_argument('--db', default=DEFAULT_DB)
+    serve = commands.add_parser('serve', help="run the API with uvicorn")
+    serve.add_argument('--db', default=DEFAULT_DB)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--pool-size', type=int, default=4)
+    serve.add_argument('--cache-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        def load(name):
+            with open(name, 'rb') as f:
+                return read_table(name, f.read())
+        enrollments = load(args.enrollments) if args.enrollments else None
+        version = publish(load(args.timetable), args.db, enrollments)
+        print(f"published {args.timetable} to {args.db} (version {version})")
+    else:
+        import uvicorn
+        app = create_app(args.db, pool_size=args.pool_size, cache_size=args.cache_size)
+        uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
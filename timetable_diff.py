@@ -0,0 +1,136 @@
+"""Change set between two solved timetables, keyed by (course, session).
+
+    python timetable_diff.py old.csv new.csv --output changes.csv   (or .json)
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from timetable_query import _find
+
+CHANGES = ['added', 'moved', 'removed']
+
+
+def keyed(timetable):
+    """(course, session) and value columns of a result frame from any of the solvers.
+
+    Frames without a Session column (new.py's one gene per course) number
+    each course's rows in order. Values are compared as text, so a frame
+    read back from CSV matches the one it was written from.
+    """
+    frame = timetable.reset_index(drop=True)
+    course_col = _find(frame, 'course')
+    course = frame[course_col].astype('string')
+    if 'Session' in frame.columns:
+        session = pd.to_numeric(frame['Session'], errors='coerce').fillna(0).astype(np.int64)
+    else:
+        session = course.groupby(course, sort=False).cumcount().astype(np.int64) + 1
+    values = {column: frame[column].astype('string').to_numpy(dtype=object, na_value=None)
+              for column in frame.columns if column not in (course_col, 'Session')}
+    return course.to_numpy(dtype=object), session.to_numpy(), values
+
+
+def diff(old, new):
+    """Rows added, moved (any value changed) or removed between two timetables.
+
+    Keys are aligned with one argsort and searchsorted over integer
+    (course code, session) keys, and each value column is compared as a
+    whole array. A row holds the new values, the old values as
+    ``<column>_before`` and, for moved rows, the names of the changed columns.
+    """
+    old_course, old_session, old_values = keyed(old)
+    new_course, new_session, new_values = keyed(new)
+    codes, _ = pd.factorize(np.concatenate((old_course, new_course)))
+    width = int(max(old_session.max(initial=0), new_session.max(initial=0))) + 1
+    old_key = codes[:len(old_course)].astype(np.int64) * width + old_session
+    new_key = codes[len(old_course):].astype(np.int64) * width + new_session
+    if len(np.unique(old_key)) < len(old_key) or len(np.unique(new_key)) < len(new_key):
+        raise ValueError("timetable has repeated (course, session) rows")
+
+    # new row -> matching old row, or -1
+    order = np.argsort(old_key, kind='stable')
+    at = np.clip(np.searchsorted(old_key[order], new_key), 0, max(len(order) - 1, 0))
+    matched = (old_key[order[at]] == new_key) if len(order) else np.zeros(len(new_key), dtype=bool)
+    old_row = np.where(matched, order[at] if len(order) else -1, -1)
+    kept = np.zeros(len(old_key), dtype=bool)
+    kept[old_row[matched]] = True
+
+    columns = [c for c in new_values if c in old_values]
+    changed = np.zeros((len(new_key), len(columns)), dtype=bool)
+    pairs_new, pairs_old = np.flatnonzero(matched), old_row[matched]
+    for j, column in enumerate(columns):
+        changed[pairs_new, j] = old_values[column][pairs_old] != new_values[column][pairs_new]
+    moved = changed.any(axis=1)
+
+    added_rows, moved_rows, removed_rows = np.flatnonzero(~matched), np.flatnonzero(moved), np.flatnonzero(~kept)
+    parts = []
+    for change, rows, values, course, session, before in (
+            ('added', added_rows, new_values, new_course, new_session, None),
+            ('moved', moved_rows, new_values, new_course, new_session, old_row[moved_rows]),
+            ('removed', removed_rows, old_values, old_course, old_session, None)):
+        part = {'change': change, 'course': course[rows], 'session': session[rows],
+                'changed': [', '.join(np.array(columns)[changed[row]]) for row in rows] if change == 'moved' else ''}
+        for column in values:
+            if change == 'removed':
+                part[column], part[f'{column}_before'] = None, values[column][rows]
+            else:
+                part[column] = values[column][rows]
+                part[f'{column}_before'] = old_values[column][before] \
+                    if before is not None and column in old_values else None
+        parts.append(pd.DataFrame(part, index=pd.RangeIndex(len(rows))))
+    changes = pd.concat(parts, ignore_index=True)
+    changes['change'] = pd.Categorical(changes['change'], categories=CHANGES)
+    return changes.sort_values(['course', 'session'], kind='stable').reset_index(drop=True)
+
+
+def summary(changes):
+    counts = changes['change'].value_counts()
+    return {change: int(counts.get(change, 0)) for change in CHANGES}
+
+
+def to_csv(changes):
+    return changes.to_csv(index=False).encode('utf-8')
+
+
+def to_json(changes):
+    """Summary counts plus one record per change; empty fields of the other change types are dropped"""
+    records = [{k: v for k, v in record.items() if v is not None and v == v and v != ''}
+               for record in changes.astype(object).to_dict('records')]
+    return json.dumps({'summary': summary(changes), 'changes': records}, indent=2, default=str)
+
+
+# ----- STREAMLIT VIEW -----
+def show_changes(changes, key='changes'):
+    """Change-set table with CSV / JSON downloads"""
+    import streamlit as st  # only the apps need it
+
+    st.subheader("Changes Since Previous Run")
+    counts = summary(changes)
+    st.caption(" · ".join(f"{change}: {n}" for change, n in counts.items()))
+    if not len(changes):
+        return
+    st.dataframe(changes)
+    csv_col, json_col = st.columns(2)
+    csv_col.download_button("Download Changes CSV", to_csv(changes), "timetable_changes.csv", key=f"{key}_csv")
+    json_col.download_button("Download Changes (JSON)", to_json(changes), "timetable_changes.json",
+                             key=f"{key}_json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--output', help="write the change set here (.csv or .json); default prints a summary")
+    args = parser.parse_args()
+    changes = diff(pd.read_csv(args.old), pd.read_csv(args.new))
+    print(summary(changes))
+    if args.output:
+        data = to_json(changes).encode('utf-8') if args.output.endswith('.json') else to_csv(changes)
+        with open(args.output, 'wb') as f:
+            f.write(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from time_grid import DAYS, _hour_of
+
+# Column names used by the solvers' result frames (new.py legacy and session mode, rule.py)
+COLUMNS = {
+    'course': ['Course_ID', 'CourseID', 'course_id'],
+    'day': ['Day', 'day'],
+    'time': ['Time_Slot', 'Time', 'Time_Slot_ID', 'time_slot'],
+    'room': ['Room', 'RoomID', 'room_id'],
+    'faculty': ['Faculty', 'Faculty_ID', 'Teacher', 'faculty'],
+    'length': ['Periods', 'Length'],
+}
+VIEWS = ['Student', 'Faculty', 'Room', 'Course', 'Time Slot']
+
+
+def _day_order(label):
+    # Weekday order for full or abbreviated names ('Monday', 'Mon'); unknown labels last
+    prefixes = [day[:3].lower() for day in DAYS] + ['sun']
+    return prefixes.index(label[:3].lower()) if label[:3].lower() in prefixes else len(prefixes)
+
+
+def _find(frame, kind):
+    return next((name for name in COLUMNS[kind] if name in frame.columns), None)
+
+
+def _csr(values):
+    """Inverted index of a column: (key Index, offsets, row numbers grouped by key).
+
+    Keys are matched as text (so a typed '101' finds course_id 101); missing
+    values are left out of the index.
+    """
+    codes, keys = pd.factorize(pd.Series(values).astype('string'))
+    order = np.argsort(codes, kind='stable')
+    offsets = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+    return pd.Index(keys), offsets, order
+
+
+class TimetableIndex:
+    """Inverted indexes over one solved timetable, built once per solution.
+
+    ``schedule`` is a result frame with one row per gene (course, time, room,
+    faculty and optionally day and length in periods); ``enrollments`` a
+    (student_id, course_id[, status]) table. Each entity maps to a contiguous
+    run of row numbers, so a lookup costs O(result size): a student's rows
+    are the rows of the few courses they take, concatenated.
+    """
+
+    def __init__(self, schedule, enrollments=None):
+        self.schedule = schedule.reset_index(drop=True)
+        col = {kind: _find(self.schedule, kind) for kind in COLUMNS}
+        self.columns = col
+        self.course_labels = self.schedule[col['course']].to_numpy()
+        self.room_labels = self.schedule[col['room']].to_numpy() if col['room'] is not None else None
+        times = self.schedule[col['time']].astype(str)
+        if col['day'] is not None:
+            days = self.schedule[col['day']].astype(str)
+        else:  # rule.py style 'Mon-9AM' labels
+            parts = times.str.partition('-')
+            days, times = parts[0], parts[2]
+        self.days = sorted(dict.fromkeys(days), key=_day_order)
+        self.periods = sorted(dict.fromkeys(times), key=_hour_of)
+        day = pd.Categorical(days, categories=self.days).codes.astype(np.int64)
+        period = pd.Categorical(times, categories=self.periods).codes.astype(np.int64)
+        length = (pd.to_numeric(self.schedule[col['length']], errors='coerce').fillna(1).astype(np.int64).to_numpy()
+                  if col['length'] is not None else np.ones(len(self.schedule), dtype=np.int64))
+
+        # One cell per occupied period: a 2-period lab block shows in both rows of the grid
+        # (periods running past the end of the day are dropped)
+        cell_row = np.repeat(np.arange(len(self.schedule)), length)
+        cell_period = period[cell_row] + np.arange(len(cell_row)) - np.repeat(np.cumsum(length) - length, length)
+        keep = cell_period < len(self.periods)
+        self.cell_row, self.cell_period = cell_row[keep], cell_period[keep]
+        self.cell_day = day[self.cell_row]
+
+        self.indexes = {kind: _csr(self.schedule[col[kind]])
+                        for kind in ('course', 'room', 'faculty') if col[kind] is not None}
+        slot = self.cell_day * max(len(self.periods), 1) + self.cell_period
+        self.slot_order = np.argsort(slot, kind='stable')
+        self.slot_offsets = np.searchsorted(slot[self.slot_order], np.arange(len(self.days) * len(self.periods) + 1))
+
+        self.students = None
+        if enrollments is not None and 'course' in self.indexes:
+            if 'status' in enrollments.columns:
+                enrollments = enrollments[enrollments['status'] != 'Dropped']
+            # Student -> course positions in the course index (courses without sessions dropped)
+            pos = self.indexes['course'][0].get_indexer(enrollments['course_id'].astype('string'))
+            keep = pos >= 0
+            keys, offsets, order = _csr(enrollments['student_id'].to_numpy()[keep])
+            self.students = keys, offsets, pos[keep][order]
+
+    def keys(self, kind):
+        """Known ids of an entity kind ('student', 'faculty', 'room', 'course')"""
+        if kind == 'student':
+            return self.students[0] if self.students is not None else pd.Index([])
+        return self.indexes[kind][0] if kind in self.indexes else pd.Index([])
+
+    def rows(self, kind, key):
+        """Row numbers of the schedule for one entity; empty when the key is unknown"""
+        key = str(key)
+        if kind == 'student':
+            if self.students is None or key not in self.students[0]:
+                return np.empty(0, dtype=np.int64)
+            keys, offsets, courses = self.students
+            i = keys.get_loc(key)
+            return np.concatenate([self.rows_at('course', c) for c in courses[offsets[i]:offsets[i + 1]]]
+                                  or [np.empty(0, dtype=np.int64)])
+        if kind not in self.indexes or key not in self.indexes[kind][0]:
+            return np.empty(0, dtype=np.int64)
+        return self.rows_at(kind, self.indexes[kind][0].get_loc(key))
+
+    def rows_at(self, kind, i):
+        _, offsets, order = self.indexes[kind]
+        return order[offsets[i]:offsets[i + 1]]
+
+    def at(self, day, period):
+        """Row numbers of everything running in one (day, period) label pair"""
+        if day not in self.days or period not in self.periods:
+            return np.empty(0, dtype=np.int64)
+        slot = self.days.index(day) * len(self.periods) + self.periods.index(period)
+        return self.cell_row[self.slot_order[self.slot_offsets[slot]:self.slot_offsets[slot + 1]]]
+
+    def sessions(self, kind, key):
+        """Schedule rows for one entity (or 'slot' with a (day, period) key), in week order"""
+        rows = self.at(*key) if kind == 'slot' else self.rows(kind, key)
+        return self.schedule.iloc[np.sort(rows)]
+
+    def week(self, kind, key):
+        """Day x period grid for one entity; each cell lists 'course @ room' (clashes joined with ' | ')"""
+        rows = self.rows(kind, key)
+        grid = [[''] * len(self.days) for _ in self.periods]
+        if len(rows):
+            # Cells of the selected rows only: the rows' cell runs are found from the row -> cell offsets
+            starts = np.searchsorted(self.cell_row, rows)
+            ends = np.searchsorted(self.cell_row, rows, side='right')
+            cells = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+            course, room = self.course_labels, self.room_labels
+            for c in cells:
+                row = self.cell_row[c]
+                text = str(course[row]) + (f" @ {room[row]}" if room is not None else '')
+                cell = grid[self.cell_period[c]][self.cell_day[c]]
+                grid[self.cell_period[c]][self.cell_day[c]] = f"{cell} | {text}" if cell else text
+        return pd.DataFrame(grid, index=self.periods, columns=self.days)
+
+
+# ----- STREAMLIT VIEW -----
+def show_query(index, key='timetable_query'):
+    """Per-student / faculty / room / course / time-slot lookup over a TimetableIndex"""
+    import streamlit as st  # only the apps need it
+
+    st.subheader("Timetable Lookup")
+    views = [view for view in VIEWS if view == 'Time Slot' or len(index.keys(view.lower()))]
+    view = st.radio("View", views, horizontal=True, key=f"{key}_view")
+    if view == 'Time Slot':
+        day_col, period_col = st.columns(2)
+        day = day_col.selectbox("Day", index.days, key=f"{key}_day")
+        period = period_col.selectbox("Period", index.periods, key=f"{key}_period")
+        st.dataframe(index.sessions('slot', (day, period)))
+        return
+    kind = view.lower()
+    keys = index.keys(kind)
+    # Large key sets (50k students) are typed, not listed
+    if len(keys) > 1000:
+        entity = st.text_input(f"{view} ID", key=f"{key}_{kind}").strip()
+    else:
+        entity = st.selectbox(f"{view} ID", list(keys), key=f"{key}_{kind}")
+    if not entity:
+        return
+    sessions = index.sessions(kind, entity)
+    if sessions.empty:
+        st.info(f"No sessions for {view.lower()} {entity}.")
+        return
+    st.dataframe(index.week(kind, entity))
+    st.caption(f"{len(sessions)} sessions")
+    with st.expander("Sessions"):
+        st.dataframe(sessions)
@@ -0,0 +1,71 @@
+"""Building-to-building travel times for the travel-aware soft constraint.
+
+The matrix is built once per problem from where each building sits: the
+generator's blocks have fixed walking positions on a campus, buildings on
+different campuses are a shuttle ride apart, and anything without a known
+position costs a flat short walk. Multi-campus building names are
+"<campus> - <block>" (see sample.generate_rooms).
+"""
+import numpy as np
+
+# Walking positions (metres) of the generator's blocks within one campus
+BUILDING_POSITIONS = {
+    'Main Building': (0, 0),
+    'Science Block': (250, 80),
+    'Commerce Block': (-180, 150),
+    'Arts Block': (-120, -220),
+    'Education Block': (320, -260),
+}
+WALK_METRES_PER_MINUTE = 80
+UNKNOWN_WALK_MINUTES = 5  # same campus, position not known
+SHUTTLE_MINUTES = 30  # any two buildings on different campuses
+BREAK_MINUTES = 10  # changeover between back-to-back periods
+CAMPUS_SEP = ' - '
+
+
+def split_building(name):
+    """(campus, block) of a building name; campus is None for single-campus names"""
+    name = str(name)
+    if CAMPUS_SEP in name:
+        campus, block = name.split(CAMPUS_SEP, 1)
+        return campus, block
+    return None, name
+
+
+def travel_matrix(buildings, campus=None, positions=None, walk_speed=WALK_METRES_PER_MINUTE,
+                  unknown_minutes=UNKNOWN_WALK_MINUTES, shuttle_minutes=SHUTTLE_MINUTES):
+    """Minutes from building i to building j as an n x n float32 matrix.
+
+    ``buildings`` are the names behind the building codes; ``campus`` is a
+    parallel sequence of campus labels (default: taken from the names).
+    """
+    positions = BUILDING_POSITIONS if positions is None else positions
+    parts = [split_building(name) for name in buildings]
+    if campus is None:
+        campus = [c for c, _ in parts]
+    campus_codes = np.unique(np.array([str(c) for c in campus], dtype=object), return_inverse=True)[1]
+    xy = np.array([positions.get(block, (np.nan, np.nan)) for _, block in parts], dtype=float).reshape(-1, 2)
+    walk = np.hypot(xy[:, None, 0] - xy[None, :, 0], xy[:, None, 1] - xy[None, :, 1]) / walk_speed
+    minutes = np.where(np.isnan(walk), unknown_minutes, walk)
+    minutes = np.where(campus_codes[:, None] != campus_codes[None, :], shuttle_minutes, minutes)
+    np.fill_diagonal(minutes, 0)
+    return minutes.astype(np.float32)
+
+
+def building_campus(room_building, room_campus, n_buildings):
+    """Campus label of each building code from per-room arrays (first room seen wins)"""
+    campus = [None] * n_buildings
+    for b, c in zip(room_building, room_campus):
+        if b >= 0 and campus[b] is None:
+            campus[b] = c
+    return campus
+
+
+def main():
+    """Print the single-campus matrix of the generator's blocks (tests/test_travel.py checks the scoring)"""
+    names = list(BUILDING_POSITIONS)
+    for name, row in zip(names, travel_matrix(names)):
+        print(f"{name:>16}: " + ' '.join(f'{m:5.1f}' for m in row))
+
+if __name__ == '__main__':
+    main()